@@ -0,0 +1,138 @@
+# Traffic anomaly scoring against rolling baselines.
+# Every sample is compared with an EWMA mean/variance of the samples before it
+# from the same source_ip and from the same protocol, for outbound bytes and the
+# outbound/inbound ratio. The anomaly score is the largest of those z-scores, so
+# unlabelled exfiltration (a source suddenly sending far more than it receives)
+# stands out.
+# The EWMA is a segmented linear scan over rows sorted by key (see segmented_ewma)
+# seeded with the per-key state left by the previous batch, so new rows are
+# scored without revisiting history.
+import numpy as np
+import pandas as pd
+
+from schema import NO_IP
+from time_index import TimeIndex
+
+
+def segmented_ewma(values, starts, alpha, eps=1e-17):
+    # EWMA (adjust=False) down the rows of `values`, restarting where `starts` is True.
+    # m[i] = (1 - alpha) * m[i-1] + alpha * x[i] is an affine map per row; composing
+    # maps over doubling offsets (Hillis-Steele scan) needs only log2 steps, and
+    # stops once older rows weigh less than eps.
+    decay = np.where(starts, 0.0, 1 - alpha)[:, None]
+    m = np.where(starts[:, None], values, alpha * values)
+    offset = 1
+    while offset < len(values) and (1 - alpha) ** offset > eps and decay[offset:].any():
+        m[offset:] = m[offset:] + decay[offset:] * m[:-offset]
+        decay[offset:] = decay[offset:] * decay[:-offset]
+        offset *= 2
+    return m
+
+
+class EwmaBaseline:
+    def __init__(self, key, columns, alpha=0.1, min_periods=5, min_std=0.01):
+        self.key = key
+        self.columns = list(columns)
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.min_std = min_std  # relative to the mean, avoids infinite z on flat baselines
+        # key -> samples seen and EWMA of each column and of its square
+        self.state = pd.DataFrame(columns=['n'] + self.columns + [c + '_sq' for c in self.columns], dtype='float64')
+
+    def score(self, values, keys):
+        # values: float frame of self.columns in time order, keys aligned with it.
+        # Returns z-scores (NaN until a key has min_periods samples) and updates the state.
+        k = len(self.columns)
+        x = values.to_numpy(dtype='float64')
+        codes, uniques = pd.factorize(np.asarray(keys))
+        prior = self.state.reindex(uniques)
+        prior_n = prior['n'].fillna(0).to_numpy()
+        seeded = prior_n > 0
+
+        # Previous state goes in front of each key's rows as an observation (seq 0)
+        seed_codes = np.flatnonzero(seeded)
+        rows = np.concatenate([prior.to_numpy()[seeded, 1:], np.hstack([x, x ** 2])])
+        group = np.concatenate([seed_codes, codes])
+        seq = np.concatenate([np.zeros(len(seed_codes), dtype=np.int64), np.arange(1, len(x) + 1)])
+        # seeds come first in `group`, so a stable sort keeps each key's seed and rows in order
+        order = np.argsort(group.astype(np.min_scalar_type(len(uniques))), kind='stable')
+        rows, group, seq = np.take(rows, order, axis=0), group[order], seq[order]
+        starts = np.ones(len(group), dtype=bool)
+        starts[1:] = group[1:] != group[:-1]
+        ew = segmented_ewma(rows, starts, self.alpha)
+
+        # Baseline before each row, and how many samples of its key it summarises
+        position = np.arange(len(group))
+        position -= np.maximum.accumulate(np.where(starts, position, 0))
+        seen = prior_n[group] + position - seeded[group]
+        mean, mean_sq = ew[:-1, :k], ew[:-1, k:]  # row i-1 is the baseline of row i
+        bias = 1 - (1 - self.alpha) ** np.maximum(seen[1:] - 1, 1)
+        std = np.sqrt(np.clip(mean_sq - mean ** 2, 0, None) / bias[:, None])
+        std = np.maximum(std, self.min_std * np.abs(mean) + 1e-9)
+        z = np.full((len(group), k), np.nan)
+        z[1:] = (rows[1:, :k] - mean) / std
+        z[(seen < self.min_periods) | starts] = np.nan
+        result = np.empty_like(x)
+        is_row = seq > 0
+        result[seq[is_row] - 1] = z[is_row]
+
+        ends = np.ones(len(group), dtype=bool)
+        ends[:-1] = starts[1:]
+        state = pd.DataFrame(ew[ends], index=uniques[group[ends]], columns=self.state.columns[1:])
+        state.insert(0, 'n', prior_n[group[ends]] + np.bincount(codes, minlength=len(uniques))[group[ends]])
+        self.state = state.combine_first(self.state) if len(self.state) else state
+        return pd.DataFrame(result, columns=self.columns)
+
+
+class TrafficScorer:
+    def __init__(self, alpha=0.1, min_periods=5, chunk_rows=1000000, keep_score=None):
+        self.baselines = {
+            key: EwmaBaseline(key, ['outbound_bytes', 'log_ratio'], alpha, min_periods)
+            for key in ('source_ip', 'protocol')
+        }
+        self.chunk_rows = chunk_rows  # bounds the scoring temporaries on bulk loads
+        # Only samples scoring at least keep_score are kept (all when None), so the
+        # scored rows held grow with the anomalies rather than with the traffic
+        self.keep_score = keep_score
+        self.index = None
+
+    def score(self, rows):
+        # Scored copy of the traffic rows, in time order
+        rows = rows[rows['sample_time'].notna()].sort_values('sample_time', kind='stable')
+        outbound = rows['outbound_bytes'].to_numpy(dtype='float64')
+        inbound = rows['inbound_bytes'].to_numpy(dtype='float64')
+        values = pd.DataFrame({'outbound_bytes': outbound, 'log_ratio': np.log1p(outbound) - np.log1p(inbound)})
+        scored = rows[['sample_time', 'source_ip', 'protocol', 'inbound_bytes', 'outbound_bytes']]
+        scored = scored.reset_index(drop=True)
+        scored['ratio'] = (outbound / np.maximum(inbound, 1)).round(3)
+        for key, baseline in self.baselines.items():
+            keys = rows[key].to_numpy()
+            if key == 'source_ip' and (keys == NO_IP).any():
+                # samples without a valid source IP have no per-IP baseline
+                valid = keys != NO_IP
+                z = pd.DataFrame(np.nan, index=values.index, columns=baseline.columns)
+                z.loc[valid] = baseline.score(values[valid].reset_index(drop=True), keys[valid]).to_numpy()
+            else:
+                z = baseline.score(values, keys)
+            for col in z.columns:
+                scored[f'z_{key}_{col}'] = z[col].to_numpy().astype('float32')
+        z_cols = [c for c in scored.columns if c.startswith('z_')]
+        scored['score'] = scored[z_cols].max(axis=1)
+        return scored
+
+    def add(self, rows):
+        rows = rows[rows['sample_time'].notna()].sort_values('sample_time', kind='stable')
+        for start in range(0, max(len(rows), 1), self.chunk_rows):
+            scored = self.score(rows.iloc[start:start + self.chunk_rows])
+            if self.keep_score is not None:
+                scored = scored[scored['score'] >= self.keep_score].reset_index(drop=True)
+            if self.index is None:
+                self.index = TimeIndex(scored, 'sample_time', presorted=True)
+            else:
+                self.index.append(scored)
+
+    def top(self, start=None, end=None, n=100, min_score=3.0):
+        # Highest scoring samples in [start, end) (min_score below keep_score
+        # returns only the kept samples)
+        rows = self.index.slice(start, end, inclusive_end=False)
+        return rows[rows['score'] >= min_score].nlargest(n, 'score')
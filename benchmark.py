@@ -0,0 +1,699 @@
+# Benchmarks for the dashboard.
+#
+# Cold start: each measurement runs in a fresh interpreter so nothing is shared
+# between runs. "import" is the worker boot cost (module import up to
+# app.layout), "first_tab" adds building the default tab, and "all_tabs" builds
+# every tab, which is what the old eager layout paid at import time.
+#
+#   python benchmark.py coldstart --repeat 5
+#   python benchmark.py coldstart --no-cache   (clears the Parquet cache before each run)
+#
+# Memory: deep memory usage of each table as plain parsed CSV (object/string
+# columns) against the compact schema from schema.py.
+#
+#   python benchmark.py memory
+#
+# Detect: sustained throughput of the brute-force detector (detection.py) on
+# synthetic login events fed in batches, as live mode does.
+#
+#   python benchmark.py detect --rows 5000000
+#
+# Correlate: the cross-source correlation join (correlate.py) on synthetic auth,
+# web and traffic sources sharing one IP pool.
+#
+#   python benchmark.py correlate --rows 2000000
+#
+# Sketches: HyperLogLog, Count-Min and Space-Saving (sketches.py) against exact
+# nunique / weighted value_counts, with the memory each one used.
+#
+#   python benchmark.py sketches --rows 2000000
+#
+# Anomaly: throughput of the traffic anomaly scoring (anomaly.py), one bulk
+# load followed by incremental batches as in live mode.
+#
+#   python benchmark.py anomaly --rows 20000000
+#
+# Rules: the rule engine (rules.py) on synthetic web logs fed in batches, with
+# --rules generated rules drawn from a small set of predicates, half of them
+# windowed per client. Compared against evaluating each rule on its own, which
+# is what the engine saves by sharing predicate masks between rules.
+#
+#   python benchmark.py rules --rows 5000000 --rules 50
+#
+# Wire: bytes on the wire and server time of the main callbacks, posted through
+# the Flask test client like the browser does, per Accept-Encoding. "cold" is
+# the first call (figures built), "warm" the median of the repeats (served from
+# the result cache, so mostly serialization and compression).
+#
+#   python benchmark.py wire --repeat 20
+#
+# Suite: the dashboard on synthetic datasets (synthetic.py) at several scales.
+# Per scale, a fresh interpreter loads the CSVs (once parsing them, once from the
+# Parquet cache), builds every tab and posts every callback, recording cold
+# start, per-tab build time, per-callback latency and payload bytes, and peak
+# RSS. Datasets are generated once under --data-dir and reused. Results go to a
+# JSON file; compare prints the metrics that changed between two of them.
+#
+#   python benchmark.py suite --scales 100000 1000000 10000000 --out results.json
+#
+# Store: the web logs of one synthetic scale held in memory (from the Parquet
+# cache) against the on-disk event store (event_store.py), first while importing
+# the CSV into it and then reopened. Reports open time, resident memory after
+# opening and after reading 1, 7 and 30 day windows, and the time of each read.
+#
+#   python benchmark.py store --rows 10000000
+#   python benchmark.py compare before.json after.json
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+
+COLDSTART_SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+import capstone_final as app_module
+t_import = time.perf_counter() - t0
+mode = {mode!r}
+tabs = list(app_module.TAB_BUILDERS) if mode == 'all_tabs' else ['tab-siem'] if mode == 'first_tab' else []
+for tab_id in tabs:
+    app_module.tab_content(tab_id)
+print(json.dumps({{'import': t_import, 'total': time.perf_counter() - t0}}))
+"""
+
+
+SUITE_SNIPPET = """
+import json, resource, time
+t0 = time.perf_counter()
+import capstone_final as app_module
+import benchmark
+result = {{'import_s': time.perf_counter() - t0, 'tabs_s': {{}}}}
+for tab_id in app_module.TAB_BUILDERS:
+    t = time.perf_counter()
+    app_module.tab_content(tab_id)
+    result['tabs_s'][tab_id] = time.perf_counter() - t
+result['all_tabs_s'] = time.perf_counter() - t0
+sources = app_module.live.sources
+result['dataset_rows'] = {{name: len(source.index) for name, source in sources.items()}}
+result['dataset_bytes'] = {{name: source.index.memory_usage() for name, source in sources.items()}}
+result['callbacks'] = benchmark.measure_callbacks(app_module, {repeat})
+result['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+print(json.dumps(result))
+"""
+
+STORE_SNIPPET = """
+import json, resource, time
+import pandas as pd
+import capstone_final as app_module
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+t0 = time.perf_counter()
+index = app_module.get_web_logs()
+result = {{'open_s': time.perf_counter() - t0, 'open_rss_bytes': rss(), 'windows': {{}}}}
+start = index.min().floor('D')
+for days in {windows}:
+    t0 = time.perf_counter()
+    rows = index.slice(start, start + pd.Timedelta(days=days), inclusive_end=False,
+                       columns=['timestamp', 'http_method', 'status_code'])
+    result['windows'][str(days)] = {{'rows': len(rows), 'ms': (time.perf_counter() - t0) * 1000,
+                                     'rss_bytes': rss()}}
+    del rows
+result['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+print(json.dumps(result))
+"""
+
+
+def run_coldstart(mode, repeat, clear_cache):
+    import ingest
+
+    samples = []
+    for _ in range(repeat):
+        if clear_cache:
+            shutil.rmtree(ingest.CACHE_DIR, ignore_errors=True)
+        out = subprocess.run([sys.executable, '-c', COLDSTART_SNIPPET.format(mode=mode)],
+                             check=True, capture_output=True, text=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1])['total'])
+    return {'mode': mode, 'runs': repeat, 'median_s': statistics.median(samples),
+            'min_s': min(samples), 'max_s': max(samples)}
+
+
+def coldstart(args):
+    results = [run_coldstart(mode, args.repeat, args.no_cache) for mode in ('import', 'first_tab', 'all_tabs')]
+    for r in results:
+        print(f"{r['mode']:>10}: median {r['median_s']:.3f}s  (min {r['min_s']:.3f}s, max {r['max_s']:.3f}s, n={r['runs']})")
+    return results
+
+
+def memory(args):
+    import pandas as pd
+    import ingest
+    import schema
+
+    results = {}
+    for name, spec in ingest.DATASETS.items():
+        before = pd.read_csv(spec['path'], dtype=spec['dtype'], parse_dates=[spec['time_col']])
+        after = ingest.load_dataset(name, use_cache=False)
+        results[name] = r = schema.memory_report(before, after)
+        print(f"{name:>17}: {r['before_bytes'] / 2**20:8.2f} MiB -> {r['after_bytes'] / 2**20:8.2f} MiB"
+              f"  ({r['ratio']:.1f}x, {r['rows']} rows)")
+    return results
+
+
+def synthetic_logins(rows, users=5000, ips=50000, failure_rate=0.1, seed=0):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2025-06-01').value
+    times = np.sort(rng.integers(start, start + 30 * 86400 * 10**9, rows))
+    return pd.DataFrame({
+        'date': pd.to_datetime(times, unit='ns'),
+        'username': pd.Categorical.from_codes(rng.integers(0, users, rows), [f'user{i}' for i in range(users)]),
+        'ip_address': rng.integers(0, 2**32, ips, dtype=np.uint32)[rng.integers(0, ips, rows)],
+        'login_success': rng.random(rows) >= failure_rate,
+    })
+
+
+def detect(args):
+    import time
+    from detection import BruteForceDetector
+
+    logins = synthetic_logins(args.rows)
+    detector = BruteForceDetector()
+    t0 = time.perf_counter()
+    for start in range(0, len(logins), args.batch):
+        detector.feed(logins.iloc[start:start + args.batch])
+    elapsed = time.perf_counter() - t0
+    result = {'rows': len(logins), 'seconds': elapsed, 'events_per_s': len(logins) / elapsed,
+              'alerts': len(detector.alerts)}
+    print(f"{result['rows']} events in {elapsed:.2f}s: {result['events_per_s']:,.0f} events/s, "
+          f"{result['alerts']} alerts")
+    return result
+
+
+def correlate(args):
+    import time
+    import numpy as np
+    import pandas as pd
+    from correlate import correlate as correlate_sources
+
+    rng = np.random.default_rng(1)
+    authlogs = synthetic_logins(args.rows, ips=args.ips)
+    pool = authlogs['ip_address'].unique()
+
+    def events(time_col, n):
+        start = pd.Timestamp('2025-06-01').value
+        return pd.DataFrame({time_col: pd.to_datetime(np.sort(rng.integers(start, start + 30 * 86400 * 10**9, n)),
+                                                      unit='ns'),
+                             'ip': pool[rng.integers(0, len(pool), n)]})
+
+    web_logs = events('timestamp', args.rows).rename(columns={'ip': 'ip_address'})
+    web_logs['status_code'] = rng.choice(np.array([200, 302, 404, 500], dtype=np.uint16), len(web_logs))
+    suspicious = events('sample_time', args.rows).rename(columns={'ip': 'source_ip'}) \
+        .assign(protocol='TCP', inbound_bytes=0, outbound_bytes=0)
+    alerts = events('detection_time', args.rows // 100)
+
+    t0 = time.perf_counter()
+    result = correlate_sources(suspicious, authlogs, web_logs, alerts, args.window)
+    elapsed = time.perf_counter() - t0
+    print(f"{args.rows} rows per source, window {args.window}: {elapsed:.2f}s, {len(result)} correlated samples")
+    return {'rows': args.rows, 'window': args.window, 'seconds': elapsed, 'correlated': len(result)}
+
+
+def sketches(args):
+    import numpy as np
+    import pandas as pd
+    from sketches import HyperLogLog, HeavyHitters, TimeBuckets
+
+    rng = np.random.default_rng(2)
+    results = {'distinct': [], 'heavy_hitters': []}
+    for precision in (10, 12, 14):
+        for distinct in (1000, 100000, args.rows):
+            values = pd.Series(rng.integers(0, distinct, args.rows, dtype=np.uint32))
+            exact = values.nunique()
+            hll = HyperLogLog(precision)
+            hll.add(values)
+            error = hll.count() / exact - 1
+            results['distinct'].append({'precision': precision, 'exact': exact, 'estimate': hll.count(),
+                                        'error': error, 'bytes': hll.nbytes})
+            print(f"HLL p={precision:>2} ({hll.nbytes:>6} B): {exact:>9} distinct, estimate {hll.count():>9} "
+                  f"({error:+.2%})")
+
+    # Skewed traffic over a month: top keys by weight, from daily buckets merged
+    start = pd.Timestamp('2025-06-01').value
+    rows = pd.DataFrame({
+        'time': pd.to_datetime(np.sort(rng.integers(start, start + 30 * 86400 * 10**9, args.rows)), unit='ns'),
+        'key': (rng.zipf(1.2, args.rows) % 1000003).astype(np.uint32),
+        'weight': rng.integers(1, 60000, args.rows),
+    })
+    exact = rows.groupby('key')['weight'].sum().sort_values(ascending=False)
+    for capacity in (100, 1000):
+        buckets = TimeBuckets('time', lambda: HeavyHitters(capacity=capacity),
+                              lambda hh, part: hh.add(part['key'], part['weight']), freq='D', rows=rows)
+        top = buckets.merged().top(args.top)
+        recall = len(top.index.intersection(exact.index[:args.top])) / args.top
+        error = (top['count'] / exact.reindex(top.index) - 1).abs().max()
+        results['heavy_hitters'].append({'capacity': capacity, 'recall': recall, 'max_error': error,
+                                         'bytes': buckets.nbytes})
+        print(f"Space-Saving k={capacity:>4} + Count-Min ({buckets.nbytes / 2**20:.1f} MiB over 30 buckets): "
+              f"top-{args.top} recall {recall:.0%}, max count error {error:.2%}")
+    return results
+
+
+def anomaly(args):
+    import time
+    import numpy as np
+    import pandas as pd
+    from anomaly import TrafficScorer
+
+    rng = np.random.default_rng(3)
+    start = pd.Timestamp('2025-06-01').value
+    traffic = pd.DataFrame({
+        'sample_time': pd.to_datetime(np.sort(rng.integers(start, start + 30 * 86400 * 10**9, args.rows)), unit='ns'),
+        'source_ip': rng.integers(0, 2**32, args.ips, dtype=np.uint32)[rng.integers(0, args.ips, args.rows)],
+        'protocol': pd.Categorical.from_codes(rng.integers(0, 5, args.rows), ['TCP', 'UDP', 'ICMP', 'HTTP', 'HTTPS']),
+        'inbound_bytes': rng.integers(0, 60000, args.rows),
+        'outbound_bytes': rng.integers(0, 60000, args.rows),
+    })
+    bulk = len(traffic) - len(traffic) // 10
+    scorer = TrafficScorer()
+    t0 = time.perf_counter()
+    scorer.add(traffic.iloc[:bulk])
+    t_bulk = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for start in range(bulk, len(traffic), args.batch):
+        scorer.add(traffic.iloc[start:start + args.batch])
+    t_incremental = time.perf_counter() - t0
+    result = {'rows': args.rows, 'bulk_per_s': bulk / t_bulk,
+              'incremental_per_s': (len(traffic) - bulk) / t_incremental}
+    print(f"bulk: {bulk} samples in {t_bulk:.2f}s ({result['bulk_per_s']:,.0f}/s)")
+    print(f"incremental: {len(traffic) - bulk} samples in batches of {args.batch} in {t_incremental:.2f}s "
+          f"({result['incremental_per_s']:,.0f}/s)")
+    return result
+
+
+def incidents(args):
+    import time
+    import numpy as np
+    import pandas as pd
+    from incidents import IncidentMetrics, INCIDENT_DIMS
+
+    rng = np.random.default_rng(4)
+    start = pd.Timestamp('2020-01-01').value
+    reports = pd.DataFrame({
+        'report_time': pd.to_datetime(np.sort(rng.integers(start, start + args.days * 86400 * 10**9, args.rows)),
+                                      unit='ns'),
+        'category': pd.Categorical.from_codes(rng.integers(0, 6, args.rows), [
+            'Phishing', 'Data Leak', 'Malware Infection', 'Unauthorized Access', 'DDoS Attempt', 'Policy Violation']),
+        'detected_by': pd.Categorical.from_codes(rng.integers(0, 4, args.rows),
+                                                 ['Antivirus', 'System Logs', 'IDS', 'Human']),
+        'response_time_minutes': np.clip(rng.lognormal(np.log(60), 0.9, args.rows), 1, 10000).astype(np.uint16),
+        'resolution_status': pd.Categorical.from_codes(rng.choice(3, args.rows, p=[0.6, 0.3, 0.1]),
+                                                       ['Resolved', 'In Progress', 'Not Started']),
+    })
+    t0 = time.perf_counter()
+    metrics = IncidentMetrics('report_time')
+    for part in range(0, len(reports), args.batch):
+        metrics.add(reports.iloc[part:part + args.batch])
+    t_build = time.perf_counter() - t0
+    result = {'rows': args.rows, 'build_per_s': args.rows / t_build, 'bytes': metrics.nbytes, 'windows': []}
+    print(f"build: {args.rows} reports over {args.days} days in {t_build:.2f}s "
+          f"({result['build_per_s']:,.0f}/s), {metrics.nbytes / 2**20:.1f} MiB")
+
+    # Per-dimension and per-day summaries of a window, against grouping the window's rows
+    last = reports['report_time'].iloc[-1].floor('D') + pd.Timedelta(days=1)
+    for days in args.windows:
+        first = last - pd.Timedelta(days=days)
+        t0 = time.perf_counter()
+        for by in [[dim] for dim in INCIDENT_DIMS] + [['day']]:
+            summary = metrics.summary(first, last, by=by)
+        t_summary = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        rows = reports[(reports['report_time'] >= first) & (reports['report_time'] < last)]
+        minutes = rows['response_time_minutes']
+        for by in [[rows[dim]] for dim in INCIDENT_DIMS] + [[rows['report_time'].dt.floor('D').rename('day')]]:
+            exact = minutes.groupby(by, observed=True).agg(['mean', lambda x: x.quantile(0.9)])
+        t_scan = time.perf_counter() - t0
+        error = (summary['p90'] / exact.iloc[:, 1] - 1).abs().max()
+        result['windows'].append({'days': days, 'summary_s': t_summary, 'scan_s': t_scan, 'p90_error': error})
+        print(f"{days:>5} days: summaries {t_summary * 1000:8.1f} ms, grouping the rows {t_scan * 1000:8.1f} ms, "
+              f"daily p90 error <= {error:.2%}")
+    return result
+
+
+def synthetic_rules(count, seed=0):
+    import numpy as np
+    from rules import Rule
+
+    rng = np.random.default_rng(seed)
+    predicates = ["status_code in (401, 403)", "status_code >= 500", "status_code == 404",
+                  "http_method == 'POST'", "http_method in ('PUT', 'DELETE')",
+                  "response_time_ms > 1500", "response_time_ms > 3000", "url_accessed == '/login'"]
+    rules = []
+    for i in range(count):
+        terms = rng.choice(predicates, rng.integers(1, 3), replace=False)
+        where = ' and '.join(terms)
+        if i % 2:
+            rules.append(Rule(f'rule-{i}', 'web_logs', where, group_by='ip_address', window='5min',
+                              min_count=int(rng.integers(3, 10))))
+        else:
+            rules.append(Rule(f'rule-{i}', 'web_logs', where))
+    return rules
+
+
+def rules(args):
+    import time
+    import numpy as np
+    import pandas as pd
+    from rules import RuleEngine
+
+    rng = np.random.default_rng(5)
+    start = pd.Timestamp('2025-06-01').value
+    urls = ['/', '/login', '/admin', '/api/data', '/search', '/upload', '/logout', '/profile']
+    weblogs = pd.DataFrame({
+        'timestamp': pd.to_datetime(np.sort(rng.integers(start, start + 30 * 86400 * 10**9, args.rows)), unit='ns'),
+        'ip_address': rng.integers(0, 2**32, args.ips, dtype=np.uint32)[rng.integers(0, args.ips, args.rows)],
+        'url_accessed': pd.Categorical.from_codes(rng.integers(0, len(urls), args.rows), urls),
+        'http_method': pd.Categorical.from_codes(rng.integers(0, 4, args.rows), ['GET', 'POST', 'PUT', 'DELETE']),
+        'status_code': rng.choice([200, 301, 401, 403, 404, 500, 503], args.rows,
+                                  p=[0.8, 0.04, 0.04, 0.03, 0.05, 0.02, 0.02]).astype(np.uint16),
+        'response_time_ms': rng.integers(10, 5000, args.rows).astype(np.uint16),
+    })
+    result = {'rows': args.rows, 'rules': args.rules}
+    for label, engines in (('shared', [RuleEngine(synthetic_rules(args.rules))]),
+                           ('per rule', [RuleEngine([rule]) for rule in synthetic_rules(args.rules)])):
+        t0 = time.perf_counter()
+        for part in range(0, len(weblogs), args.batch):
+            batch = weblogs.iloc[part:part + args.batch]
+            for engine in engines:
+                engine.evaluate(batch, 'web_logs', 'timestamp')
+        elapsed = time.perf_counter() - t0
+        fired = sum(rule.fired for engine in engines for rules in engine.rules.values() for rule in rules)
+        masks = sum(engine.predicates['web_logs'] for engine in engines)
+        result[label] = {'seconds': elapsed, 'rule_rows_per_s': args.rows * args.rules / elapsed,
+                         'masks': masks, 'alerts': fired}
+        print(f"{label:>8}: {args.rules} rules x {args.rows} rows in {elapsed:.2f}s "
+              f"({args.rows * args.rules / elapsed:,.0f} rule-rows/s, {args.rows / elapsed:,.0f} rows/s), "
+              f"{masks} masks, {fired} alerts")
+    return result
+
+
+def data_range(app_module):
+    # Date range covered by the loaded alerts, for the time window
+    alerts = app_module.get_alerts()
+    return str(alerts.min().date()), str(alerts.max().date())
+
+
+def wire_callbacks(app_module, start, end):
+    # name -> (outputs, inputs, state) of the callback requests the browser sends
+    import pandas as pd
+
+    def prop(component, name, value):
+        return {'id': component, 'property': name, 'value': value}
+
+    def table(table_id):
+        return [prop(table_id, 'page_current', 0), prop(table_id, 'page_size', 10), prop(table_id, 'sort_by', []),
+                prop(table_id, 'filter_query', '')]
+
+    live = {name: prop(f'live-version-{name}', 'data', None) for name in app_module.LIVE_DATASETS}
+    quarter = pd.Timestamp(start) + (pd.Timestamp(end) - pd.Timestamp(start)) / 4
+    zoom = {'xaxis.range[0]': start, 'xaxis.range[1]': str(quarter)}
+    # the whole range, as the tables and charts open, and its first quarter for the panel tabs
+    window = prop('time-window', 'data', {'start': start, 'end': end})
+    quarter_window = prop('time-window', 'data', {'start': start, 'end': str(quarter.date())})
+    callbacks = {}
+    for tab_id in ('tab-siem', 'tab-auth', 'tab-web', 'tab-network'):
+        for label, time_window in (('', prop('time-window', 'data', None)), (' window', quarter_window)):
+            callbacks[f'render_tab {tab_id}{label}'] = (
+                ['tab-content.children', 'tab-snapshot.data'],
+                [prop('tabs', 'active_tab', tab_id), prop('live-interval', 'n_intervals', None), time_window]
+                + list(live.values()),
+                [prop('tab-snapshot', 'data', None)])
+    callbacks['update_malware_alerts'] = (
+        ['bar-chart-threat-totals.figure', 'malware-alerts-message.children', 'malware-alerts-content.style',
+         'datatable-threat-records.page_current'],
+        [window, live['malware_alerts']], [])
+    callbacks['page_threat_records'] = (
+        ['datatable-threat-records.data', 'datatable-threat-records.page_count'],
+        table('datatable-threat-records') + [window], [])
+    callbacks['page_open_incidents'] = (
+        ['open-incidents-table.data', 'open-incidents-table.page_count'],
+        table('open-incidents-table') + [window, live['incident_reports']], [])
+    callbacks['page_rule_alerts'] = (
+        ['rule-alerts-table.data', 'rule-alerts-table.page_count'],
+        table('rule-alerts-table') + [window] + [live[name] for name in app_module.RULE_SOURCES], [])
+    callbacks['update_threat_monitoring'] = (['threat-monitoring-content.children'], [window, live['malware_alerts']], [])
+    for name, table_id in (('filter_suspicious_by_date', 'suspicious-table'), ('top_traffic_anomalies', 'anomaly-table')):
+        callbacks[name] = ([f'{table_id}.data', f'{table_id}.page_count'],
+                           [window] + table(table_id) + [live['network_traffic']], [])
+    callbacks['page_correlated_incidents'] = (
+        ['correlation-table.data', 'correlation-table.page_count'],
+        [prop('correlation-window', 'value', '1h'), window] + table('correlation-table')
+        + [live[name] for name in app_module.CORRELATION_SOURCES], [])
+    callbacks['zoom_web_methods'] = (['web-method-chart.figure'], [prop('web-method-chart', 'relayoutData', zoom)],
+                                     [prop('time-window', 'data', None)])
+    callbacks['zoom_traffic'] = (['traffic-chart.figure'], [prop('traffic-chart', 'relayoutData', zoom)],
+                                 [prop('time-window', 'data', None)])
+    return callbacks
+
+
+def measure_callbacks(app_module, repeat, encodings=('identity', 'gzip')):
+    # Posts each callback through the Flask test client: response bytes per encoding,
+    # first call ("cold": computed) and median of the repeats ("warm": result cache)
+    import time
+
+    client = app_module.server.test_client()
+    results = {}
+    for name, (outputs, inputs, state) in wire_callbacks(app_module, *data_range(app_module)).items():
+        outs = [dict(zip(('id', 'property'), o.split('.'))) for o in outputs]
+        body = {'output': outputs[0] if len(outputs) == 1 else '..' + '...'.join(outputs) + '..',
+                'outputs': outs[0] if len(outs) == 1 else outs, 'inputs': inputs, 'state': state,
+                'changedPropIds': [inputs[0]['id'] + '.' + inputs[0]['property']]}
+        row = results[name] = {}
+        for encoding in encodings:
+            times = []
+            for _ in range(repeat + 1):
+                t0 = time.perf_counter()
+                response = client.post('/_dash-update-component', json=body, headers={'Accept-Encoding': encoding})
+                times.append(time.perf_counter() - t0)
+                assert response.status_code == 200, (name, response.status_code)
+            row[encoding] = {'bytes': len(response.get_data()), 'content_encoding': response.content_encoding,
+                             'cold_ms': times[0] * 1000, 'warm_ms': statistics.median(times[1:]) * 1000}
+    return results
+
+
+def wire(args):
+    import capstone_final as app_module
+
+    results = measure_callbacks(app_module, args.repeat, encodings=('identity', 'gzip', 'br'))
+    for name, row in results.items():
+        print(f"{name:>26}: " + "  ".join(
+            f"{enc} {r['bytes'] / 1024:7.1f} KiB {r['warm_ms']:6.1f} ms"
+            + ("" if enc == 'identity' or r['content_encoding'] == enc else " (not applied)")
+            for enc, r in row.items()) + f"  cold {row['identity']['cold_ms']:.0f} ms")
+    return results
+
+
+def suite_meta():
+    import platform
+    import time
+    import dash
+    import numpy
+    import pandas
+    import plotly
+
+    commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return {
+        'commit': commit.stdout.strip() or None,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'versions': {'pandas': pandas.__version__, 'numpy': numpy.__version__, 'dash': dash.__version__,
+                     'plotly': plotly.__version__},
+    }
+
+
+def synthetic_data(data_dir, rows, days, seed):
+    # Generated datasets for one scale, reused while the parameters match
+    import synthetic
+
+    path = os.path.join(data_dir, f'{rows}-{days}d-seed{seed}')
+    try:
+        with open(os.path.join(path, 'synthetic.json')) as f:
+            manifest = json.load(f)
+        if (manifest['rows'], manifest['days'], manifest['seed']) == (rows, days, seed):
+            return path, manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    return path, synthetic.write_datasets(path, rows, days, seed=seed)
+
+
+def run_suite_process(path, repeat, clear_cache):
+    cache_dir = os.path.join(path, '.cache')
+    if clear_cache:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    env = dict(os.environ, SIEM_DATA_DIR=path, SIEM_CACHE_DIR=cache_dir)
+    out = subprocess.run([sys.executable, '-c', SUITE_SNIPPET.format(repeat=repeat)], env=env,
+                         cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    if out.returncode != 0:
+        # e.g. killed for memory at the largest scale; keep the other results
+        return {'error': f'exit {out.returncode}', 'stderr': out.stderr[-2000:]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def suite(args):
+    results = {'meta': suite_meta(), 'scales': {}}
+    for rows in args.scales:
+        path, manifest = synthetic_data(args.data_dir, rows, args.days, args.seed)
+        entry = results['scales'][str(rows)] = {'rows': rows, 'days': args.days, 'datasets': manifest['datasets']}
+        for run, clear_cache in (('csv', True), ('cached', False)):
+            r = entry[run] = run_suite_process(path, args.repeat, clear_cache)
+            if 'error' in r:
+                print(f"{rows:>10} rows, {run:>6}: {r['error']}")
+                continue
+            slowest = max(r['callbacks'].items(), key=lambda item: item[1]['identity']['cold_ms'])
+            print(f"{rows:>10} rows, {run:>6}: import {r['import_s']:.2f}s  all tabs {r['all_tabs_s']:.2f}s  "
+                  f"peak RSS {r['peak_rss_bytes'] / 2**20:.0f} MiB  slowest callback {slowest[0]} "
+                  f"{slowest[1]['identity']['cold_ms']:.0f} ms")
+        # written after every scale, so a failure at a larger scale keeps the smaller ones
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f"results written to {args.out}")
+    return results
+
+
+def flatten(value, prefix=''):
+    if isinstance(value, dict):
+        items = {}
+        for key, child in value.items():
+            items.update(flatten(child, f'{prefix}.{key}' if prefix else str(key)))
+        return items
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def store(args):
+    path, manifest = synthetic_data(args.data_dir, args.rows, args.days, args.seed)
+    store_dir = os.path.join(path, '.store')
+    shutil.rmtree(store_dir, ignore_errors=True)
+    runs = (('memory', {}), ('store import', {'SIEM_STORE_DIR': store_dir}), ('store', {'SIEM_STORE_DIR': store_dir}))
+    results = {'rows': manifest['datasets']['web_logs']['rows']}
+    for run, extra in runs:
+        env = dict(os.environ, SIEM_DATA_DIR=path, SIEM_CACHE_DIR=os.path.join(path, '.cache'), **extra)
+        out = subprocess.run([sys.executable, '-c', STORE_SNIPPET.format(windows=args.windows)], env=env,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        if out.returncode != 0:
+            print(f"{run}: exit {out.returncode}\n{out.stderr[-2000:]}")
+            continue
+        r = results[run] = json.loads(out.stdout.strip().splitlines()[-1])
+        windows = '  '.join(f"{days}d: {w['rows']} rows {w['ms']:.0f} ms RSS {w['rss_bytes'] / 2**20:.0f} MiB"
+                            for days, w in r['windows'].items())
+        print(f"{run:>12}: open {r['open_s']:.2f}s RSS {r['open_rss_bytes'] / 2**20:.0f} MiB  {windows}  "
+              f"peak {r['peak_rss_bytes'] / 2**20:.0f} MiB")
+    return results
+
+
+def compare(args):
+    # Metrics present in both files whose value changed by at least --min-change;
+    # every metric is a time or a size, so an increase is a regression
+    with open(args.before) as f:
+        before = flatten(json.load(f)['scales'])
+    with open(args.after) as f:
+        after = flatten(json.load(f)['scales'])
+    changes = []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        if '.datasets.' in key or not old:
+            continue
+        change = new / old - 1
+        if abs(change) >= args.min_change:
+            changes.append((key, old, new, change))
+    for key, old, new, change in changes:
+        print(f"{'REGRESSION' if change > 0 else 'improved':>10} {change:+8.1%}  {old:>14.4g} -> {new:<14.4g} {key}")
+    print(f"{len(changes)} of {len(before.keys() & after.keys())} metrics changed by {args.min_change:.0%} or more")
+    return changes
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {value}')
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SIEM dashboard benchmarks')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('coldstart', help='worker boot time, lazy tabs vs building every tab')
+    p.add_argument('--repeat', type=positive_int, default=5)
+    p.add_argument('--no-cache', action='store_true', help='clear the ingestion cache before each run')
+    p.set_defaults(func=coldstart)
+    p = sub.add_parser('memory', help='per-table memory before and after the compact schema')
+    p.set_defaults(func=memory)
+    p = sub.add_parser('detect', help='brute-force detector throughput on synthetic logins')
+    p.add_argument('--rows', type=int, default=2000000)
+    p.add_argument('--batch', type=int, default=50000, help='events per feed() call')
+    p.set_defaults(func=detect)
+    p = sub.add_parser('correlate', help='cross-source correlation join on synthetic sources')
+    p.add_argument('--rows', type=int, default=1000000, help='rows per source')
+    p.add_argument('--ips', type=int, default=50000, help='size of the shared IP pool')
+    p.add_argument('--window', default='15min')
+    p.set_defaults(func=correlate)
+    p = sub.add_parser('sketches', help='sketch accuracy and memory against exact results')
+    p.add_argument('--rows', type=int, default=1000000)
+    p.add_argument('--top', type=int, default=20)
+    p.set_defaults(func=sketches)
+    p = sub.add_parser('anomaly', help='traffic anomaly scoring throughput on synthetic samples')
+    p.add_argument('--rows', type=int, default=10000000)
+    p.add_argument('--ips', type=int, default=200000, help='distinct source IPs')
+    p.add_argument('--batch', type=int, default=100000, help='samples per incremental batch')
+    p.set_defaults(func=anomaly)
+    p = sub.add_parser('incidents', help='incident SLA/MTTR summaries against grouping the raw reports')
+    p.add_argument('--rows', type=int, default=5000000)
+    p.add_argument('--days', type=int, default=3 * 365)
+    p.add_argument('--batch', type=int, default=500000, help='reports per add() call')
+    p.add_argument('--windows', type=int, nargs='+', default=[7, 30, 365, 1095], help='days summarized')
+    p.set_defaults(func=incidents)
+    p = sub.add_parser('rules', help='rule engine throughput, shared predicates against one rule at a time')
+    p.add_argument('--rows', type=int, default=2000000)
+    p.add_argument('--rules', type=int, default=50)
+    p.add_argument('--ips', type=int, default=20000, help='distinct client IPs')
+    p.add_argument('--batch', type=int, default=100000, help='rows per evaluate() call')
+    p.set_defaults(func=rules)
+    p = sub.add_parser('wire', help='callback response size and server time per content encoding')
+    p.add_argument('--repeat', type=positive_int, default=20)
+    p.set_defaults(func=wire)
+    p = sub.add_parser('suite', help='cold start, callback latency, payload and peak memory on synthetic data')
+    p.add_argument('--scales', type=int, nargs='+', default=[100000, 1000000], help='web log rows per scale')
+    p.add_argument('--days', type=int, default=30)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--repeat', type=positive_int, default=5)
+    p.add_argument('--data-dir', default='bench-data', help='where the generated datasets are kept')
+    p.add_argument('--out', default='benchmark-results.json')
+    p.set_defaults(func=suite)
+    p = sub.add_parser('store', help='in-memory web logs against the on-disk event store, per window read')
+    p.add_argument('--rows', type=int, default=1000000, help='web log rows')
+    p.add_argument('--days', type=int, default=30)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--windows', type=int, nargs='+', default=[1, 7, 30], help='days read from the first day')
+    p.add_argument('--data-dir', default='bench-data', help='where the generated datasets are kept')
+    p.set_defaults(func=store)
+    p = sub.add_parser('compare', help='metrics that changed between two suite result files')
+    p.add_argument('before')
+    p.add_argument('after')
+    p.add_argument('--min-change', type=float, default=0.1, help='smallest relative change shown')
+    p.set_defaults(func=compare)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,123 +1,250 @@
 # Library Imports
+import os
+import time
+from functools import lru_cache, partial
+
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objs as go
 import dash
 import dash_bootstrap_components as dbc
-from dash import html, dcc, dash_table
-from dash.dependencies import Input, Output
+from dash import html, dcc, dash_table, ctx
+from dash.dependencies import Input, Output, State
+from time_index import TimeIndex
+from event_store import ALL_TIME_DAYS, StoreIndex, StoreView
+from rollups import RollupCube, GroupTotals
+import live
+from gazetteer import with_coordinates
+from detection import BruteForceDetector
+from correlate import correlate
+from sketches import QuantileSketches, HyperLogLog, HeavyHitters, TimeBuckets
+from schema import NO_IP, int_to_ip
+from anomaly import TrafficScorer
+from incidents import IncidentMetrics, INCIDENT_DIMS, INCIDENT_COLUMNS
+from rules import RuleEngine, load_rules, RULES_FILE, RULE_ALERT_COLUMNS
+from resample import pick_freq, freq_label, zoom_range, rebucket, within, lttb
+from table_query import query_table
+from result_cache import ResultCache
+from figures import figure, compact, typed_array
+from compression import enable_compression
+from scheduler import Scheduler
+from executor import CallbackExecutor
+import metrics
+
+# Datasets and figures are loaded lazily: each tab builds its data and figures the
+# first time it is opened and the result is cached until its data changes.
+# Each `prepare_*` function is also applied to rows appended in live mode.
+# Column encodings (categories, packed IPs, boolean flags) come from schema.py.
+
+# Aggregates are built by folding the stored rows in one frame at a time (one day
+# at a time from the event store), with the same update used for live rows
+def fold(index, obj, update):
+    for rows in index.frames():
+        update(obj, rows)
+    return obj
+
+# Rows whose IP column holds a valid address (per-IP sketches skip NO_IP)
+def with_ip(rows, col):
+    return rows[rows[col] != NO_IP]
 
 # SIEM Data
-reports = pd.read_csv("Dataset 5__Security_Incident_Reports.csv", parse_dates=['report_time'])
-reports.category = reports['category'].astype('category')
-reports.detected_by = reports.detected_by.astype('category')
-
-#
-reports_opened = reports[reports['resolution_status'] != 'Resolved']
-data = [go.Table(
-    header=dict(values=list(reports_opened),
-                fill_color='gold',
-                align='center'),
-    cells=dict(values=[reports_opened[col] for col in reports_opened.columns],
-    fill_color='white',
-    align='center'))
-]
-table_fig = go.Figure(data=data)
-
-
-# 
-rcat = reports['category'].value_counts().reset_index()
-rcat_labels = [cat for cat in rcat['category']]
-rcat_values = [tot for tot in rcat['count']]
-p1_fig = go.Figure(data=[go.Pie(labels=rcat_labels, values=rcat_values, textinfo='label+percent',
-                             insidetextorientation='radial'
-                            )])
-
-rdetected_by = reports['detected_by'].value_counts().reset_index()
-rdetected_labels = [cat for cat in rdetected_by['detected_by']]
-rdetected_values = [tot for tot in rdetected_by['count']]
-
-p2_fig = go.Figure(data=[go.Pie(labels=rdetected_labels, values=rdetected_values, textinfo='label+percent',
-                             insidetextorientation='radial'
-                            )])
+@live.cached('incident_reports')
+def get_reports():
+    return live.load('incident_reports', 'report_time', lambda reports: reports)
+
+
+# Incident totals, MTTR, SLA breaches and response time percentiles per day and
+# dimension (incidents.py), updated as new reports arrive
+@live.cached('incident_reports')
+def get_incident_metrics():
+    reports = get_reports()
+    return live.track('incident_reports',
+                      lambda: fold(reports, IncidentMetrics('report_time'), IncidentMetrics.add),
+                      IncidentMetrics.add)
+
+
+# Open incidents, paged on the server by page_open_incidents. From the event
+# store they are selected on every read instead of being copied into memory.
+def select_open(reports):
+    return reports[reports['resolution_status'] != 'Resolved']
+
+
+@live.cached('incident_reports')
+def get_open_incidents():
+    reports = get_reports()
+    if isinstance(reports, StoreIndex):
+        return StoreView(reports, select_open)
+    return live.track('incident_reports',
+                      lambda: TimeIndex(pd.concat([select_open(rows) for rows in reports.frames()]), 'report_time'),
+                      lambda index, rows: index.append(select_open(rows)))
+
+
+def build_siem_figures(start=None, end=None):
+    incident_metrics = get_incident_metrics()
+    breakdowns = {dim: incident_metrics.summary(start, end, by=[dim]) for dim in INCIDENT_DIMS}
+
+    #
+    rcat = breakdowns['category']['incidents']
+    p1_fig = go.Figure(data=[go.Pie(labels=rcat.index.astype(str), values=rcat.to_numpy(), textinfo='label+percent',
+                                 insidetextorientation='radial'
+                                )])
+
+    rdetected_by = breakdowns['detected_by']['incidents']
+    p2_fig = go.Figure(data=[go.Pie(labels=rdetected_by.index.astype(str), values=rdetected_by.to_numpy(),
+                                    textinfo='label+percent', insidetextorientation='radial'
+                                )])
+
+    # Daily MTTR and p90 response time against the SLA, breach rate on the right axis
+    daily = incident_metrics.summary(start, end, by=['day'])
+    trend_fig = go.Figure([
+        go.Scatter(x=daily.index, y=daily['mttr'], name='MTTR', mode='lines'),
+        go.Scatter(x=daily.index, y=daily['p90'], name='p90', mode='lines', line=dict(dash='dot')),
+        go.Scatter(x=daily.index, y=daily['breach_rate'] * 100, name='SLA breaches (%)', mode='lines',
+                   yaxis='y2', line=dict(color='crimson')),
+    ])
+    trend_fig.add_hline(y=incident_metrics.sla_minutes, line_dash='dash', line_color='gray',
+                        annotation_text=f'SLA {incident_metrics.sla_minutes} min')
+    trend_fig.update_layout(
+        xaxis_title='Day',
+        yaxis=dict(title='Response Time (min)'),
+        yaxis2=dict(title='SLA Breaches (%)', overlaying='y', side='right', rangemode='tozero'),
+        hovermode='x unified',
+        legend=dict(orientation='h'),
+    )
+    return incident_metrics.summary(start, end).iloc[0], breakdowns, trend_fig, p1_fig, p2_fig
 
 #==================================================================================
-authlogs = pd.read_csv("Dateset 2__User_Authentication_Logs.csv", parse_dates=['login_timestamp'])
-authlogs.rename(columns=dict(login_timestamp='date'),inplace=True)
-authlogs['login_status'] = authlogs['login_status'].astype('category')
-
-login_totals = authlogs.username.value_counts()
-unpivoted = authlogs.groupby(['username','login_status']).size().reset_index().rename(columns={0:'Count'})
-pivoted = unpivoted.pivot(
-    columns='login_status',
-    index='username',
-    values='Count')
-
-successes = [col for col in pivoted['Success']]
-fails = [col for col in pivoted['Failure']]
-users = [ind for ind in pivoted.index]
-
-
-success_fail_chart = go.Figure()
-success_fail_chart.add_trace(go.Bar(x=[ind for ind in pivoted.index], y=successes, name="Successful Logins",marker_color='green'))
-success_fail_chart.add_trace(go.Bar(x=users, y=fails, name="Failed Attempts",marker_color='red'))
-success_fail_chart.update_layout(
-    barmode='group',
-    # title='Login Successes and Failures',
-    xaxis_title='Users',
-    yaxis_title='Count',
-)
+def prepare_authlogs(authlogs):
+    authlogs.rename(columns=dict(login_timestamp='date'),inplace=True)
+    return authlogs
+
+
+@live.cached('auth_logs')
+def get_authlogs():
+    return live.load('auth_logs', 'date', prepare_authlogs)
+
 
-failed_authlogs = authlogs[authlogs['login_status'] == 'Failure']
-failed_authlogs['geo_location'].value_counts()
-
-geo_location_pie = go.Figure(data=[go.Pie(labels=failed_authlogs['geo_location'], values=failed_authlogs['geo_location'].value_counts(), textinfo='label+percent',
-                             insidetextorientation='radial'
-                            )])
-
-data2 = pd.DataFrame({
-    'geo_location': [
-        'Sydney, Australia', 'Cape Town, South Africa', 'Mumbai, India',
-        'San Francisco, USA', 'London, UK', 'Berlin, Germany',
-        'New York, USA', 'São Paulo, Brazil', 'Tokyo, Japan', 'Toronto, Canada'
-    ],
-    'count': [75, 67, 63, 59, 55, 49, 46, 46, 46, 42],
-    'lat': [-33.8688, -33.9249, 19.0760, 37.7749, 51.5074, 52.5200, 40.7128, -23.5505, 35.6762, 43.6510],
-    'lon': [151.2093, 18.4241, 72.8777, -122.4194, -0.1278, 13.4050, -74.0060, -46.6333, 139.6503, -79.3470]
-})
-
-# Create the figure
-geomap = go.Figure()
-
-# Add scatter_geo trace
-geomap.add_trace(go.Scattergeo(
-    lon = data2['lon'],
-    lat = data2['lat'],
-    text = data2['geo_location'] + "<br>Failed Attempts:" + data2['count'].astype(str),
-    marker = dict(
-        size = data2['count'],
-        color = data2['count'],
-        colorscale = 'Hot',
-        showscale = True,
-        line=dict(width=0.5, color='white'),
-        sizemode='area',
-        sizeref=10.*max(data2['count'])/(100**2),  # Bubble size scaling
-        sizemin=4
+# Login counts per (username, login_success), updated as new auth events arrive
+@live.cached('auth_logs')
+def get_login_counts():
+    authlogs = get_authlogs()
+    return live.track('auth_logs',
+                      lambda: fold(authlogs, GroupTotals(['username', 'login_success']), GroupTotals.add),
+                      GroupTotals.add)
+
+
+# Failed login counts per geo_location, drives the location pie and the map
+def count_failed_locations(totals, rows):
+    totals.add(rows[~rows['login_success']])
+
+
+@live.cached('auth_logs')
+def get_failed_locations():
+    authlogs = get_authlogs()
+    return live.track('auth_logs',
+                      lambda: fold(authlogs, GroupTotals(['geo_location']), count_failed_locations),
+                      count_failed_locations)
+
+
+# Brute-force / credential-stuffing detector, fed every new auth event
+@live.cached('auth_logs')
+def get_bruteforce_detector():
+    authlogs = get_authlogs()
+
+    return live.track('auth_logs',
+                      lambda: fold(authlogs, BruteForceDetector(), BruteForceDetector.feed),
+                      BruteForceDetector.feed)
+
+
+# Heavy hitters among failed-login usernames, per day
+@live.cached('auth_logs')
+def get_failed_usernames():
+    authlogs = get_authlogs()
+    def add_failed(buckets, rows):
+        buckets.add(rows[~rows['login_success']])
+
+    return live.track('auth_logs',
+                      lambda: fold(authlogs, TimeBuckets('date', HeavyHitters, lambda hh, rows: hh.add(rows['username']),
+                                                         freq='D'), add_failed),
+                      add_failed)
+
+
+def build_auth_figures(window=None):
+    if window is None:
+        login_counts = get_login_counts().table
+        failed_counts = get_failed_locations().table
+        top_failed = get_failed_usernames().merged().top(20)
+    else:
+        # Totals of the window from the shared auth slice, failed usernames from the daily sketches
+        rows = window_slice('auth_logs', window)
+        login_counts = GroupTotals(['username', 'login_success'], rows=rows).table
+        failed_counts = GroupTotals(['geo_location'])
+        count_failed_locations(failed_counts, rows)
+        failed_counts = failed_counts.table
+        start, end = window_bounds(window)
+        top_failed = get_failed_usernames().merged(start, end - pd.Timedelta(1)).top(20)
+
+    login_totals = login_counts.groupby(level='username').sum()
+    pivoted = login_counts.unstack('login_success').reindex(columns=[True, False], fill_value=0)
+
+    successes = [col for col in pivoted[True]]
+    fails = [col for col in pivoted[False]]
+    users = [ind for ind in pivoted.index]
+
+
+    success_fail_chart = go.Figure()
+    success_fail_chart.add_trace(go.Bar(x=[ind for ind in pivoted.index], y=successes, name="Successful Logins",marker_color='green'))
+    success_fail_chart.add_trace(go.Bar(x=users, y=fails, name="Failed Attempts",marker_color='red'))
+    success_fail_chart.update_layout(
+        barmode='group',
+        # title='Login Successes and Failures',
+        xaxis_title='Users',
+        yaxis_title='Count',
     )
-))
-
-# Set layout
-geomap.update_layout(
-    # title = 'Geographical Representation of Failed Login Actiivty',
-    geo = dict(
-        showland = True,
-        landcolor = "white",
-        showcountries = True,
-        countrycolor = "gray",
-        projection_type = "natural earth"
-    ),
-    height=600
-)
+
+    failed_counts = failed_counts[failed_counts > 0].sort_values(ascending=False, kind='stable')
+
+    geo_location_pie = go.Figure(data=[go.Pie(labels=failed_counts.index.astype(str), values=failed_counts.values, textinfo='label+percent',
+                                 insidetextorientation='radial'
+                                )])
+
+    data2 = with_coordinates(failed_counts)
+
+    # Create the figure
+    geomap = go.Figure()
+
+    # Add scatter_geo trace
+    geomap.add_trace(go.Scattergeo(
+        lon = data2['lon'],
+        lat = data2['lat'],
+        text = data2['geo_location'] + "<br>Failed Attempts:" + data2['count'].astype(str),
+        marker = dict(
+            size = data2['count'],
+            color = data2['count'],
+            colorscale = 'Hot',
+            showscale = True,
+            line=dict(width=0.5, color='white'),
+            sizemode='area',
+            sizeref=10.*max(data2['count'], default=1)/(100**2),  # Bubble size scaling
+            sizemin=4
+        )
+    ))
+
+    # Set layout
+    geomap.update_layout(
+        # title = 'Geographical Representation of Failed Login Actiivty',
+        geo = dict(
+            showland = True,
+            landcolor = "white",
+            showcountries = True,
+            countrycolor = "gray",
+            projection_type = "natural earth"
+        ),
+        height=600
+    )
+    failed_users_chart = go.Figure(go.Bar(x=top_failed.index.astype(str), y=top_failed['count'], marker_color='red'))
+    failed_users_chart.update_layout(xaxis_title='Users', yaxis_title='Failed Attempts')
+    return success_fail_chart, geo_location_pie, geomap, failed_users_chart
 
 #==================================================================================
 # Create a function to generate a card with a graph
@@ -127,7 +254,7 @@ def make_graph_card(title, graph_figure):
             dbc.CardHeader(html.H4(title, className="card-title")),
             dbc.CardBody(
                 [
-                    dcc.Graph(figure=graph_figure)
+                    dcc.Graph(figure=compact(graph_figure))
                 ]
             ),
         ],
@@ -135,159 +262,413 @@ def make_graph_card(title, graph_figure):
     )
 
 # Function used to create display cards
-def make_pay_gap_card(title):
-    stats = dbc.Row([
-        dbc.Col([
-            html.Div("Response Time Stats",className=" border-bottom border-3"),
-            html.Div("Average Time"),
-            html.Div("Max Time"),
-            html.Div("Min Time"),
-        ], style={"minWidth": 250}),
-        
-        dbc.Col([
-            html.Div("Stats", className=" border-bottom border-3"),
-            html.Div(f"{reports['response_time_minutes'].mean()}"),
-            html.Div(f"{reports['response_time_minutes'].max()}"),
-            html.Div(f"{reports['response_time_minutes'].min()}"),
-        ])
-    ], style={"minWidth": 400})
-
-    totals = dbc.Alert(dcc.Markdown(
-        f"""
-        ** Total Incidents **  
-        ### {len(reports['incident_id'])}  
-        """,
-    ), color="dark")
-
-    mean = dbc.Alert(dcc.Markdown(
-        f"""
-        ** Open Incidents ** 
-        ### {len(reports_opened)}  
-        """,
-    ), color="dark")
+def make_incident_stats_card(overall, breakdowns, sla_minutes):
+    def tile(label, value):
+        return dbc.Col(dbc.Alert(dcc.Markdown(f"""
+        ** {label} **  
+        ### {value}  
+        """), color="dark"))
+
+    def minutes(value):
+        return '-' if pd.isna(value) else f"{value:g} min"
+
+    breach_rate = '-' if pd.isna(overall['breach_rate']) else f"{overall['breach_rate']:.1%}"
+    tiles = dbc.Row([
+        tile("Total Incidents", int(overall['incidents'])),
+        tile("Open Incidents", int(overall['open'])),
+        tile("MTTR", minutes(overall['mttr'])),
+        tile(f"SLA Breaches (> {sla_minutes} min)", breach_rate),
+    ], className="text-center")
+    percentiles = html.Div(
+        "Response time percentiles: " + ", ".join(f"{col} {minutes(overall[col])}" for col in ('p50', 'p90', 'p95')),
+        className="mb-3 text-center")
+
+    # One sortable table per dimension, switched in the browser
+    tables = dbc.Tabs([
+        dbc.Tab(dash_table.DataTable(
+            columns=[{'name': col, 'id': col} for col in [dim] + INCIDENT_COLUMNS],
+            data=breakdown.reset_index().astype({dim: str}).to_dict('records'),
+            sort_action='native',
+            style_table={'overflowX': 'auto'},
+        ), label=dim.replace('_', ' ').title())
+        for dim, breakdown in breakdowns.items()
+    ])
 
     card =  dbc.Card([
         dbc.CardHeader(html.H2("Incident Stats"), className="text-center"),
-        dbc.CardBody([
-            dbc.Row([dbc.Col(totals), dbc.Col(mean)], className="text-center"),
-            stats
-        ])
+        dbc.CardBody([tiles, percentiles, tables])
     ])
     return card
+
+
+# Open incidents, paged, sorted and filtered on the server
+def make_open_incidents_card():
+    columns = get_open_incidents().columns
+    return dbc.Card([
+        dbc.CardHeader(html.H4("Open Incidents", className="card-title")),
+        dbc.CardBody(dash_table.DataTable(
+            id='open-incidents-table',
+            columns=[{'name': col, 'id': col} for col in columns],
+            data=[],
+            style_table={'overflowX': 'auto'},
+            style_header={'backgroundColor': 'gold', 'fontWeight': 'bold'},
+            page_size=15,
+            page_current=0,
+            page_action='custom',
+            sort_action='custom',
+            filter_action='custom',
+            sort_by=[],
+            filter_query='',
+        ))
+    ], className="mb-4 shadow")
+
+# Card listing the latest brute-force alerts (of the time window), newest first
+def make_bruteforce_card(window=None):
+    detector = get_bruteforce_detector()
+    if window is None:
+        alerts = detector.alerts_frame(limit=500)
+    else:
+        start, end = window_bounds(window)
+        alerts = detector.alerts_frame()
+        alerts = alerts[(alerts['time'] >= start) & (alerts['time'] < end)].head(500)
+    return dbc.Card([
+        dbc.CardHeader(html.H4("Brute-force & Credential Stuffing Alerts", className="card-title")),
+        dbc.CardBody([
+            html.Div(f"{len(detector.alerts)} alerts from {detector.events} login events "
+                     f"({detector.max_failures} failures within {detector.window} per user, IP or user/IP pair, "
+                     f"or a success after {detector.success_after} failures)", className="mb-2"),
+            dash_table.DataTable(
+                columns=[{'name': col, 'id': col} for col in alerts.columns],
+                data=alerts.astype({'time': str, 'first_failure': str}).to_dict('records'),
+                page_size=10,
+                sort_action='native',
+                style_table={'overflowX': 'auto'},
+            )
+        ])
+    ], className="mb-4 shadow")
 #################################################################################################
 
 # Building SIEM Dashboard Content and Layot for Tab
-tab1_siem = dbc.Container(
-    [
-        html.H1("Everything Organic - SIEM Dahboard", className="my-4 text-center"),
-        dbc.Row(
-            [
-                dbc.Col(make_pay_gap_card("Test"),xl=12),
-                dbc.Col(make_graph_card("Threat Categories", p1_fig),md=6),
-                dbc.Col(make_graph_card("Security Appliances", p2_fig),md=6),
-            ],
-            className="mb-4"
-        ),
-        # You can add more rows and cards as needed
-        dbc.Row(
-            [
-                dbc.Col(make_graph_card("Open Incidents",table_fig),lg=12)
-            ],
-            className="mb-4"
-        )
-    ],
-    fluid=True,
-)
+def build_siem_tab(window=None):
+    overall, breakdowns, trend_fig, p1_fig, p2_fig = build_siem_figures(*window_bounds(window))
+    if not overall['incidents']:
+        return no_data_view()
+    return dbc.Container(
+        [
+            html.H1("Everything Organic - SIEM Dahboard", className="my-4 text-center"),
+            dbc.Row(
+                [
+                    dbc.Col(make_incident_stats_card(overall, breakdowns, get_incident_metrics().sla_minutes),xl=12),
+                    dbc.Col(make_graph_card("Threat Categories", p1_fig),md=6),
+                    dbc.Col(make_graph_card("Security Appliances", p2_fig),md=6),
+                ],
+                className="mb-4"
+            ),
+            # You can add more rows and cards as needed
+            dbc.Row(
+                [
+                    dbc.Col(make_graph_card("Response Time and SLA Breaches per Day", trend_fig),lg=12)
+                ],
+                className="mb-4"
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(make_open_incidents_card(),lg=12)
+                ],
+                className="mb-4"
+            )
+        ],
+        fluid=True,
+    )
 
 # Building Authentication Dashboard Content and Layout for Tab
-tab2_auth = dbc.Container(
-    [
-        html.H1("Everything Organic - Authentication Activity", className="my-4 text-center"),
-        dbc.Row(
-            [
-                # dbc.Col(make_pay_gap_card("Test"),xl=12),
-                dbc.Col(make_graph_card("Failed Logins by Countries", geo_location_pie),md=6)
-            ],
-            className="mb-4"
-        ),
-        # You can add more rows and cards as needed
-        dbc.Row(
-            [
-                dbc.Col(make_graph_card("Login Success vs. Failures Overivew", success_fail_chart),xl=10)
-            ],
-            className="mb-4"
-        ),
-        dbc.Row(
-            [
-                dbc.Col(make_graph_card("Geographical Representation of Failed Login Actiivty", geomap),xl=10)
-            ],
-            className="mb-4"
-        )
-    ],
-    fluid=True,
-)
+def build_auth_tab(window=None):
+    if window is not None and not len(window_slice('auth_logs', window)):
+        return no_data_view()
+    success_fail_chart, geo_location_pie, geomap, failed_users_chart = build_auth_figures(window)
+    return dbc.Container(
+        [
+            html.H1("Everything Organic - Authentication Activity", className="my-4 text-center"),
+            dbc.Row(
+                [
+                    # dbc.Col(make_pay_gap_card("Test"),xl=12),
+                    dbc.Col(make_graph_card("Failed Logins by Countries", geo_location_pie),md=6),
+                    dbc.Col(make_graph_card("Top Failed-Login Usernames", failed_users_chart),md=6)
+                ],
+                className="mb-4"
+            ),
+            # You can add more rows and cards as needed
+            dbc.Row(
+                [
+                    dbc.Col(make_graph_card("Login Success vs. Failures Overivew", success_fail_chart),xl=10)
+                ],
+                className="mb-4"
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(make_graph_card("Geographical Representation of Failed Login Actiivty", geomap),xl=10)
+                ],
+                className="mb-4"
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(make_bruteforce_card(window),xl=10)
+                ],
+                className="mb-4"
+            )
+        ],
+        fluid=True,
+    )
 #############################################################################################
 # --- Load Web Server Access Logs ---
-df_logs = pd.read_csv('Dataset 1__Web_Server_Access_Logs.csv', parse_dates=['timestamp'])
-df_logs['hour'] = df_logs['timestamp'].dt.floor('h')
-method_counts = df_logs.groupby(['hour', 'http_method']).size().reset_index(name='count')
-
-# Plot: HTTP Method Usage
-fig_logs = px.bar(
-    method_counts, x='hour', y='count', color='http_method',
-    title='HTTP Method Usage Over Time',
-    labels={'hour': 'Time (Hour)', 'count': 'Number of Requests'}
-)
+def prepare_web_logs(df_logs):
+    df_logs['hour'] = df_logs['timestamp'].dt.floor('h')
+    return df_logs
 
-# Plot: Average Response Time
-avg_response_time = df_logs.groupby('hour')['response_time_ms'].mean().reset_index()
-fig_response_time = px.line(
-    avg_response_time,
-    x='hour',
-    y='response_time_ms',
-    title='Average Response Time Over Time',
-    labels={'hour': 'Time (Hour)', 'response_time_ms': 'Avg Response Time (ms)'}
-)
 
-# --- Load Network Traffic Summary ---
-df_traffic = pd.read_csv('Dataset 4__Network_Traffic_Summary.csv', parse_dates=['sample_time'])
-df_traffic['suspicious'] = df_traffic['suspicious_activity'].str.lower() == 'yes'
-df_traffic['date'] = df_traffic['sample_time'].dt.date
-
-# Aggregate daily traffic
-agg_df = df_traffic.groupby('date')[['inbound_bytes', 'outbound_bytes']].sum().reset_index()
-agg_df['date'] = pd.to_datetime(agg_df['date'])
-agg_df_long = agg_df.melt(
-    id_vars='date',
-    value_vars=['inbound_bytes', 'outbound_bytes'],
-    var_name='Traffic Type',
-    value_name='Bytes'
-)
+@live.cached('web_logs')
+def get_web_logs():
+    return live.load('web_logs', 'timestamp', prepare_web_logs)
 
-fig_scaled = px.bar(
-    agg_df_long,
-    x='date',
-    y='Bytes',
-    color='Traffic Type',
-    barmode='group',
-    title='Daily Network Traffic: Inbound vs Outbound Bytes',
-    labels={'date': 'Date'}
-)
 
-fig_scaled.update_layout(
-    yaxis=dict(title='Bytes', range=[0, 120000]),
-    xaxis=dict(
-        range=[pd.to_datetime('2025-06-01'), pd.to_datetime('2025-06-22')],
-        tickformat='%b %d',
-        tickangle=-45,
-        dtick="D1"
+# Request counts per (hour, http_method) and response time totals per hour
+@live.cached('web_logs')
+def get_web_hourly():
+    logs_index = get_web_logs()
+
+    def update(aggs, rows):
+        for agg in aggs:
+            agg.add(rows)
+
+    return live.track('web_logs',
+                      lambda: fold(logs_index, (GroupTotals(['hour', 'http_method']),
+                                                GroupTotals(['hour'], ['response_time_ms'])), update),
+                      update)
+
+
+# Response time quantile sketches per (hour, url_accessed, status_code)
+@live.cached('web_logs')
+def get_web_latency():
+    logs_index = get_web_logs()
+    return live.track('web_logs',
+                      lambda: fold(logs_index, QuantileSketches('timestamp', 'response_time_ms',
+                                                                ['url_accessed', 'status_code']),
+                                   QuantileSketches.add),
+                      QuantileSketches.add)
+
+
+# Unique visitor IPs per hour (HyperLogLog)
+@live.cached('web_logs')
+def get_web_visitors():
+    logs_index = get_web_logs()
+    return live.track('web_logs',
+                      lambda: fold(logs_index, TimeBuckets('timestamp', HyperLogLog,
+                                                           lambda hll, rows: hll.add(with_ip(rows, 'ip_address')['ip_address'])),
+                                   TimeBuckets.add),
+                      TimeBuckets.add)
+
+
+# HTTP method usage, bucketed to fit the visible range (hourly totals, raw rows below an hour)
+def build_web_method_figure(start=None, end=None):
+    method_totals = get_web_hourly()[0].table
+    hours = method_totals.index.get_level_values('hour')
+    start = hours.min() if start is None else start
+    end = hours.max() + pd.Timedelta(hours=1) if end is None else end
+    freq = pick_freq(start, end)
+    if pd.Timedelta(freq) < pd.Timedelta(hours=1):
+        rows = get_web_logs().slice(start, end, inclusive_end=False, columns=['timestamp', 'http_method'])
+        counts = rows.groupby([rows['timestamp'].dt.floor(freq).rename('hour'), 'http_method'], observed=True).size()
+    else:
+        counts = rebucket(method_totals, freq, start, end)
+    fig_logs = px.bar(
+        counts.reset_index(name='count'), x='hour', y='count', color='http_method',
+        title=f'HTTP Method Usage Over Time (per {freq_label(freq)})',
+        labels={'hour': 'Time', 'count': 'Number of Requests'}
     )
-)
+    fig_logs.update_layout(xaxis=dict(range=[start, end]))
+    return fig_logs
+
+
+# Built from the hourly aggregates, narrowed to the time window when one is set
+def build_web_figures(start=None, end=None):
+    method_totals, response_totals = get_web_hourly()
+    latency = get_web_latency()
+
+    # Plot: HTTP Method Usage
+    fig_logs = build_web_method_figure(start, end)
+
+    # Plot: Average Response Time
+    avg_response_time = (
+        response_totals.table['response_time_ms'] / method_totals.table.groupby(level='hour').sum()
+    ).rename('response_time_ms')
+    avg_response_time = within(avg_response_time, start, end).reset_index()
+    avg_response_time = avg_response_time.iloc[lttb(avg_response_time['hour'], avg_response_time['response_time_ms'])]
+    fig_response_time = px.line(
+        avg_response_time,
+        x='hour',
+        y='response_time_ms',
+        title='Response Time Over Time (Mean and Percentiles)',
+        labels={'hour': 'Time (Hour)', 'response_time_ms': 'Avg Response Time (ms)'}
+    )
+    fig_response_time.data[0].name = 'mean'
+    fig_response_time.data[0].showlegend = True
+
+    # Percentile bands from the merged hourly sketches
+    last = None if end is None else end - pd.Timedelta(1)
+    hourly = latency.quantiles(start=start, end=last, by=['bucket'])
+    hourly = hourly.iloc[lttb(hourly.index, hourly['p95'])]
+    for col, fill in (('p50', None), ('p95', 'tonexty'), ('p99', 'tonexty')):
+        fig_response_time.add_trace(go.Scatter(
+            x=hourly.index, y=hourly[col], name=col, mode='lines', fill=fill, line=dict(width=1)
+        ))
+
+    # Top slowest endpoints by p95 over the range
+    slowest = latency.quantiles(start=start, end=last, by=['url_accessed']).sort_values('p95', ascending=False).head(10)
+    fig_slowest = go.Figure([
+        go.Bar(x=slowest.index.astype(str), y=slowest[col], name=col) for col in slowest.columns
+    ])
+    fig_slowest.update_layout(
+        barmode='group',
+        title='Slowest Endpoints (Response Time Percentiles)',
+        xaxis_title='Endpoint',
+        yaxis_title='Response Time (ms)',
+    )
+    # Unique visitors per hour and over the range
+    visitors = get_web_visitors()
+    unique_visitors = visitors.merged(start, last).count()
+    hourly_visitors = within(visitors.series(HyperLogLog.count), start, end)
+    hourly_visitors = hourly_visitors.iloc[lttb(hourly_visitors.index, hourly_visitors.values)]
+    fig_visitors = px.line(
+        x=hourly_visitors.index, y=hourly_visitors.values,
+        title=f'Unique Visitors per Hour (~{unique_visitors} unique IPs {"overall" if start is None else "in the window"})',
+        labels={'x': 'Time (Hour)', 'y': 'Unique IPs'}
+    )
+    return fig_logs, fig_response_time, fig_slowest, fig_visitors
+
+# --- Load Network Traffic Summary ---
+def prepare_traffic(df_traffic):
+    df_traffic['hour'] = df_traffic['sample_time'].dt.floor('h')
+    return df_traffic
+
+
+@live.cached('network_traffic')
+def get_traffic():
+    return live.load('network_traffic', 'sample_time', prepare_traffic)
+
 
 # Suspicious activity table
-suspicious_df = df_traffic[df_traffic['suspicious']][[
-    'sample_time', 'protocol', 'source_ip', 'inbound_bytes', 'outbound_bytes'
-]]
+def select_suspicious(df_traffic):
+    return df_traffic[df_traffic['suspicious']][[
+        'sample_time', 'protocol', 'source_ip', 'inbound_bytes', 'outbound_bytes'
+    ]]
+
+
+@live.cached('network_traffic')
+def get_suspicious():
+    traffic_index = get_traffic()
+    if isinstance(traffic_index, StoreIndex):
+        return StoreView(traffic_index, select_suspicious, filters=[('suspicious', '==', True)])
+    return live.track('network_traffic',
+                      lambda: TimeIndex(pd.concat([select_suspicious(rows) for rows in traffic_index.frames()]),
+                                        'sample_time'),
+                      lambda index, rows: index.append(select_suspicious(rows)))
+
+
+# Hourly inbound/outbound byte totals, re-bucketed to the visible range by the chart
+@live.cached('network_traffic')
+def get_hourly_traffic():
+    traffic_index = get_traffic()
+    return live.track('network_traffic',
+                      lambda: fold(traffic_index, GroupTotals(['hour'], ['inbound_bytes', 'outbound_bytes']),
+                                   GroupTotals.add),
+                      GroupTotals.add)
+
+
+# Anomaly scores of every traffic sample against per-IP and per-protocol baselines.
+# Only the samples the anomaly table can list (score >= ANOMALY_MIN_SCORE) are
+# kept, the baselines hold one state row per source IP and protocol.
+ANOMALY_MIN_SCORE = 3.0
+
+
+@live.cached('network_traffic')
+def get_traffic_scores():
+    traffic_index = get_traffic()
+
+    return live.track('network_traffic',
+                      lambda: fold(traffic_index, TrafficScorer(keep_score=ANOMALY_MIN_SCORE), TrafficScorer.add),
+                      TrafficScorer.add)
+
+
+def add_talkers(hh, rows):
+    rows = with_ip(rows, 'source_ip')
+    hh.add(rows['source_ip'], rows['outbound_bytes'])
+
+
+# Top source IPs by outbound bytes, per day
+@live.cached('network_traffic')
+def get_top_talkers():
+    traffic_index = get_traffic()
+    return live.track('network_traffic',
+                      lambda: fold(traffic_index,
+                                   TimeBuckets('sample_time', lambda: HeavyHitters(capacity=1000),
+                                               add_talkers,
+                                               freq='D'),
+                                   TimeBuckets.add),
+                      TimeBuckets.add)
+
+
+# Inbound vs outbound bytes, bucketed to fit the visible range (hourly totals, raw rows below an hour)
+def build_traffic_figure(start=None, end=None):
+    hourly = get_hourly_traffic().table
+    start = hourly.index.min() if start is None else start
+    end = hourly.index.max() + pd.Timedelta(hours=1) if end is None else end
+    freq = pick_freq(start, end, px_per_bucket=40)
+    if pd.Timedelta(freq) < pd.Timedelta(hours=1):
+        rows = get_traffic().slice(start, end, inclusive_end=False,
+                                   columns=['sample_time', 'inbound_bytes', 'outbound_bytes'])
+        totals = rows.groupby(rows['sample_time'].dt.floor(freq).rename('hour'))[['inbound_bytes', 'outbound_bytes']].sum()
+    else:
+        totals = rebucket(hourly, freq, start, end)
+    agg_df = totals.rename_axis('date').reset_index()
+    agg_df_long = agg_df.melt(
+        id_vars='date',
+        value_vars=['inbound_bytes', 'outbound_bytes'],
+        var_name='Traffic Type',
+        value_name='Bytes'
+    )
+
+    fig_scaled = px.bar(
+        agg_df_long,
+        x='date',
+        y='Bytes',
+        color='Traffic Type',
+        barmode='group',
+        title=f'Network Traffic per {freq_label(freq).capitalize()}: Inbound vs Outbound Bytes',
+        labels={'date': 'Date'}
+    )
+
+    fig_scaled.update_layout(
+        yaxis=dict(title='Bytes'),
+        xaxis=dict(
+            range=[start, end],
+            tickformat='%b %d' if pd.Timedelta(freq) >= pd.Timedelta(days=1) else '%b %d %H:%M',
+            tickangle=-45,
+        )
+    )
+    return fig_scaled
+
+
+def build_network_figures(start=None, end=None):
+    fig_scaled = build_traffic_figure(start, end)
+
+    last = None if end is None else end - pd.Timedelta(1)
+    top_talkers = get_top_talkers().merged(start, last).top(20)
+    fig_talkers = px.bar(
+        x=int_to_ip(top_talkers.index.to_numpy()), y=top_talkers['count'].to_numpy(),
+        title='Top Talkers by Outbound Bytes',
+        labels={'x': 'Source IP', 'y': 'Outbound Bytes'}
+    )
+    return fig_scaled, fig_talkers
 
 # --- Styling Definitions ---
 FONT_FAMILY = 'Segoe UI, Roboto, Open Sans, sans-serif'
@@ -340,104 +721,166 @@ column_name_map = {
 
 #==================================================================================
 # --- Read malware threat alerts data ---
-df_alerts = pd.read_csv('dataset_3_malware_threat_alerts.csv')
-df_alerts['detection_time'] = pd.to_datetime(df_alerts['detection_time'], errors='coerce')
+@live.cached('malware_alerts')
+def get_alerts():
+    return live.load('malware_alerts', 'detection_time', lambda df_alerts: df_alerts)
+
+
+# Hourly alert counts used by the charts, the raw rows are only read for the records table
+@live.cached('malware_alerts')
+def get_alerts_cube():
+    alerts_index = get_alerts()
+    return live.track('malware_alerts',
+                      lambda: RollupCube(alerts_index, ['threat_type', 'severity', 'remediation_status']),
+                      RollupCube.add)
 #==================================================================================
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-#############################################################################################
-@app.callback(
-    Output('malware-alerts-content', 'children'),
-    [Input('date-picker-range-alerts', 'start_date'),
-     Input('date-picker-range-alerts', 'end_date')]
-)
-def update_malware_alerts(start_date, end_date):
-    try:
-        start_date = pd.to_datetime(start_date)
-        end_date = pd.to_datetime(end_date)
-    except Exception:
-        return html.Div([html.H3("Invalid date range. Please select valid dates.")], style={"color": "red"})
-
-    filtered_df = df_alerts[
-        (df_alerts['detection_time'] >= start_date) & (df_alerts['detection_time'] <= end_date)
+# Tab contents are rendered by a callback, so their component ids are not in the initial layout
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
+server = app.server  # WSGI entry point for serve.py / gunicorn
+enable_compression(server)  # gzip/brotli callback and layout responses, see compression.py
+metrics.instrument(app)  # callback timings and sizes, /metrics, see metrics.py
+
+# Built figures and table pages for repeated date ranges, see result_cache.py
+callback_cache = ResultCache(max_bytes=64 * 2**20)
+
+# Heavy callbacks run on a worker pool that shares identical concurrent queries and
+# drops calls superseded by a newer one from the same browser, see executor.py.
+# Cache hits are answered in the request thread: memoize wraps offload.
+callback_executor = CallbackExecutor()
+callback_executor.install(app)
+
+
+@app.server.route('/cache-stats')
+def cache_stats():
+    return callback_cache.stats()
+
+
+def collect_cache_metrics():
+    stats = callback_cache.stats()
+    return [
+        ('siem_cache_bytes', 'gauge', 'Serialized size of the cached callback results', [({}, stats['bytes'])]),
+        ('siem_cache_entries', 'gauge', 'Cached callback results', [({}, stats['entries'])]),
+        ('siem_cache_evictions_total', 'counter', 'Results evicted from the cache', [({}, stats['evictions'])]),
     ]
 
-    if filtered_df.empty:
-        return html.Div([html.H3("No data available for the selected date range.")], style={"color": "blue"})
-
-    threat_counts = filtered_df['threat_type'].value_counts().sort_index()
-    bars = [
-        go.Bar(
-            x=[threat],
-            y=[threat_counts[threat]],
-            name=threat,
-            marker=dict(color=color_map.get(threat, 'gray')),
-            text=[threat_counts[threat]],
-            textposition='auto'
-        )
-        for threat in threat_counts.index
+
+def collect_executor_metrics():
+    stats = callback_executor.stats()
+    return [
+        ('siem_callback_computations_in_flight', 'gauge', 'Callback computations queued or running',
+         [({}, stats['in_flight'])]),
+        ('siem_callback_calls_waiting', 'gauge', 'Callback calls waiting for a computation',
+         [({}, stats['waiting_calls'])]),
     ]
 
-    fig = go.Figure(data=bars, layout=go.Layout(
-        title={'text': 'Total Alerts by Threat Type'},
-        xaxis=dict(title='Threat Type'),
-        yaxis=dict(title='Number of Alerts'),
-        barmode='group'
-    ))
 
-    datatable = dash_table.DataTable(
-        id='datatable-threat-records',
-        columns=[
-            {"name": column_name_map.get(col, col), "id": col} for col in filtered_df.columns
-        ],
-        data=filtered_df.to_dict('records'),
-        style_table={'overflowX': 'auto'},
-        style_cell={
-            'textAlign': 'left',
-            'padding': '10px',
-            'whiteSpace': 'normal',
-            'height': 'auto'
-        },
-        style_header={
-            'backgroundColor': 'lightgrey',
-            'color': 'black',
-            'fontWeight': 'bold',
-            'border': '2px solid grey'
-        },
-        page_size=10,
-    )
+metrics.register_collector(collect_cache_metrics)
+metrics.register_collector(collect_executor_metrics)
+#############################################################################################
+# Threat totals: one bar trace coloured per threat type, counts as a typed array.
+# The figure layout ships once with the tab, date-range and live changes only
+# replace the bar data through a Patch.
+THREAT_TOTALS_LAYOUT = {
+    'title': {'text': 'Total Alerts by Threat Type'},
+    'xaxis': {'title': {'text': 'Threat Type'}},
+    'yaxis': {'title': {'text': 'Number of Alerts'}},
+}
+HIDDEN = {'display': 'none'}
+ALERT_DIMS = ['threat_type', 'severity', 'remediation_status']
+
+
+# Alert counts of [start, end) per (bucket, threat type, severity, status), at the
+# bucket width of the severity chart. The malware alerts and threat monitoring
+# callbacks both derive their figures from it, so a date range is counted once
+# even when both fire together.
+@lru_cache(maxsize=16)
+def _alert_window(start, end, version):
+    freq = pick_freq(start, end, px_per_bucket=40, min_freq='h')
+    return freq, get_alerts_cube().counts(start, end, by=ALERT_DIMS, freq=freq, inclusive_end=False)
+
+
+def alert_window(start, end):
+    start = None if start is None or pd.isna(start) else pd.Timestamp(start)
+    end = None if end is None or pd.isna(end) else pd.Timestamp(end)
+    key = ('alert_window', start, end, get_alerts().version)
+    return callback_executor.coalesce(key, lambda: _alert_window(*key[1:]))
+
+
+@callback_cache.memoize('threat_totals', lambda: get_alerts().version)
+def threat_totals(start_date, end_date):
+    threat_counts = alert_window(start_date, end_date)[1].groupby(level='threat_type', observed=True).sum()
+    threat_counts = threat_counts.sort_index()
+    threats = [str(threat) for threat in threat_counts.index]
+    return {
+        'type': 'bar',
+        'x': threats,
+        'y': typed_array(threat_counts.to_numpy()),
+        'text': threat_counts.to_numpy().tolist(),
+        'textposition': 'auto',
+        'marker': {'color': [color_map.get(threat, 'gray') for threat in threats]},
+        'hovertemplate': '%{x}: %{y}<extra></extra>',
+    }
 
-    return html.Div([
-        dcc.Graph(id='bar-chart-threat-totals', figure=fig),
-        html.H4('Filtered Records:'),
-        datatable
-    ])
 
 @app.callback(
-    Output('threat-monitoring-content', 'children'),
-    [Input('date-picker-range-monitoring', 'start_date'),
-     Input('date-picker-range-monitoring', 'end_date')],
+    Output('bar-chart-threat-totals', 'figure'),
+    Output('malware-alerts-message', 'children'),
+    Output('malware-alerts-content', 'style'),
+    Output('datatable-threat-records', 'page_current'),
+    [Input('time-window', 'data'),
+     Input('live-version-malware_alerts', 'data')]
 )
-def update_threat_monitoring(start_date, end_date):
-    try:
-        start_date = pd.to_datetime(start_date)
-        end_date = pd.to_datetime(end_date)
-    except Exception:
-        return html.Div([html.H3("Invalid date range. Please select valid dates.")], style={"color": "red"})
-
-    filtered_df = df_alerts[
-        (df_alerts['detection_time'] >= start_date) & (df_alerts['detection_time'] <= end_date)
-    ]
+@callback_executor.offload('update_malware_alerts', date_args=())
+def update_malware_alerts(window, live_version=None):
+    bars = threat_totals(*window_bounds(window, get_alerts()))
+    if not bars['x']:
+        return (dash.no_update, html.H3("No data available for the selected time window.", style={"color": "blue"}),
+                HIDDEN, dash.no_update)
 
-    if filtered_df.empty:
-        return html.Div([html.H3("No data available for the selected date range.")], style={"color": "blue"})
+    patched = dash.Patch()
+    patched['data'] = [bars]
+    return patched, None, {}, 0
 
-    severity_counts = (
-        filtered_df
-        .groupby([filtered_df['detection_time'].dt.date, 'severity'])
-        .size()
-        .unstack(fill_value=0)
-    )
+@app.callback(
+    Output('datatable-threat-records', 'data'),
+    Output('datatable-threat-records', 'page_count'),
+    Input('datatable-threat-records', 'page_current'),
+    Input('datatable-threat-records', 'page_size'),
+    Input('datatable-threat-records', 'sort_by'),
+    Input('datatable-threat-records', 'filter_query'),
+    Input('time-window', 'data'),
+)
+@callback_cache.memoize('page_threat_records', lambda: get_alerts().version, date_args=())
+@callback_executor.offload('page_threat_records', date_args=())
+def page_threat_records(page_current, page_size, sort_by, filter_query, window):
+    return query_table(window_slice('malware_alerts', window), page_current, page_size, sort_by, filter_query)
+
+
+@app.callback(
+    Output('open-incidents-table', 'data'),
+    Output('open-incidents-table', 'page_count'),
+    Input('open-incidents-table', 'page_current'),
+    Input('open-incidents-table', 'page_size'),
+    Input('open-incidents-table', 'sort_by'),
+    Input('open-incidents-table', 'filter_query'),
+    Input('time-window', 'data'),
+    Input('live-version-incident_reports', 'data'),
+)
+@callback_cache.memoize('page_open_incidents', lambda: get_open_incidents().version, date_args=())
+@callback_executor.offload('page_open_incidents', date_args=())
+def page_open_incidents(page_current, page_size, sort_by, filter_query, window, live_version=None):
+    opened = table_rows(get_open_incidents(), window)
+    return query_table(opened, page_current, page_size, sort_by, filter_query)
+
+# Severity counts over time, bucketed to fit the visible range (hourly cube at the finest)
+def build_severity_figure(start, end):
+    freq, counts = alert_window(start, end)
+    severity_counts = counts.groupby(level=['bucket', 'severity'], observed=True).sum()
+    if severity_counts.empty:
+        return None
+
+    severity_counts = severity_counts.unstack(fill_value=0)
 
     severity_levels = ['Critical', 'High', 'Medium', 'Low']
     for severity in severity_levels:
@@ -457,14 +900,29 @@ def update_threat_monitoring(start_date, end_date):
     ]
 
     line_chart = go.Figure(data=line_traces, layout=go.Layout(
-        title={'text': 'Severity Levels Over Time'},
-        xaxis=dict(title='Date', tickformat='%Y-%m-%d', type='category'),
+        title={'text': f'Severity Levels Over Time (per {freq_label(freq)})'},
+        xaxis=dict(title='Date', tickformat='%Y-%m-%d' if freq.endswith('D') else '%Y-%m-%d %H:%M', type='date'),
         yaxis=dict(title='Threat Count'),
         hovermode='x unified',
         legend=dict(title="Severity Levels"),
     ))
+    return line_chart
 
-    status_counts = filtered_df['remediation_status'].value_counts()
+@app.callback(
+    Output('threat-monitoring-content', 'children'),
+    [Input('time-window', 'data'),
+     Input('live-version-malware_alerts', 'data')],
+)
+@callback_cache.memoize('update_threat_monitoring', lambda: get_alerts().version, date_args=())
+@callback_executor.offload('update_threat_monitoring', date_args=())
+def update_threat_monitoring(window, live_version=None):
+    start, end = window_bounds(window, get_alerts())
+    line_chart = build_severity_figure(start, end)
+
+    if line_chart is None:
+        return html.Div([html.H3("No data available for the selected time window.")], style={"color": "blue"})
+
+    status_counts = alert_window(start, end)[1].groupby(level='remediation_status', observed=True).sum()
     statuses = ['Resolved', 'Pending', 'Escalated']
     status_data = [status_counts.get(status, 0) for status in statuses]
 
@@ -482,142 +940,713 @@ def update_threat_monitoring(start_date, end_date):
     ))
 
     return html.Div([
-        dcc.Graph(id='line-chart-severity', figure=line_chart),
-        dcc.Graph(id='pie-chart-status', figure=pie_chart)
+        dcc.Graph(id='line-chart-severity', figure=compact(line_chart)),
+        dcc.Graph(id='pie-chart-status', figure=compact(pie_chart))
     ])
 #############################################################################################
 # Malware and Threat Alerts Tab
-tab_malware_alerts = dcc.Tab(
-    label='Malware and Threat Alerts',
-    children=[
+def build_malware_alerts_tab():
+    alerts_index = get_alerts()
+    return html.Div([
+        html.H3("Malware and Threat Alerts Dashboard", style=SUBHEADER_STYLE),
+        html.Div(id='malware-alerts-message'),
+        dcc.Loading(
+            id='loading-malware-alerts',
+            type='default',
+            children=html.Div(id='malware-alerts-content', children=[
+                # bars are filled in by update_malware_alerts
+                dcc.Graph(id='bar-chart-threat-totals', figure=figure([], THREAT_TOTALS_LAYOUT)),
+                html.H4('Filtered Records:'),
+                dash_table.DataTable(
+                    id='datatable-threat-records',
+                    columns=[
+                        {"name": column_name_map.get(col, col), "id": col} for col in alerts_index.columns
+                    ],
+                    data=[],
+                    style_table={'overflowX': 'auto'},
+                    style_cell={
+                        'textAlign': 'left',
+                        'padding': '10px',
+                        'whiteSpace': 'normal',
+                        'height': 'auto'
+                    },
+                    style_header={
+                        'backgroundColor': 'lightgrey',
+                        'color': 'black',
+                        'fontWeight': 'bold',
+                        'border': '2px solid grey'
+                    },
+                    page_size=10,
+                    # Rows are paged, sorted and filtered on the server by page_threat_records
+                    page_current=0,
+                    page_action='custom',
+                    sort_action='custom',
+                    filter_action='custom',
+                    sort_by=[],
+                    filter_query='',
+                ),
+            ])
+        )
+    ], style={'padding': '20px', 'backgroundColor': '#f4f6f9'})
+
+# Threat Monitoring Tab
+def build_threat_monitoring_tab():
+    return html.Div([
+        html.H3("Threat Monitoring Dashboard", style=SUBHEADER_STYLE),
+        dcc.Loading(
+            id='loading-threat-monitoring',
+            type='default',
+            children=html.Div(id='threat-monitoring-content')
+        )
+    ], style={'padding': '20px', 'backgroundColor': '#f4f6f9'})
+
+# Web Server Tab
+def build_web_tab(window=None):
+    if window is not None and not overlaps(get_web_logs(), window):
+        return no_data_view()
+    fig_logs, fig_response_time, fig_slowest, fig_visitors = build_web_figures(*window_bounds(window))
+    return html.Div([
         html.Div([
-            html.H3("Malware and Threat Alerts Dashboard", style=SUBHEADER_STYLE),
-            html.Label('Select Date Range:'),
-            dcc.DatePickerRange(
-                id='date-picker-range-alerts',
-                start_date=str(df_alerts['detection_time'].min().date()),
-                end_date=str(df_alerts['detection_time'].max().date()),
-                display_format='YYYY-MM-DD',
-                style={'margin-left': '10px'}
-            ),
-            dcc.Loading(
-                id='loading-malware-alerts',
-                type='default',
-                children=html.Div(id='malware-alerts-content')
+            html.H3("HTTP Method Activity", style=SUBHEADER_STYLE),
+            dcc.Graph(id='web-method-chart', figure=compact(fig_logs))
+        ], style=card_style),
+
+        html.Div([
+            html.H3("Response Time", style=SUBHEADER_STYLE),
+            dcc.Graph(figure=compact(fig_response_time))
+        ], style=card_style),
+
+        html.Div([
+            html.H3("Slowest Endpoints", style=SUBHEADER_STYLE),
+            dcc.Graph(figure=compact(fig_slowest))
+        ], style=card_style),
+
+        html.Div([
+            html.H3("Unique Visitors", style=SUBHEADER_STYLE),
+            dcc.Graph(figure=compact(fig_visitors))
+        ], style=card_style)
+    ], style={'padding': '20px', 'backgroundColor': '#f4f6f9'})
+
+# Network Traffic Tab
+def build_network_tab(window=None):
+    if window is not None and not overlaps(get_traffic(), window):
+        return no_data_view()
+    fig_scaled, fig_talkers = build_network_figures(*window_bounds(window))
+    suspicious_columns = get_suspicious().columns
+    return html.Div([
+        html.Div([
+            html.H3("Inbound vs Outbound Traffic", style=SUBHEADER_STYLE),
+            dcc.Graph(id='traffic-chart', figure=compact(fig_scaled))
+        ], style=card_style),
+
+        html.Div([
+            html.H3("Top Talkers", style=SUBHEADER_STYLE),
+            dcc.Graph(figure=compact(fig_talkers))
+        ], style=card_style),
+
+        html.Div([
+            html.H4("Suspicious Activity Records", style={
+                'fontFamily': FONT_FAMILY,
+                'fontSize': '18px',
+                'fontWeight': '500',
+                'color': '#2c3e50',
+                'marginBottom': '15px'
+            }),
+
+            dash_table.DataTable(
+                id='suspicious-table',
+                columns=[{'name': col, 'id': col} for col in suspicious_columns],
+                data=[],
+                style_table={'overflowX': 'auto'},
+                style_cell={
+                    'fontFamily': FONT_FAMILY,
+                    'textAlign': 'left',
+                    'padding': '5px',
+                    'minWidth': '100px',
+                    'maxWidth': '200px',
+                    'whiteSpace': 'normal',
+                    'fontSize': '14px'
+                },
+                style_header={
+                    'backgroundColor': '#eaeaea',
+                    'fontWeight': 'bold',
+                    'fontSize': '14px'
+                },
+                page_size=10,
+                # Rows are paged, sorted and filtered on the server by filter_suspicious_by_date
+                page_current=0,
+                page_action='custom',
+                filter_action='custom',
+                sort_action='custom',
+                sort_by=[],
+                filter_query='',
             )
-        ], style={'padding': '20px', 'backgroundColor': '#f4f6f9'})
-    ]
+        ], style=card_style),
+
+        html.Div([
+            html.H4("Top Traffic Anomalies", style={
+                'fontFamily': FONT_FAMILY,
+                'fontSize': '18px',
+                'fontWeight': '500',
+                'color': '#2c3e50',
+                'marginBottom': '15px'
+            }),
+            html.Div("Samples whose outbound bytes or outbound/inbound ratio deviate most from the EWMA baseline "
+                     "of their source IP or protocol (score = largest z-score, 3 or more), in the selected date range.",
+                     style={'marginBottom': '10px'}),
+            dash_table.DataTable(
+                id='anomaly-table',
+                columns=[{'name': col, 'id': col} for col in [
+                    'sample_time', 'source_ip', 'protocol', 'inbound_bytes', 'outbound_bytes', 'ratio', 'score']],
+                data=[],
+                style_table={'overflowX': 'auto'},
+                style_cell={
+                    'fontFamily': FONT_FAMILY,
+                    'textAlign': 'left',
+                    'padding': '5px',
+                    'fontSize': '14px'
+                },
+                style_header={
+                    'backgroundColor': '#eaeaea',
+                    'fontWeight': 'bold',
+                    'fontSize': '14px'
+                },
+                page_size=10,
+                page_current=0,
+                page_action='custom',
+                filter_action='custom',
+                sort_action='custom',
+                sort_by=[],
+                filter_query='',
+            )
+        ], style=card_style)
+    ], style={'padding': '20px', 'backgroundColor': '#f4f6f9'})
+
+@app.callback(
+    Output('suspicious-table', 'data'),
+    Output('suspicious-table', 'page_count'),
+    Input('time-window', 'data'),
+    Input('suspicious-table', 'page_current'),
+    Input('suspicious-table', 'page_size'),
+    Input('suspicious-table', 'sort_by'),
+    Input('suspicious-table', 'filter_query'),
+    Input('live-version-network_traffic', 'data'),
 )
+@callback_cache.memoize('filter_suspicious_by_date', lambda: get_suspicious().version, date_args=())
+@callback_executor.offload('filter_suspicious_by_date', date_args=())
+def filter_suspicious_by_date(window, page_current=0, page_size=10, sort_by=None, filter_query='',
+                              live_version=None):
+    filtered_df = table_rows(get_suspicious(), window)
+    return query_table(filtered_df, page_current, page_size, sort_by, filter_query)
 
-# Threat Monitoring Tab
-tab_threat_monitoring = dcc.Tab(
-    label='Threat Monitoring',
-    children=[
+
+@app.callback(
+    Output('anomaly-table', 'data'),
+    Output('anomaly-table', 'page_count'),
+    Input('time-window', 'data'),
+    Input('anomaly-table', 'page_current'),
+    Input('anomaly-table', 'page_size'),
+    Input('anomaly-table', 'sort_by'),
+    Input('anomaly-table', 'filter_query'),
+    Input('live-version-network_traffic', 'data'),
+)
+@callback_cache.memoize('top_traffic_anomalies', lambda: get_traffic_scores().index.version, date_args=())
+@callback_executor.offload('top_traffic_anomalies', date_args=())
+def top_traffic_anomalies(window, page_current=0, page_size=10, sort_by=None, filter_query='',
+                          live_version=None):
+    top = get_traffic_scores().top(*window_bounds(window), n=100, min_score=ANOMALY_MIN_SCORE)
+    top = top[['sample_time', 'source_ip', 'protocol', 'inbound_bytes', 'outbound_bytes', 'ratio']].assign(
+        score=top['score'].astype('float64').round(2))
+    return query_table(top, page_current, page_size, sort_by, filter_query)
+#############################################################################################
+# Zooming a time-series chart re-buckets the zoomed window at a finer width;
+# resetting the axis goes back to the time window (or the full range).
+@callback_cache.memoize('web_method_figure', lambda: get_web_logs().version)
+def zoomed_web_method_figure(start, end):
+    return compact(build_web_method_figure(start, end))
+
+
+@callback_cache.memoize('traffic_figure', lambda: get_traffic().version)
+def zoomed_traffic_figure(start, end):
+    return compact(build_traffic_figure(start, end))
+
+
+@callback_cache.memoize('severity_figure', lambda: get_alerts().version)
+def zoomed_severity_figure(start, end):
+    line_chart = build_severity_figure(start, end)
+    return None if line_chart is None else compact(line_chart)
+
+
+@app.callback(
+    Output('web-method-chart', 'figure'),
+    Input('web-method-chart', 'relayoutData'),
+    State('time-window', 'data'),
+    prevent_initial_call=True
+)
+@callback_executor.offload('zoom_web_methods', date_args=())
+def zoom_web_methods(relayout_data, time_window):
+    window = zoom_range(relayout_data)
+    if window == (None, None):
+        window = window_bounds(time_window)
+    return dash.no_update if window is None else zoomed_web_method_figure(*window)
+
+
+@app.callback(
+    Output('traffic-chart', 'figure'),
+    Input('traffic-chart', 'relayoutData'),
+    State('time-window', 'data'),
+    prevent_initial_call=True
+)
+@callback_executor.offload('zoom_traffic', date_args=())
+def zoom_traffic(relayout_data, time_window):
+    window = zoom_range(relayout_data)
+    if window == (None, None):
+        window = window_bounds(time_window)
+    return dash.no_update if window is None else zoomed_traffic_figure(*window)
+
+
+@app.callback(
+    Output('line-chart-severity', 'figure'),
+    Input('line-chart-severity', 'relayoutData'),
+    State('time-window', 'data'),
+    prevent_initial_call=True
+)
+@callback_executor.offload('zoom_severity', date_args=())
+def zoom_severity(relayout_data, time_window):
+    window = zoom_range(relayout_data)
+    if window is None:
+        return dash.no_update
+    if window == (None, None):
+        window = window_bounds(time_window, get_alerts())
+    return zoomed_severity_figure(*window) or dash.no_update
+#############################################################################################
+# Correlated Incidents Tab
+CORRELATION_WINDOWS = ['5min', '15min', '1h', '6h', '1D']
+CORRELATION_SOURCES = ['network_traffic', 'auth_logs', 'web_logs', 'malware_alerts']
+
+
+def build_correlation_tab():
+    return html.Div([
         html.Div([
-            html.H3("Threat Monitoring Dashboard", style=SUBHEADER_STYLE),
-            html.Label('Select Date Range:'),
-            dcc.DatePickerRange(
-                id='date-picker-range-monitoring',
-                start_date=str(df_alerts['detection_time'].min().date()),
-                end_date=str(df_alerts['detection_time'].max().date()),
-                display_format='YYYY-MM-DD',
-                style={'margin-left': '10px'}
+            html.H3("Correlated Incidents", style=SUBHEADER_STYLE),
+            html.Div("Suspicious traffic samples with auth or web events from the same IP within the window. "
+                     "Malware alerts carry no IP and are counted by time only. "
+                     "Only events of the selected time window are correlated.", style={'marginBottom': '10px'}),
+            html.Label('Correlation Window:'),
+            dcc.Dropdown(
+                id='correlation-window',
+                options=[{'label': w, 'value': w} for w in CORRELATION_WINDOWS],
+                value='15min',
+                clearable=False,
+                style={'width': '200px', 'marginBottom': '15px'}
             ),
-            dcc.Loading(
-                id='loading-threat-monitoring',
-                type='default',
-                children=html.Div(id='threat-monitoring-content')
+            dash_table.DataTable(
+                id='correlation-table',
+                columns=[{'name': col, 'id': col} for col in [
+                    'sample_time', 'source_ip', 'protocol', 'inbound_bytes', 'outbound_bytes', 'auth_events',
+                    'auth_failures', 'web_requests', 'web_errors', 'alerts_nearby', 'correlated_events']],
+                data=[],
+                style_table={'overflowX': 'auto'},
+                style_cell={'fontFamily': FONT_FAMILY, 'textAlign': 'left', 'padding': '5px', 'fontSize': '14px'},
+                style_header={'backgroundColor': '#eaeaea', 'fontWeight': 'bold', 'fontSize': '14px'},
+                page_size=10,
+                page_current=0,
+                page_action='custom',
+                filter_action='custom',
+                sort_action='custom',
+                sort_by=[],
+                filter_query='',
             )
-        ], style={'padding': '20px', 'backgroundColor': '#f4f6f9'})
+        ], style=card_style)
+    ], style={'padding': '20px', 'backgroundColor': '#f4f6f9'})
+
+
+def correlation_versions():
+    return tuple(DATASET_LOADERS[name]().version for name in CORRELATION_SOURCES)
+
+
+SAMPLE_COLUMNS = ('sample_time', 'source_ip', 'protocol', 'inbound_bytes', 'outbound_bytes')
+
+
+@lru_cache(maxsize=4)
+def get_correlated(window, versions=(), time_window=None):
+    # Only the columns correlate() uses are read
+    time_window = None if time_window is None else dict(time_window)
+    suspicious = table_rows(get_suspicious(), time_window, SAMPLE_COLUMNS)
+    return correlate(suspicious,
+                     window_slice('auth_logs', time_window, ('date', 'ip_address', 'login_success')),
+                     window_slice('web_logs', time_window, ('timestamp', 'ip_address', 'status_code')),
+                     window_slice('malware_alerts', time_window, ('detection_time',)), window)
+
+
+@app.callback(
+    Output('correlation-table', 'data'),
+    Output('correlation-table', 'page_count'),
+    Input('correlation-window', 'value'),
+    Input('time-window', 'data'),
+    Input('correlation-table', 'page_current'),
+    Input('correlation-table', 'page_size'),
+    Input('correlation-table', 'sort_by'),
+    Input('correlation-table', 'filter_query'),
+    *[Input(f'live-version-{name}', 'data') for name in CORRELATION_SOURCES],
+)
+@callback_cache.memoize('correlated_incidents', correlation_versions, date_args=())
+@callback_executor.offload('page_correlated_incidents', date_args=())
+def page_correlated_incidents(window, time_window, page_current, page_size, sort_by, filter_query, *live_versions):
+    time_window = None if time_window is None else tuple(sorted(time_window.items()))
+    correlated = get_correlated(window or '15min', correlation_versions(), time_window)
+    return query_table(correlated, page_current, page_size, sort_by, filter_query)
+#############################################################################################
+# Rule Alerts Tab
+# Rules from SIEM_RULES_FILE (rules.py), checked against the dataset columns at
+# startup and evaluated over each source's stored rows on first use, then over
+# every batch of new rows
+RULES = load_rules()
+RULE_SOURCES = sorted({rule.source for rule in RULES})
+
+
+@live.cached(*RULE_SOURCES)
+def get_rule_engine():
+    engine = RuleEngine(RULES)
+    for source in engine.sources:
+        index = DATASET_LOADERS[source]()
+        evaluate = partial(RuleEngine.evaluate, source=source, time_col=index.time_col)
+
+        def build(source=source, index=index, evaluate=evaluate):
+            for rows in index.frames(engine.columns(source, index.time_col)):
+                evaluate(engine, rows)
+            return engine
+
+        live.track(source, build, evaluate)
+    return engine
+
+
+def rule_versions():
+    return tuple(DATASET_LOADERS[name]().version for name in RULE_SOURCES)
+
+
+def collect_rule_metrics():
+    if not get_rule_engine.built():
+        return []  # the rules have not been evaluated yet
+    engine = get_rule_engine()
+    return [
+        ('siem_rule_alerts_total', 'counter', 'Alerts fired per rule',
+         [({'rule': rule.name}, rule.fired) for rules in engine.rules.values() for rule in rules]),
+        ('siem_rule_rows_total', 'counter', 'Rows evaluated by the rules per source',
+         [({'source': source}, rows) for source, rows in engine.rows.items()]),
     ]
+
+
+metrics.register_collector(collect_rule_metrics)
+
+
+def build_rules_tab():
+    table_style = dict(
+        style_table={'overflowX': 'auto'},
+        style_cell={'fontFamily': FONT_FAMILY, 'textAlign': 'left', 'padding': '5px', 'fontSize': '14px',
+                    'whiteSpace': 'normal', 'height': 'auto'},
+        style_header={'backgroundColor': '#eaeaea', 'fontWeight': 'bold', 'fontSize': '14px'},
+    )
+    return html.Div([
+        html.Div([
+            html.H3("Rules", style=SUBHEADER_STYLE),
+            html.Div(f"{len(RULES)} rules loaded from {os.path.basename(RULES_FILE)}; "
+                     "fired counts are since startup, over all time.", style={'marginBottom': '10px'}),
+            dash_table.DataTable(
+                id='rules-table',
+                columns=[{'name': col, 'id': col} for col in
+                         ['rule', 'source', 'severity', 'where', 'window', 'fired', 'description']],
+                data=[],
+                sort_action='native',
+                **table_style,
+            )
+        ], style=card_style),
+        html.Div([
+            html.H3("Fired Alerts", style=SUBHEADER_STYLE),
+            html.Div("Newest first, in the selected time window.", style={'marginBottom': '10px'}),
+            dash_table.DataTable(
+                id='rule-alerts-table',
+                columns=[{'name': col, 'id': col} for col in RULE_ALERT_COLUMNS],
+                data=[],
+                page_size=15,
+                page_current=0,
+                page_action='custom',
+                filter_action='custom',
+                sort_action='custom',
+                sort_by=[],
+                filter_query='',
+                **table_style,
+            )
+        ], style=card_style)
+    ], style={'padding': '20px', 'backgroundColor': '#f4f6f9'})
+
+
+@app.callback(
+    Output('rules-table', 'data'),
+    *[Input(f'live-version-{name}', 'data') for name in RULE_SOURCES],
 )
+def update_rules_table(*live_versions):
+    return get_rule_engine().summary().to_dict('records')
+
+
+@app.callback(
+    Output('rule-alerts-table', 'data'),
+    Output('rule-alerts-table', 'page_count'),
+    Input('rule-alerts-table', 'page_current'),
+    Input('rule-alerts-table', 'page_size'),
+    Input('rule-alerts-table', 'sort_by'),
+    Input('rule-alerts-table', 'filter_query'),
+    Input('time-window', 'data'),
+    *[Input(f'live-version-{name}', 'data') for name in RULE_SOURCES],
+)
+@callback_cache.memoize('rule_alerts', rule_versions, date_args=())
+@callback_executor.offload('page_rule_alerts', date_args=())
+def page_rule_alerts(page_current, page_size, sort_by, filter_query, window, *live_versions):
+    alerts = get_rule_engine().alerts_frame(*window_bounds(window))
+    return query_table(alerts.astype({'time': str}), page_current, page_size, sort_by, filter_query)
 #############################################################################################
-tabs = dbc.Tabs(
-    [
-        dbc.Tab(tab1_siem, label="SIEM Overview"),
-        dbc.Tab(tab2_auth, label="Authentication Overview"),
-        tab_malware_alerts,
-        tab_threat_monitoring,
-        dcc.Tab(label='Web Server Activity & Performance', children=[
-            html.Div([
-                html.Div([
-                    html.H3("HTTP Method Activity", style=SUBHEADER_STYLE),
-                    dcc.Graph(figure=fig_logs)
-                ], style=card_style),
-
-                html.Div([
-                    html.H3("Average Response Time", style=SUBHEADER_STYLE),
-                    dcc.Graph(figure=fig_response_time)
-                ], style=card_style)
-            ], style={'padding': '20px', 'backgroundColor': '#f4f6f9'})
-        ]),
-        dcc.Tab(label='Network Traffic & Threat Monitoring', children=[
-            html.Div([
-                html.Div([
-                    html.H3("Daily Inbound vs Outbound Traffic", style=SUBHEADER_STYLE),
-                    dcc.Graph(figure=fig_scaled)
-                ], style=card_style),
-
-                html.Div([
-                    html.H4("Suspicious Activity Records", style={
-                        'fontFamily': FONT_FAMILY,
-                        'fontSize': '18px',
-                        'fontWeight': '500',
-                        'color': '#2c3e50',
-                        'marginBottom': '15px'
-                    }),
-
-                    dcc.DatePickerRange(
-                        id='date-range-picker',
-                        min_date_allowed=suspicious_df['sample_time'].min().date(),
-                        max_date_allowed=suspicious_df['sample_time'].max().date(),
-                        start_date=suspicious_df['sample_time'].min().date(),
-                        end_date=suspicious_df['sample_time'].max().date(),
-                        display_format='YYYY-MM-DD',
-                        style={'marginBottom': '15px'}
-                    ),
-
-                    dash_table.DataTable(
-                        id='suspicious-table',
-                        columns=[{'name': col, 'id': col} for col in suspicious_df.columns],
-                        data=suspicious_df.to_dict('records'),
-                        style_table={'overflowX': 'auto'},
-                        style_cell={
-                            'fontFamily': FONT_FAMILY,
-                            'textAlign': 'left',
-                            'padding': '5px',
-                            'minWidth': '100px',
-                            'maxWidth': '200px',
-                            'whiteSpace': 'normal',
-                            'fontSize': '14px'
-                        },
-                        style_header={
-                            'backgroundColor': '#eaeaea',
-                            'fontWeight': 'bold',
-                            'fontSize': '14px'
-                        },
-                        page_size=10,
-                        filter_action='native',
-                        sort_action='native'
-                    )
-                ], style=card_style)
-            ], style={'padding': '20px', 'backgroundColor': '#f4f6f9'})
-        ])])
+# Tab id -> (label, builder, datasets whose figures are built into the tab layout).
+# The alert tabs and the suspicious table refresh through their own callbacks.
+TAB_BUILDERS = {
+    'tab-siem': ("SIEM Overview", build_siem_tab, ['incident_reports']),
+    'tab-auth': ("Authentication Overview", build_auth_tab, ['auth_logs']),
+    'tab-malware-alerts': ('Malware and Threat Alerts', build_malware_alerts_tab, []),
+    'tab-threat-monitoring': ('Threat Monitoring', build_threat_monitoring_tab, []),
+    'tab-web': ('Web Server Activity & Performance', build_web_tab, ['web_logs']),
+    'tab-network': ('Network Traffic & Threat Monitoring', build_network_tab, ['network_traffic']),
+    'tab-correlation': ('Correlated Incidents', build_correlation_tab, []),
+    'tab-rules': ('Rule Alerts', build_rules_tab, []),
+}
+
+DATASET_LOADERS = {
+    'incident_reports': get_reports,
+    'auth_logs': get_authlogs,
+    'web_logs': get_web_logs,
+    'network_traffic': get_traffic,
+    'malware_alerts': get_alerts,
+}
+LIVE_DATASETS = list(DATASET_LOADERS)
+
+
+# Global time window: one range of whole days, picked above the tabs, drives every
+# tab. Each dataset is sliced once per window and the slice is shared by all the
+# panels and callbacks reading it; charts built from hourly or daily aggregates
+# only narrow their range. No window means all time.
+def window_bounds(window, index=None):
+    # [start, end) of the window; without one, the whole days of `index` (or no bounds)
+    if window is None:
+        if index is None or not len(index):
+            return None, None
+        return index.min().floor('D'), index.max().floor('D') + pd.Timedelta(days=1)
+    return pd.Timestamp(window['start']), pd.Timestamp(window['end']) + pd.Timedelta(days=1)
+
+
+def table_bounds(index, window):
+    # Bounds of a table or correlation read. Without a window that is everything
+    # held in memory, or the last ALL_TIME_DAYS days of an event store dataset
+    # (its .df would read the whole archive).
+    if window is not None:
+        return window_bounds(window)
+    if not isinstance(index, (StoreIndex, StoreView)) or pd.isna(index.max()):
+        return None, None
+    end = index.max().floor('D') + pd.Timedelta(days=1)
+    return end - pd.Timedelta(days=ALL_TIME_DAYS), end
+
+
+def table_rows(index, window, columns=None):
+    start, end = table_bounds(index, window)
+    if start is None:
+        return index.df if columns is None else index.df[list(columns)]
+    return index.slice(start, end, inclusive_end=False, columns=columns)
+
+
+@lru_cache(maxsize=10)
+def _window_slice(name, start, end, columns, version):
+    return DATASET_LOADERS[name]().slice(start, end, inclusive_end=False, columns=columns)
+
+
+def window_slice(name, window, columns=None):
+    index = DATASET_LOADERS[name]()
+    start, end = table_bounds(index, window)
+    if start is None:
+        return table_rows(index, None, columns)
+    key = ('window_slice', name, start, end, columns, index.version)
+    return callback_executor.coalesce(key, lambda: _window_slice(*key[1:]))
+
+
+def overlaps(index, window):
+    start, end = window_bounds(window)
+    return len(index) > 0 and index.min() < end and index.max() >= start
+
+
+def no_data_view():
+    return html.Div([html.H3("No data available for the selected time window.")],
+                    style={'color': 'blue', 'padding': '20px'})
+
+
+# Tabs built from a dataset are panels refreshed in the background on their own
+# cadence (seconds), see scheduler.py; requests only read the latest snapshot.
+# The other tabs are static layouts built once.
+PANEL_REFRESH_S = {
+    'tab-siem': 60,
+    'tab-auth': 15,
+    'tab-web': 30,
+    'tab-network': 30,
+}
+panels = Scheduler()
+
+
+def dataset_versions(names):
+    return tuple(DATASET_LOADERS[name]().version for name in names)
+
+
+def build_panel(tab_id):
+    deps = TAB_BUILDERS[tab_id][2]
+    with live.locked(deps):
+        return TAB_BUILDERS[tab_id][1]()
+
+
+for tab_id, every in PANEL_REFRESH_S.items():
+    panels.register(tab_id, partial(build_panel, tab_id), every, partial(dataset_versions, TAB_BUILDERS[tab_id][2]))
+
+# In live mode the sources are polled by the scheduler too, not in request threads
+if live.LIVE_MODE:
+    panels.add_job('live-sources', live.poll_all, live.LIVE_INTERVAL_MS / 1000)
+
+
+@lru_cache(maxsize=None)
+def build_tab(tab_id):
+    return TAB_BUILDERS[tab_id][1]()
+
+
+# A panel tab for a time window is built on request (once per window and dataset
+# versions) instead of by the scheduler, which keeps the all-time snapshots
+@lru_cache(maxsize=16)
+def _build_window_panel(tab_id, start, end, versions):
+    deps = TAB_BUILDERS[tab_id][2]
+    with live.locked(deps):
+        return TAB_BUILDERS[tab_id][1]({'start': start, 'end': end})
+
+
+def build_window_panel(tab_id, window):
+    key = ('window_panel', tab_id, window['start'], window['end'], dataset_versions(TAB_BUILDERS[tab_id][2]))
+    return callback_executor.coalesce(key, lambda: _build_window_panel(*key[1:]))
+
+
+def panel_view(snapshot):
+    updated = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snapshot.built_at))
+    return html.Div([
+        html.Small(f"Updated {updated}", className='text-muted', style={'float': 'right', 'padding': '4px 20px'}),
+        snapshot.value,
+    ])
+
+
+def tab_content(tab_id):
+    if tab_id in PANEL_REFRESH_S:
+        return panel_view(panels.read(tab_id))
+    return build_tab(tab_id)
+
+
+tabs = html.Div([
+    html.Div([
+        html.Label('Time Window:', style={'marginRight': '10px'}),
+        dcc.DatePickerRange(id='time-window-picker', display_format='YYYY-MM-DD', clearable=True),
+        html.Small('all time when cleared', className='text-muted', style={'marginLeft': '10px'}),
+    ], style={'padding': '10px 20px'}),
+    dcc.Store(id='time-window'),  # {'start', 'end'} dates of the window, both included; None for all time
+    dbc.Tabs(
+        [dbc.Tab(label=label, tab_id=tab_id) for tab_id, (label, _, _) in TAB_BUILDERS.items()],
+        id='tabs',
+        active_tab='tab-siem',
+    ),
+    html.Div(id='tab-content'),
+    dcc.Store(id='tab-snapshot'),  # id of the panel snapshot on screen
+    # Live mode: the interval bumps the version store of each updated dataset and
+    # brings in panel snapshots rebuilt since the last render
+    dcc.Interval(id='live-interval', interval=live.LIVE_INTERVAL_MS, disabled=not live.LIVE_MODE),
+    *[dcc.Store(id=f'live-version-{name}') for name in LIVE_DATASETS],
+])
+
+app.server.before_request(panels.start)
+
+
+@app.server.route('/panel-status')
+def panel_status():
+    return panels.stats()
+
+
+def collect_panel_metrics():
+    stats = panels.stats()
+    return [
+        ('siem_panel_staleness_seconds', 'gauge', 'Seconds since each panel snapshot was confirmed current',
+         [({'panel': name}, s['staleness_s']) for name, s in stats.items() if s['staleness_s'] is not None]),
+        ('siem_panel_build_seconds', 'gauge', 'Build time of the current panel snapshot',
+         [({'panel': name}, s['build_s']) for name, s in stats.items() if s['build_s'] is not None]),
+        ('siem_panel_overruns_total', 'counter', 'Refreshes skipped because the previous build was still running',
+         [({'panel': name}, s['overruns']) for name, s in stats.items()]),
+        ('siem_panel_errors_total', 'counter', 'Failed panel builds',
+         [({'panel': name}, s['errors']) for name, s in stats.items()]),
+    ]
+
+
+metrics.register_collector(collect_panel_metrics)
+
 
 @app.callback(
-    Output('suspicious-table', 'data'),
-    Input('date-range-picker', 'start_date'),
-    Input('date-range-picker', 'end_date')
+    Output('time-window', 'data'),
+    Input('time-window-picker', 'start_date'),
+    Input('time-window-picker', 'end_date'),
+    prevent_initial_call=True
 )
-def filter_suspicious_by_date(start_date, end_date):
-    if start_date and end_date:
-        filtered_df = suspicious_df[
-            (suspicious_df['sample_time'] >= pd.to_datetime(start_date)) &
-            (suspicious_df['sample_time'] <= pd.to_datetime(end_date) + pd.Timedelta(days=1))
-        ]
-    else:
-        filtered_df = suspicious_df
-    return filtered_df.to_dict('records')
+def set_time_window(start_date, end_date):
+    if not start_date and not end_date:
+        return None
+    if not start_date or not end_date or end_date[:10] < start_date[:10]:
+        return dash.no_update  # wait for a complete range
+    return {'start': start_date[:10], 'end': end_date[:10]}
+
+
+@app.callback(
+    Output('tab-content', 'children'),
+    Output('tab-snapshot', 'data'),
+    Input('tabs', 'active_tab'),
+    Input('live-interval', 'n_intervals'),
+    Input('time-window', 'data'),
+    *[Input(f'live-version-{name}', 'data') for name in LIVE_DATASETS],
+    State('tab-snapshot', 'data'),
+)
+def render_tab(active_tab, n_intervals, window, *args):
+    shown = args[-1]
+    if active_tab not in TAB_BUILDERS:
+        return html.Div(), None
+    if active_tab not in PANEL_REFRESH_S:
+        # the static tabs follow the window through their own callbacks
+        return (build_tab(active_tab), None) if ctx.triggered_id in (None, 'tabs') else (dash.no_update, dash.no_update)
+    switched = ctx.triggered_id in (None, 'tabs', 'time-window')
+    changed = not switched and ctx.triggered_id.removeprefix('live-version-') in TAB_BUILDERS[active_tab][2]
+    if window is not None:
+        if switched or changed:
+            return build_window_panel(active_tab, window), None
+        return dash.no_update, dash.no_update
+    if changed:
+        panels.refresh(active_tab)  # picked up by a later interval once built
+    snapshot = panels.read(active_tab)
+    if not switched and snapshot.id == shown:
+        return dash.no_update, dash.no_update
+    return panel_view(snapshot), snapshot.id
+
+
+@app.callback(
+    *[Output(f'live-version-{name}', 'data') for name in LIVE_DATASETS],
+    Input('live-interval', 'n_intervals'),
+    *[State(f'live-version-{name}', 'data') for name in LIVE_DATASETS],
+    prevent_initial_call=True
+)
+def report_live_versions(n_intervals, *shown_versions):
+    # Only datasets that are loaded are followed, the others load fresh on first access
+    versions = [live.sources[name].index.version if name in live.sources else None for name in LIVE_DATASETS]
+    return [version if version is not None and version != shown else dash.no_update
+            for version, shown in zip(versions, shown_versions)]
 #######################################################################
 
 app.layout = tabs
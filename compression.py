@@ -0,0 +1,68 @@
+# Response compression for the Dash server.
+# Callback responses and the layout are JSON made of the same keys over and
+# over and shrink several times under gzip/brotli. Brotli is used when the
+# `brotli` package is installed and the client accepts it, gzip otherwise.
+# Files Flask streams (component bundles) are left to the front proxy.
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript',
+                      'text/javascript'}
+MIN_SIZE = 500
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def accepted_encodings(header):
+    # {'gzip': 1.0, 'br': 0.5, ...} from an Accept-Encoding header
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header or '')
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    for encoding in candidates:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress_response(response):
+    if (response.direct_passthrough or not 200 <= response.status_code < 300
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < MIN_SIZE:
+        return response
+    if encoding == 'br':
+        data = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        data = gzip.compress(data, compresslevel=GZIP_LEVEL)
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def enable_compression(server):
+    server.after_request(compress_response)
@@ -0,0 +1,87 @@
+# Cross-source correlation: for each suspicious traffic sample, count the auth
+# and web events from the same IP (and the malware alerts, which carry no IP)
+# within +/- a time window.
+# Each source is sorted once by (ip, time), so the events of one IP inside a
+# window are a contiguous run. Two merge_asof passes (grouped by ip) find the
+# first and last event of that run for every sample, and flag counts inside it
+# come from cumulative sums, so nothing is looped over or cross-joined.
+import numpy as np
+import pandas as pd
+
+from schema import NO_IP
+
+
+class EventWindow:
+    def __init__(self, df, time_col, ip_col='ip_address', flags=None):
+        # flags: name -> boolean Series over df, counted per window next to the event count.
+        # Events without a time or a valid IP are left out.
+        valid = df[time_col].notna().to_numpy() & (df[ip_col].to_numpy() != NO_IP)
+        times = df[time_col].to_numpy(dtype='datetime64[ns]')[valid]
+        ips = df[ip_col].to_numpy()[valid]
+        order = np.lexsort((times, ips))
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        by_time = np.argsort(times, kind='stable')
+        self.keys = pd.DataFrame({'time': times[by_time], 'ip': ips[by_time], 'pos': rank[by_time]})
+        self.cumsums = {
+            name: np.concatenate([[0], np.cumsum(flag.to_numpy(dtype=bool)[valid][order])])
+            for name, flag in (flags or {}).items()
+        }
+
+    def _bound(self, queries, shift, direction):
+        n = len(queries['time'])
+        left = pd.DataFrame({'time': queries['time'] + shift, 'ip': queries['ip'], 'q': np.arange(n)})
+        left = left.sort_values('time', kind='stable')
+        matched = pd.merge_asof(left, self.keys, on='time', by='ip', direction=direction)
+        pos = np.full(n, -1, dtype=np.int64)
+        found = matched['pos'].notna().to_numpy()
+        pos[matched['q'].to_numpy()[found]] = matched['pos'].to_numpy()[found].astype(np.int64)
+        return pos
+
+    def counts(self, times, ips, window):
+        # -> {'events': counts, <flag>: counts} aligned with times/ips
+        queries = {'time': np.asarray(times, dtype='datetime64[ns]'),
+                   'ip': np.asarray(ips).astype(self.keys['ip'].dtype)}
+        window = np.timedelta64(pd.Timedelta(window).value, 'ns')
+        first = self._bound(queries, -window, 'forward')
+        last = self._bound(queries, window, 'backward')
+        hit = (first >= 0) & (last >= first)
+        first = np.where(hit, first, 0)
+        end = np.where(hit, last + 1, 0)
+        result = {'events': end - first}
+        for name, cumsum in self.cumsums.items():
+            result[name] = cumsum[end] - cumsum[first]
+        return result
+
+
+def time_window_counts(event_times, times, window):
+    # Events (any IP) within +/- window of each time
+    event_times = np.sort(np.asarray(event_times, dtype='datetime64[ns]'))
+    event_times = event_times[~np.isnat(event_times)]
+    times = np.asarray(times, dtype='datetime64[ns]')
+    window = np.timedelta64(pd.Timedelta(window).value, 'ns')
+    return np.searchsorted(event_times, times + window, 'right') - np.searchsorted(event_times, times - window, 'left')
+
+
+def correlate(suspicious, authlogs, web_logs, alerts, window='15min'):
+    # suspicious: sample_time/source_ip rows; authlogs: date/ip_address/login_success;
+    # web_logs: timestamp/ip_address/status_code; alerts: detection_time.
+    # Returns the samples with at least one same-IP auth or web event in the window.
+    auth = EventWindow(authlogs, 'date', flags={'failures': ~authlogs['login_success']})
+    web = EventWindow(web_logs, 'timestamp', flags={'errors': web_logs['status_code'].astype('int64') >= 400})
+
+    samples = suspicious[suspicious['sample_time'].notna() & (suspicious['source_ip'] != NO_IP)]
+    times, ips = samples['sample_time'], samples['source_ip']
+    auth_counts = auth.counts(times, ips, window)
+    web_counts = web.counts(times, ips, window)
+    result = samples[['sample_time', 'source_ip', 'protocol', 'inbound_bytes', 'outbound_bytes']].assign(
+        auth_events=auth_counts['events'],
+        auth_failures=auth_counts['failures'],
+        web_requests=web_counts['events'],
+        web_errors=web_counts['errors'],
+        alerts_nearby=time_window_counts(alerts['detection_time'], times, window),
+    )
+    result['correlated_events'] = result['auth_events'] + result['web_requests']
+    result = result[result['correlated_events'] > 0]
+    return result.sort_values(['correlated_events', 'sample_time'], ascending=[False, True], kind='stable') \
+        .reset_index(drop=True)
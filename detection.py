@@ -0,0 +1,107 @@
+# Streaming brute-force / credential-stuffing detection over authentication events.
+# Failures are tracked per username, per source IP and per (username, IP) pair in
+# small ring buffers holding the timestamps of the last `max_failures` failures,
+# so each event costs O(1) no matter how much history has been seen:
+#
+#   failure_burst           `max_failures` failures for one key within `window`
+#   success_after_failures  a success for a user with at least `success_after`
+#                           failures in the preceding `window`
+#
+# A key that alerted is quiet for `window` afterwards so one burst raises one alert.
+# Keys whose newest failure left the window are pruned every `prune_every` events,
+# so memory follows the number of recently active keys.
+# Events are processed in arrival order (the auth TimeIndex keeps them sorted).
+from collections import defaultdict, deque
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from schema import NO_IP, int_to_ip
+
+ALERT_COLUMNS = ['time', 'rule', 'key', 'username', 'ip_address', 'failures', 'first_failure']
+
+
+class BruteForceDetector:
+    def __init__(self, window='10min', max_failures=5, success_after=3, max_alerts=10000,
+                 prune_every=100000):
+        self.window = pd.Timedelta(window)
+        self.max_failures = max_failures
+        self.success_after = min(success_after, max_failures)
+        self.alerts = deque(maxlen=max_alerts)
+        self.events = 0
+        ring = partial(deque, maxlen=max_failures)
+        self._failures = {'user': defaultdict(ring), 'ip': defaultdict(ring), 'pair': defaultdict(ring)}
+        self._quiet_until = {}
+        self.prune_every = prune_every
+        self._since_prune = 0
+
+    def feed(self, rows, time_col='date'):
+        # rows: auth events with time_col, username, ip_address (packed uint32) and login_success
+        rows = rows[rows[time_col].notna()]
+        times = rows[time_col].to_numpy(dtype='datetime64[ns]').view(np.int64).tolist()
+        users = rows['username'].astype(str).tolist()
+        ips = rows['ip_address'].tolist()
+        successes = rows['login_success'].tolist()
+        fired = len(self.alerts)
+        self._run(times, users, ips, successes)
+        self.events += len(times)
+        self._since_prune += len(times)
+        if times and self._since_prune >= self.prune_every:
+            self._prune(times[-1])
+        return len(self.alerts) - fired
+
+    def _run(self, times, users, ips, successes):
+        window = self.window.value
+        max_failures = self.max_failures
+        success_after = self.success_after
+        by_user, by_ip, by_pair = self._failures['user'], self._failures['ip'], self._failures['pair']
+        quiet_until = self._quiet_until
+        for t, user, ip, success in zip(times, users, ips, successes):
+            if success:
+                ring = by_user.get(user)
+                if ring is None or len(ring) < success_after:
+                    continue
+                recent = [f for f in ring if t - f <= window]
+                if len(recent) >= success_after and quiet_until.get(('success', user), t) <= t:
+                    quiet_until[('success', user)] = t + window
+                    self._alert(t, 'success_after_failures', 'user', user, ip, recent)
+                continue
+            for kind, rings, key in (('user', by_user, user), ('ip', by_ip, ip), ('pair', by_pair, (user, ip))):
+                if kind != 'user' and ip == NO_IP:
+                    continue  # failures without a valid IP only count for the user
+                ring = rings[key]
+                ring.append(t)
+                if len(ring) == max_failures and t - ring[0] <= window and quiet_until.get((kind, key), t) <= t:
+                    quiet_until[(kind, key)] = t + window
+                    self._alert(t, 'failure_burst', kind, user, ip, ring)
+
+    def _prune(self, now):
+        cutoff = now - self.window.value
+        for rings in self._failures.values():
+            for key in [key for key, ring in rings.items() if ring[-1] < cutoff]:
+                del rings[key]
+        self._quiet_until = {key: t for key, t in self._quiet_until.items() if t > now}
+        self._since_prune = 0
+
+    def _alert(self, t, rule, kind, user, ip, failures):
+        self.alerts.append({
+            'time': t,
+            'rule': rule,
+            'key': kind,
+            'username': user if kind != 'ip' else None,
+            'ip_address': ip if kind != 'user' or rule == 'success_after_failures' else None,
+            'failures': len(failures),
+            'first_failure': failures[0],
+        })
+
+    def alerts_frame(self, limit=None):
+        # Most recent alerts first, with readable times and IPs
+        alerts = list(self.alerts)[::-1][:limit]
+        df = pd.DataFrame(alerts, columns=ALERT_COLUMNS)
+        for col in ('time', 'first_failure'):
+            df[col] = pd.to_datetime(df[col].astype('int64'), unit='ns')
+        ips = df['ip_address'].notna()
+        df['ip_address'] = df['ip_address'].astype(object)
+        df.loc[ips, 'ip_address'] = int_to_ip(df.loc[ips, 'ip_address'].astype('uint32')).to_numpy()
+        return df
@@ -0,0 +1,463 @@
+# Persistent embedded event store (SIEM_STORE_DIR).
+# Each dataset is kept on disk as time-partitioned columnar segments: Parquet
+# parts grouped in one directory per day, described by a manifest holding every
+# segment's row count, time range and min/max of its numeric and boolean columns.
+# A date-range read only opens the segments whose time range overlaps it and only
+# decodes the requested columns. Value filters are checked against the segment
+# stats first, then pushed down to the Parquet row groups (parts are written in
+# time order, so row-group stats also narrow the time range inside a day).
+# Memory used by a query follows the window it reads, not the archive size.
+#
+# A dataset is imported from its CSV source once, chunk by chunk. Later starts
+# only read the manifest and import the rows appended to the source since (the
+# manifest records the byte offset, the first line of the source and the drop
+# files already ingested, so a rotated source is told apart). New rows
+# in live mode are written as new parts, and a day with more than MAX_PARTS parts
+# is rewritten as one. Category columns keep a dataset-wide category list so
+# every read returns the same categorical dtypes. One process writes a store
+# (serve.py workers attach to mmap_store instead).
+#
+#   <store>/<dataset>/manifest.json
+#   <store>/<dataset>/<YYYY-MM-DD>/<part>.parquet   (undated/ for rows without a timestamp)
+#
+#   SIEM_STORE_DIR=store      keep the datasets in the store (unset: held in memory)
+#   SIEM_STORE_ALL_TIME_DAYS=30  days shown by tables and correlation without a
+#                                time window (never a whole-archive read)
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from ingest import DATASETS, CsvTailer, _LimitedReader, parse_chunk, read_csv_chunks, source_fingerprint
+from time_index import next_version
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+STORE_DIR = os.environ.get('SIEM_STORE_DIR')
+ALL_TIME_DAYS = int(os.environ.get('SIEM_STORE_ALL_TIME_DAYS', 30))
+STORE_FORMAT = 1  # bump when the segment layout or manifest changes
+ROW_GROUP_ROWS = 65536
+MAX_PARTS = 8
+UNDATED = 'undated'
+
+stores = {}  # dataset name -> DatasetStore opened by this process
+
+
+def enabled():
+    return bool(STORE_DIR) and pq is not None
+
+
+def _iso(value):
+    return None if value is None or pd.isna(value) else pd.Timestamp(value).isoformat()
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def column_stats(df, time_col):
+    # {column: [min, max]} of the numeric and boolean columns
+    stats = {}
+    for col, dtype in df.dtypes.items():
+        if col == time_col or not pd.api.types.is_numeric_dtype(dtype) \
+                or isinstance(dtype, pd.CategoricalDtype):
+            continue
+        values = df[col].dropna()
+        if len(values):
+            stats[col] = [_scalar(values.min()), _scalar(values.max())]
+    return stats
+
+
+def may_match(segment, filters):
+    # False when the segment's stats show that no row satisfies every filter.
+    # filters: [(column, op, value), ...] as in pyarrow.parquet.read_table
+    for col, op, value in filters or ():
+        bounds = segment['stats'].get(col)
+        if bounds is None:
+            continue
+        lo, hi = bounds
+        if op in ('=', '==') and not lo <= value <= hi:
+            return False
+        if op == 'in' and not any(lo <= v <= hi for v in value):
+            return False
+        if (op == '<' and lo >= value) or (op == '<=' and lo > value) \
+                or (op == '>' and hi <= value) or (op == '>=' and hi < value):
+            return False
+    return True
+
+
+class DatasetStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.RLock()
+        self.manifest = self._load()
+        self._obsolete = []  # files of compacted parts, removed once the manifest is saved
+        self.dtypes = self._dtypes()
+
+    def _path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def _load(self):
+        try:
+            with open(self._path('manifest.json')) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('format') != STORE_FORMAT:
+            return None
+        for seg in manifest['segments']:
+            seg['min'] = pd.Timestamp(seg['min']) if seg['min'] else None
+            seg['max'] = pd.Timestamp(seg['max']) if seg['max'] else None
+        return manifest
+
+    def _save(self):
+        manifest = dict(self.manifest, segments=[
+            dict(seg, min=_iso(seg['min']), max=_iso(seg['max'])) for seg in self.manifest['segments']
+        ])
+        path = self._path('manifest.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(path + '.tmp', path)
+        for file in self._obsolete:
+            os.remove(self._path(file))
+        self._obsolete = []
+
+    def _dtypes(self):
+        if self.manifest is None:
+            return {}
+        return {
+            col: pd.CategoricalDtype(pd.Index(self.manifest['categories'][col]))
+            if dtype == 'category' else pd.api.types.pandas_dtype(dtype)
+            for col, dtype in self.manifest['dtypes'].items()
+        }
+
+    def reset(self, time_col, source):
+        with self.lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory)
+            self.manifest = {
+                'format': STORE_FORMAT, 'time_col': time_col, 'source': source, 'complete': False,
+                'offset': 0, 'fingerprint': None, 'seen': [], 'columns': [], 'dtypes': {}, 'categories': {},
+                'next_part': 0, 'segments': [],
+            }
+            self.dtypes = {}
+            self._obsolete = []
+            self._save()
+
+    @property
+    def time_col(self):
+        return self.manifest['time_col']
+
+    def rows(self):
+        return sum(seg['rows'] for seg in self.manifest['segments'])
+
+    def nbytes(self):
+        return sum(seg['bytes'] for seg in self.manifest['segments'])
+
+    def _update_schema(self, rows):
+        # Records new columns and categories, and widens integer columns a batch outgrew
+        m = self.manifest
+        for col, dtype in rows.dtypes.items():
+            if col not in m['dtypes']:
+                m['columns'].append(col)
+            if isinstance(dtype, pd.CategoricalDtype):
+                known = m['categories'].setdefault(col, [])
+                seen = set(known)
+                known += [_scalar(c) for c in dtype.categories if c not in seen]
+                m['dtypes'][col] = 'category'
+                continue
+            old = m['dtypes'].get(col)
+            new = str(dtype)
+            if old is not None and old != new:
+                try:
+                    new = str(np.promote_types(np.dtype(old), np.dtype(new)))
+                except TypeError:
+                    pass
+            m['dtypes'][col] = new
+        self.dtypes = self._dtypes()
+
+    def _restore(self, df):
+        # Gives a decoded part the dataset-wide dtypes
+        for col in df.columns:
+            dtype = self.dtypes.get(col)
+            if dtype is not None and df[col].dtype != dtype:
+                df[col] = df[col].astype(dtype)
+        return df
+
+    def _write_part(self, day, part):
+        m = self.manifest
+        part = part.sort_values(m['time_col'], kind='stable')
+        file = f"{day}/{m['next_part']:06d}.parquet"
+        m['next_part'] += 1
+        os.makedirs(self._path(day), exist_ok=True)
+        path = self._path(file)
+        part.to_parquet(path + '.tmp', index=False, row_group_size=ROW_GROUP_ROWS)
+        os.replace(path + '.tmp', path)
+        times = part[m['time_col']]
+        m['segments'].append({
+            'file': file, 'day': day, 'rows': len(part), 'bytes': os.path.getsize(path),
+            'min': None if day == UNDATED else times.min(), 'max': None if day == UNDATED else times.max(),
+            'stats': column_stats(part, m['time_col']),
+        })
+
+    def write(self, rows, offset=None, seen=None, fingerprint=None, save=True):
+        # Appends prepared rows as one new part per day they cover. offset/seen/
+        # fingerprint record how far the source has been ingested, saved with the
+        # parts. save=False leaves saving the manifest to the end of a batch of
+        # writes (the import saves it once, in finish_import).
+        with self.lock:
+            self._update_schema(rows)
+            days = rows[self.time_col].dt.floor('D')
+            touched = []
+            for day, part in rows.groupby(days, dropna=False, sort=True):
+                day = UNDATED if pd.isna(day) else day.strftime('%Y-%m-%d')
+                self._write_part(day, part)
+                touched.append(day)
+            if offset is not None:
+                self.manifest['offset'] = offset
+            if seen is not None:
+                self.manifest['seen'] = sorted(seen)
+            if fingerprint is not None:
+                self.manifest['fingerprint'] = fingerprint
+            for day in touched:
+                self._compact(day)
+            if save:
+                self._save()
+
+    def finish_import(self, offset, fingerprint=None):
+        with self.lock:
+            self.manifest['offset'] = offset
+            self.manifest['fingerprint'] = fingerprint
+            self.manifest['complete'] = True
+            self._save()
+
+    def _compact(self, day):
+        # Rewrites the parts of a day as a single part once there are too many
+        segments = [seg for seg in self.manifest['segments'] if seg['day'] == day]
+        if len(segments) <= MAX_PARTS:
+            return
+        rows = self._read(segments, columns=self.manifest['columns'])
+        self.manifest['segments'] = [seg for seg in self.manifest['segments'] if seg['day'] != day]
+        self._write_part(day, rows)
+        self._obsolete += [seg['file'] for seg in segments]
+
+    def select(self, start=None, end=None, inclusive_end=True, filters=None, undated=False):
+        # Segments overlapping the time range whose stats allow the filters, in time order
+        dated, rest = [], []
+        for seg in self.manifest['segments']:
+            if seg['day'] == UNDATED:
+                if undated:
+                    rest.append(seg)
+                continue
+            if start is not None and seg['max'] < start:
+                continue
+            if end is not None and (seg['min'] > end or (not inclusive_end and seg['min'] >= end)):
+                continue
+            if may_match(seg, filters):
+                dated.append(seg)
+        return sorted(dated, key=lambda seg: (seg['min'], seg['file'])) + rest
+
+    def empty(self, columns=None):
+        columns = self.manifest['columns'] if columns is None else columns
+        return pd.DataFrame({col: pd.Series(dtype=self.dtypes.get(col, 'object')) for col in columns})
+
+    def _read(self, segments, start=None, end=None, inclusive_end=True, columns=None, filters=None):
+        time_col = self.time_col
+        columns = list(self.manifest['columns'] if columns is None else columns)
+        predicates = list(filters or [])
+        if start is not None:
+            predicates.append((time_col, '>=', start))
+        if end is not None:
+            predicates.append((time_col, '<=' if inclusive_end else '<', end))
+        dated = [seg for seg in segments if seg['day'] != UNDATED]
+        # Parts of the same day written by different batches may overlap in time
+        overlap = any(b['min'] < a['max'] for a, b in zip(dated, dated[1:]))
+        read_columns = columns + [time_col] if overlap and time_col not in columns else columns
+        parts = []
+        for seg in segments:
+            table = pq.read_table(self._path(seg['file']), columns=read_columns, filters=predicates or None)
+            if table.num_rows:
+                parts.append(self._restore(table.to_pandas()))
+        if not parts:
+            return self.empty(columns)
+        df = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+        if overlap:
+            df = df.sort_values(time_col, kind='stable', na_position='last', ignore_index=True)[columns]
+        return df
+
+    def read(self, start=None, end=None, inclusive_end=True, columns=None, filters=None, undated=False):
+        start = None if start is None or pd.isna(start) else pd.Timestamp(start)
+        end = None if end is None or pd.isna(end) else pd.Timestamp(end)
+        for attempt in range(2):
+            with self.lock:
+                segments = self.select(start, end, inclusive_end, filters, undated)
+            try:
+                return self._read(segments, start, end, inclusive_end, columns, filters)
+            except FileNotFoundError:
+                # A day was compacted while it was being read, read the new part
+                if attempt:
+                    raise
+
+    def _day(self, day):
+        with self.lock:
+            return [seg for seg in self.select(undated=True) if seg['day'] == day]
+
+    def frames(self, columns=None):
+        # The stored rows one day at a time, in time order (undated rows last)
+        with self.lock:
+            days = list(dict.fromkeys(seg['day'] for seg in self.select(undated=True)))
+        if not days:
+            yield self.empty(columns)
+        for day in days:
+            try:
+                rows = self._read(self._day(day), columns=columns)
+            except FileNotFoundError:
+                rows = self._read(self._day(day), columns=columns)
+            yield rows
+
+    def min(self):
+        return min((seg['min'] for seg in self.manifest['segments'] if seg['min'] is not None), default=pd.NaT)
+
+    def max(self):
+        return max((seg['max'] for seg in self.manifest['segments'] if seg['max'] is not None), default=pd.NaT)
+
+
+class StoreIndex:
+    # TimeIndex interface over a DatasetStore. Nothing but the manifest is held
+    # in memory: every slice reads the overlapping segments from disk.
+    def __init__(self, store, tailer=None):
+        self.store = store
+        self.time_col = store.time_col
+        self.tailer = tailer  # source position saved with every append
+        self.version = next_version()
+
+    def __len__(self):
+        return self.store.rows()
+
+    @property
+    def df(self):
+        # The whole dataset read into one frame (NaT rows last). Prefer slice() or frames().
+        return self.store.read(undated=True)
+
+    @property
+    def columns(self):
+        return pd.Index(self.store.manifest['columns'])
+
+    def min(self):
+        return self.store.min()
+
+    def max(self):
+        return self.store.max()
+
+    def slice(self, start=None, end=None, inclusive_end=True, columns=None, filters=None):
+        rows = self.store.read(start, end, inclusive_end, columns, filters)
+        metrics.record(scanned=len(rows))
+        return rows
+
+    def frames(self, columns=None):
+        return self.store.frames(columns)
+
+    def memory_usage(self):
+        return 0  # the rows stay on disk
+
+    def append(self, rows):
+        if not len(rows):
+            return
+        if self.tailer is None:
+            self.store.write(rows)
+        else:
+            self.store.write(rows, self.tailer.offset, self.tailer.seen, self.tailer.fingerprint)
+        self.version = next_version()
+
+
+class StoreView:
+    # The rows of a StoreIndex kept by select(rows) (e.g. open incidents), as a
+    # read-only TimeIndex: every read selects from the stored rows instead of
+    # holding a selected copy in memory. `filters` are pushed down to the segments.
+    # New rows are seen through the store, so the view is not tracked.
+    def __init__(self, index, select, filters=None):
+        self.index = index
+        self.time_col = index.time_col
+        self.select = select
+        self.filters = filters
+
+    @property
+    def version(self):
+        return self.index.version
+
+    @property
+    def columns(self):
+        return self.select(self.index.store.empty()).columns
+
+    @property
+    def df(self):
+        return self.select(self.index.store.read(filters=self.filters, undated=True))
+
+    def min(self):
+        return self.index.min()
+
+    def max(self):
+        return self.index.max()
+
+    def slice(self, start=None, end=None, inclusive_end=True, columns=None):
+        rows = self.select(self.index.slice(start, end, inclusive_end, filters=self.filters))
+        return rows if columns is None else rows[list(columns)]
+
+    def frames(self, columns=None):
+        for rows in self.index.frames():
+            rows = self.select(rows)
+            yield rows if columns is None else rows[list(columns)]
+
+    def memory_usage(self):
+        return 0
+
+
+def import_source(store, spec, prepare):
+    # Streams the CSV into the store chunk by chunk, the import never holds the whole source
+    size = os.stat(spec['path']).st_size
+    with open(spec['path'], 'rb') as f:
+        for chunk in read_csv_chunks(spec, source=_LimitedReader(f, size)):
+            store.write(prepare(chunk), save=False)
+    if not store.manifest['columns']:
+        store.write(prepare(parse_chunk(pd.read_csv(spec['path'], dtype=spec['dtype'], nrows=0), spec)), save=False)
+    store.finish_import(size, source_fingerprint(spec['path']))
+
+
+def open_index(name, time_col, prepare, drop_dir=None):
+    # Opens the stored dataset, importing it from its source on first use and
+    # then the rows appended to the source since the last run.
+    # Returns the index and the tailer positioned after the rows it holds.
+    spec = DATASETS[name]
+    store = DatasetStore(os.path.join(STORE_DIR, name))
+    m = store.manifest
+    if m is None or not m['complete'] or m['source'] != spec['path'] or m['time_col'] != time_col:
+        store.reset(time_col, spec['path'])
+        import_source(store, spec, prepare)
+    stores[name] = store
+    tailer = CsvTailer(name, store.manifest['offset'], drop_dir, store.manifest['seen'],
+                       store.manifest.get('fingerprint'))
+    index = StoreIndex(store, tailer)
+    rows = tailer.read_new()
+    if rows is not None:
+        index.append(prepare(rows))
+    return index, tailer
+
+
+def collect_metrics():
+    opened = list(stores.items())
+    return [
+        ('siem_store_segments', 'gauge', 'Segments in the event store per dataset',
+         [({'dataset': name}, len(store.manifest['segments'])) for name, store in opened]),
+        ('siem_store_bytes', 'gauge', 'Bytes on disk in the event store per dataset',
+         [({'dataset': name}, store.nbytes()) for name, store in opened]),
+    ]
+
+
+metrics.register_collector(collect_metrics)
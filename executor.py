@@ -0,0 +1,168 @@
+# Execution layer for the heavy callbacks.
+# Callbacks wrapped with offload() run on a bounded worker pool rather than in
+# the request thread, so a burst of date picks queues instead of oversubscribing
+# the CPU, and:
+# - identical concurrent calls (same callback and arguments, from any user)
+#   share one computation: later callers wait for the one already in flight;
+# - a browser session (cookie) only waits for its newest call of a callback. An
+#   older call still waiting returns at once with PreventUpdate (the browser
+#   only shows the newest response anyway), and its computation is cancelled
+#   if it has not started and no other caller is waiting for it. A computation
+#   that already started runs to the end and still fills the result cache.
+# coalesce() gives the same sharing, in the caller's thread, to a computation
+# used by several callbacks.
+#
+# Sessions are per browser, not per tab: two tabs of one browser changing the
+# same control at the same moment only get the newest answer.
+#
+#   SIEM_CALLBACK_WORKERS=4      computations run at once per process
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextvars import copy_context
+from functools import wraps
+from itertools import count
+
+from dash.exceptions import PreventUpdate
+from flask import has_request_context, request
+
+import metrics
+from result_cache import date_key, freeze
+
+CALLBACK_WORKERS = int(os.environ.get('SIEM_CALLBACK_WORKERS', 4))
+SESSION_COOKIE = 'siem_session'
+WAIT_S = 0.05  # how often a waiting call checks whether it was superseded
+
+
+def session_id():
+    return request.cookies.get(SESSION_COOKIE) if has_request_context() else None
+
+
+class Flight:
+    # One computation and the number of calls waiting for it
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 0
+
+
+class CallbackExecutor:
+    def __init__(self, workers=CALLBACK_WORKERS):
+        self.workers = workers
+        self.pool = None
+        self.pid = None
+        self.flights = {}  # call key -> Flight
+        self.latest = {}  # (session, callback) -> id of the session's newest call
+        self.calls = count(1)
+        # re-entrant: a future that is already done runs its done-callback in the submitting thread
+        self.lock = threading.RLock()
+
+    def install(self, app):
+        # Gives every browser a session cookie
+        @app.server.after_request
+        def set_session(response):
+            if SESSION_COOKIE not in request.cookies:
+                response.set_cookie(SESSION_COOKIE, uuid.uuid4().hex, httponly=True, samesite='Lax')
+            return response
+
+    def _pool(self):
+        # Started lazily, and again in a forked worker (threads do not survive fork)
+        with self.lock:
+            if self.pid != os.getpid():
+                self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='callback')
+                self.flights = {}
+                self.pid = os.getpid()
+            return self.pool
+
+    @staticmethod
+    def _run(func, args, stats):
+        # Rows scanned and profile samples on the pool count towards the request that
+        # started the computation
+        with metrics.recording(stats):
+            return func(*args)
+
+    def _land(self, key, flight):
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+
+    def _join(self, key, func, args):
+        pool = self._pool()
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None:
+                future = pool.submit(copy_context().run, self._run, func, args, metrics.current_stats())
+                flight = self.flights[key] = Flight(future)
+                future.add_done_callback(lambda f: self._land(key, flight))
+            else:
+                metrics.CALLBACK_COALESCED.inc(callback=key[0])
+            flight.waiters += 1
+            return flight
+
+    def _leave(self, key, flight):
+        with self.lock:
+            flight.waiters -= 1
+            if not flight.waiters and flight.future.cancel():
+                metrics.CALLBACK_CANCELLED.inc(callback=key[0])
+
+    def offload(self, name, date_args=(0, 1)):
+        # date_args: positions of date arguments, normalized like the result cache keys
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args):
+                key = (name, tuple(date_key(a) if i in date_args else freeze(a) for i, a in enumerate(args)))
+                session = session_id()
+                latest = None if session is None else (session, name)
+                call = next(self.calls)
+                if latest is not None:
+                    self.latest[latest] = call
+                flight = self._join(key, func, args)
+                try:
+                    while True:
+                        if latest is not None and self.latest.get(latest) != call:
+                            metrics.CALLBACK_SUPERSEDED.inc(callback=name)
+                            raise PreventUpdate
+                        if flight.future.done():
+                            return flight.future.result()
+                        try:
+                            flight.future.result(timeout=WAIT_S)
+                        except FutureTimeout:
+                            pass
+                finally:
+                    self._leave(key, flight)
+                    with self.lock:
+                        if latest is not None and self.latest.get(latest) == call:
+                            del self.latest[latest]
+            return wrapper
+        return decorator
+
+    def coalesce(self, key, func):
+        # func() computed once for concurrent callers with the same key, in the first caller's thread
+        with self.lock:
+            flight = self.flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self.flights[key] = Flight(Future())
+            else:
+                metrics.CALLBACK_COALESCED.inc(callback=key[0])
+        if not owner:
+            return flight.future.result()
+        try:
+            value = func()
+            flight.future.set_result(value)
+            return value
+        except BaseException as exc:
+            flight.future.set_exception(exc)
+            raise
+        finally:
+            self._land(key, flight)
+
+    def stats(self):
+        with self.lock:
+            flights = list(self.flights.values())
+        return {
+            'in_flight': len(flights),
+            'running': sum(flight.future.running() for flight in flights),
+            'waiting_calls': sum(flight.waiters for flight in flights),
+            'workers': self.workers,
+        }
@@ -0,0 +1,24 @@
+# Local gazetteer for the failed-login map.
+# Coordinates for the `geo_location` values come from gazetteer.csv next to this
+# file, loaded once per process; no geocoding service is ever called. Locations
+# missing from the file are left out of the map (they still count in the pie).
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer.csv')
+
+
+@lru_cache(maxsize=None)
+def load_gazetteer(path=GAZETTEER_PATH):
+    return pd.read_csv(path, dtype={'geo_location': 'str', 'lat': 'float64', 'lon': 'float64'}).set_index('geo_location')
+
+
+def with_coordinates(counts):
+    # counts: Series of counts indexed by geo_location -> frame with geo_location, count, lat, lon
+    gazetteer = load_gazetteer()
+    df = counts.rename('count').reset_index()
+    df['geo_location'] = df['geo_location'].astype(str)
+    df = df.join(gazetteer, on='geo_location', how='inner')
+    return df.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
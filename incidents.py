@@ -0,0 +1,86 @@
+# Incident SLA and time-to-resolve metrics.
+# Every incident report is folded once into totals per (day, category,
+# detected_by, resolution_status): incidents, open incidents, summed response
+# minutes and SLA breaches, plus response time sketches at the same grain
+# (QuantileSketches, sketches.py). A summary for any range of days, grouped by
+# any of those dimensions or per day, sums a few rows per day and merges the
+# daily sketches instead of scanning the reports, and new reports are added as
+# they arrive.
+# MTTR is the mean response_time_minutes. An incident breaches the SLA when its
+# response took longer than SIEM_INCIDENT_SLA_MINUTES (default 120).
+# Reports without a report time are not counted.
+import os
+
+import numpy as np
+import pandas as pd
+
+from rollups import GroupTotals, level_range
+from sketches import QuantileSketches
+
+SLA_MINUTES = int(os.environ.get('SIEM_INCIDENT_SLA_MINUTES', 120))
+INCIDENT_DIMS = ['category', 'detected_by', 'resolution_status']
+QUANTILES = (0.5, 0.9, 0.95)
+RESOLVED = 'Resolved'
+INCIDENT_COLUMNS = ['incidents', 'open', 'mttr', 'breaches', 'breach_rate'] + [f'p{q * 100:g}' for q in QUANTILES]
+
+
+class IncidentMetrics:
+    def __init__(self, time_col, value_col='response_time_minutes', sla_minutes=SLA_MINUTES, rows=None):
+        self.time_col = time_col
+        self.value_col = value_col
+        self.sla_minutes = sla_minutes
+        self.totals = GroupTotals(['day'] + INCIDENT_DIMS, ['incidents', 'open', 'timed', 'minutes', 'breaches'])
+        self.latency = QuantileSketches(time_col, value_col, INCIDENT_DIMS, freq='D')
+        if rows is not None:
+            self.add(rows)
+
+    def add(self, rows):
+        rows = rows[rows[self.time_col].notna()]
+        if not len(rows):
+            return
+        minutes = rows[self.value_col].astype('float64')
+        part = rows[INCIDENT_DIMS].copy()
+        part.insert(0, 'day', rows[self.time_col].dt.floor('D'))
+        part['incidents'] = 1
+        part['open'] = (rows['resolution_status'] != RESOLVED).astype('int64')
+        part['timed'] = minutes.notna().astype('int64')
+        part['minutes'] = minutes.fillna(0)
+        part['breaches'] = (minutes > self.sla_minutes).astype('int64')
+        self.totals.add(part)
+        self.latency.add(rows)
+
+    def summary(self, start=None, end=None, by=()):
+        # INCIDENT_COLUMNS of the reports on the days in [start, end), per `by`
+        # (dimensions and/or 'day'), or one row when by=()
+        by = list(by)
+        table = self.totals.table
+        if table is None:
+            if by:
+                index = pd.MultiIndex.from_arrays([[]] * len(by), names=by)
+                return pd.DataFrame(columns=INCIDENT_COLUMNS, index=index)
+            return pd.DataFrame([{'incidents': 0, 'open': 0, 'breaches': 0}], columns=INCIDENT_COLUMNS)
+        table = level_range(table, 'day', None if start is None else pd.Timestamp(start).floor('D'),
+                            None if end is None else pd.Timestamp(end))
+        if by:
+            totals = table.groupby(level=by, observed=True).sum()
+        else:
+            totals = table.sum().to_frame().T
+        result = totals[['incidents', 'open', 'breaches']].astype('int64')
+        timed = totals['timed'].where(totals['timed'] > 0)
+        result.insert(2, 'mttr', (totals['minutes'] / timed).round(1))
+        result['breach_rate'] = (totals['breaches'] / timed).round(4)
+
+        last = None if end is None else pd.Timestamp(end) - pd.Timedelta(1)
+        sketch_by = ['bucket' if col == 'day' else col for col in by]
+        quantiles = self.latency.quantiles(QUANTILES, start, last, by=sketch_by)
+        if by:
+            quantiles = quantiles.rename_axis(by)
+            return result.join(quantiles.round(1))
+        for col in quantiles.columns:
+            result[col] = quantiles[col].round(1).iloc[0] if len(quantiles) else np.nan
+        return result.reset_index(drop=True)
+
+    @property
+    def nbytes(self):
+        tables = [self.totals.table, self.latency.totals.table]
+        return sum(int(np.sum(table.memory_usage(deep=True))) for table in tables if table is not None)
@@ -0,0 +1,214 @@
+# Ingestion stage for the five SIEM datasets.
+# CSVs are read in bounded chunks with explicit dtypes and a fixed ISO timestamp
+# format, then written to a columnar Parquet cache keyed on the source file's
+# size and mtime. A warm restart loads the cache and never re-parses the CSV.
+# In live mode CsvTailer parses only the rows appended after the initial load.
+import hashlib
+import io
+import os
+
+import pandas as pd
+
+from schema import compact, concat_chunks
+
+try:
+    import pyarrow  # noqa: F401  (needed by pandas for Parquet)
+except ImportError:
+    pyarrow = None
+
+CACHE_DIR = os.environ.get('SIEM_CACHE_DIR', '.cache')
+DATA_DIR = os.environ.get('SIEM_DATA_DIR', '')  # directory of the CSVs (e.g. synthetic.py output)
+CACHE_FORMAT = 2  # bump when the cached frame layout changes (2: compact schema)
+CHUNK_ROWS = 250_000
+TIME_FORMAT = 'ISO8601'
+
+DATASETS = {
+    'web_logs': dict(
+        path='Dataset 1__Web_Server_Access_Logs.csv',
+        time_col='timestamp',
+        dtype={'ip_address': 'str', 'url_accessed': 'str', 'http_method': 'str',
+               'status_code': 'int64', 'response_time_ms': 'int64'},
+    ),
+    'auth_logs': dict(
+        path='Dateset 2__User_Authentication_Logs.csv',
+        time_col='login_timestamp',
+        dtype={'username': 'str', 'ip_address': 'str', 'login_status': 'str',
+               'user_agent': 'str', 'geo_location': 'str'},
+    ),
+    'malware_alerts': dict(
+        path='dataset_3_malware_threat_alerts.csv',
+        time_col='detection_time',
+        dtype={'alert_id': 'str', 'threat_type': 'str', 'severity': 'str',
+               'affected_file': 'str', 'remediation_status': 'str'},
+    ),
+    'network_traffic': dict(
+        path='Dataset 4__Network_Traffic_Summary.csv',
+        time_col='sample_time',
+        dtype={'inbound_bytes': 'int64', 'outbound_bytes': 'int64', 'protocol': 'str',
+               'suspicious_activity': 'str', 'source_ip': 'str'},
+    ),
+    'incident_reports': dict(
+        path='Dataset 5__Security_Incident_Reports.csv',
+        time_col='report_time',
+        dtype={'incident_id': 'str', 'category': 'str', 'detected_by': 'str',
+               'response_time_minutes': 'int64', 'resolution_status': 'str'},
+    ),
+}
+for _name, _spec in DATASETS.items():
+    _spec['name'] = _name
+    _spec['path'] = os.path.join(DATA_DIR, _spec['path'])
+
+
+def parse_chunk(chunk, spec):
+    # Timestamps are parsed with a fixed format, bad values become NaT.
+    # Columns are then packed into the compact schema (see schema.py).
+    chunk[spec['time_col']] = pd.to_datetime(chunk[spec['time_col']], format=TIME_FORMAT, errors='coerce')
+    return compact(chunk, spec['name'])
+
+
+def read_csv_chunks(spec, chunksize=CHUNK_ROWS, source=None, **kwargs):
+    reader = pd.read_csv(source if source is not None else spec['path'], dtype=spec['dtype'],
+                         chunksize=chunksize, **kwargs)
+    for chunk in reader:
+        yield parse_chunk(chunk, spec)
+
+
+def cache_key(path):
+    st = os.stat(path)
+    return f"{st.st_size}-{st.st_mtime_ns}-v{CACHE_FORMAT}"
+
+
+def cache_path(name, key):
+    return os.path.join(CACHE_DIR, f"{name}-{key}.parquet")
+
+
+def _write_cache(name, key, df):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    target = cache_path(name, key)
+    tmp = target + '.tmp'
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, target)
+    # Drop caches written for older versions of the same source
+    for entry in os.listdir(CACHE_DIR):
+        if entry.startswith(name + '-') and entry.endswith('.parquet') and os.path.join(CACHE_DIR, entry) != target:
+            os.remove(os.path.join(CACHE_DIR, entry))
+
+
+class _LimitedReader:
+    # File wrapper that stops at `limit` bytes, so a load reads exactly the
+    # bytes its cache key (and the live tailer's start offset) describes
+    def __init__(self, f, limit):
+        self.f = f
+        self.remaining = limit
+
+    def read(self, n=-1):
+        if self.remaining <= 0:
+            return b''
+        n = self.remaining if n is None or n < 0 else min(n, self.remaining)
+        data = self.f.read(n)
+        self.remaining -= len(data)
+        return data
+
+    def __iter__(self):
+        return iter(self.read().splitlines(keepends=True))
+
+
+def load_with_offset(name, chunksize=CHUNK_ROWS, use_cache=True):
+    # Returns (frame, byte offset of the source that the frame covers)
+    spec = DATASETS[name]
+    use_cache = use_cache and pyarrow is not None
+    size = os.stat(spec['path']).st_size
+    key = cache_key(spec['path'])
+    if use_cache and os.path.exists(cache_path(name, key)):
+        return pd.read_parquet(cache_path(name, key)), size
+
+    with open(spec['path'], 'rb') as f:
+        chunks = list(read_csv_chunks(spec, chunksize, source=_LimitedReader(f, size)))
+    if not chunks:
+        chunks = [parse_chunk(pd.read_csv(spec['path'], dtype=spec['dtype'], nrows=0), spec)]
+    df = concat_chunks(chunks)
+    if use_cache:
+        try:
+            _write_cache(name, key, df)
+        except OSError:
+            # A read-only checkout still works, it just parses the CSV each start
+            pass
+    return df, size
+
+
+def load_dataset(name, chunksize=CHUNK_ROWS, use_cache=True):
+    return load_with_offset(name, chunksize, use_cache)[0]
+
+
+def source_fingerprint(path):
+    # Hash of the first data line (None until there is one complete line).
+    # A different first line means the source was rotated or rewritten.
+    with open(path, 'rb') as f:
+        f.readline()
+        line = f.readline()
+    return hashlib.sha1(line).hexdigest() if line.endswith(b'\n') else None
+
+
+def _line_start(path, size, block=65536):
+    # Offset just after the last complete line within the first `size` bytes
+    with open(path, 'rb') as f:
+        f.seek(max(0, size - block))
+        tail = f.read(size - f.tell())
+    return size - len(tail) + tail.rfind(b'\n') + 1
+
+
+class CsvTailer:
+    # Follows a growing CSV source from a byte offset and, optionally, a drop
+    # directory of new CSV chunk files (<drop_dir>/<name>/*.csv). Only complete
+    # newly appended lines are parsed.
+    # The source is told apart by its first data line: a rotated or rewritten
+    # source is read again from its header, a source truncated in place keeps
+    # the rows already read and continues after the last one left.
+    def __init__(self, name, offset, drop_dir=None, seen=(), fingerprint=None):
+        # seen: drop files already ingested (e.g. recorded by the event store)
+        # fingerprint: source_fingerprint() of the source the offset refers to
+        # (default: the current source)
+        self.name = name
+        self.spec = DATASETS[name]
+        self.offset = offset
+        self.drop_dir = os.path.join(drop_dir, name) if drop_dir else None
+        self.seen = set(seen)
+        with open(self.spec['path'], 'rb') as f:
+            self.header = f.readline()
+        self.fingerprint = fingerprint or source_fingerprint(self.spec['path'])
+
+    def _parse(self, source):
+        return list(read_csv_chunks(self.spec, source=source))
+
+    def read_new(self):
+        chunks = []
+        path = self.spec['path']
+        size = os.stat(path).st_size
+        fingerprint = source_fingerprint(path)
+        if self.fingerprint is not None and fingerprint != self.fingerprint:
+            # Rotated or rewritten, its rows are all new: start again after the header
+            with open(path, 'rb') as f:
+                self.header = f.readline()
+            self.offset = len(self.header)
+        elif size < self.offset:
+            # Truncated in place, the rows left were already read
+            self.offset = max(_line_start(path, size), len(self.header))
+        self.fingerprint = fingerprint
+        if size > self.offset:
+            with open(self.spec['path'], 'rb') as f:
+                f.seek(self.offset)
+                data = f.read(size - self.offset)
+            end = data.rfind(b'\n') + 1
+            if end:
+                self.offset += end
+                chunks += self._parse(io.BytesIO(self.header + data[:end]))
+        if self.drop_dir and os.path.isdir(self.drop_dir):
+            for entry in sorted(os.listdir(self.drop_dir)):
+                path = os.path.join(self.drop_dir, entry)
+                if entry.endswith('.csv') and path not in self.seen:
+                    self.seen.add(path)
+                    chunks += self._parse(path)
+        chunks = [c for c in chunks if len(c)]
+        if not chunks:
+            return None
+        return concat_chunks(chunks)
@@ -0,0 +1,151 @@
+# Live mode: follow the source CSVs (and an optional drop directory of new
+# chunk files) and fold newly appended rows into the in-memory datasets and
+# everything derived from them, so dashboards update without a restart.
+#
+#   SIEM_LIVE=1                    enable polling from the browser (dcc.Interval)
+#   SIEM_LIVE_INTERVAL_MS=5000     poll interval
+#   SIEM_DROP_DIR=incoming         also read new files from incoming/<dataset>/*.csv
+#
+# With SIEM_STORE_DIR the datasets are read from the on-disk event store
+# (event_store.py) instead of being held in memory, and new rows are written to it.
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+import event_store
+import metrics
+import mmap_store
+from ingest import CsvTailer, load_with_offset
+from time_index import TimeIndex
+
+LIVE_MODE = os.environ.get('SIEM_LIVE', '') == '1'
+LIVE_INTERVAL_MS = int(os.environ.get('SIEM_LIVE_INTERVAL_MS', 5000))
+DROP_DIR = os.environ.get('SIEM_DROP_DIR')
+
+sources = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def dataset_lock(name):
+    # One re-entrant lock per dataset, created on first use. It guards the load,
+    # the first build of everything derived from the dataset and the folding in
+    # of new rows (a build holding it may load or track on first access).
+    with _locks_guard:
+        return _locks.setdefault(name, threading.RLock())
+
+
+class LiveSource:
+    def __init__(self, name, index, prepare, tailer):
+        self.name = name
+        self.index = index
+        self.prepare = prepare
+        self.tailer = tailer
+        self.listeners = []
+        self.lock = dataset_lock(name)
+
+    def track(self, build, update):
+        # build() computes a derived object from the rows loaded so far and
+        # update(obj, rows) folds new rows into it. Both run under the source
+        # lock so no appended rows are missed in between.
+        with self.lock:
+            obj = build()
+            self.listeners.append(lambda rows: update(obj, rows))
+        return obj
+
+    def poll(self):
+        # Returns True when new rows were appended
+        with self.lock:
+            rows = self.tailer.read_new()
+            if rows is None:
+                return False
+            rows = self.prepare(rows)
+            self.index.append(rows)
+            for listener in self.listeners:
+                listener(rows)
+            return True
+
+
+def load(name, time_col, prepare):
+    # Loads a dataset, applies `prepare` and registers it for live updates.
+    # `prepare` is reused on every batch of new rows. Under serve.py the
+    # prepared, sorted frame is attached from the shared memory-mapped store.
+    # A dataset is loaded once: concurrent callers wait for the first load and
+    # get its index, so the trackers registered on it are never orphaned.
+    with dataset_lock(name):
+        if name in sources:
+            return sources[name].index
+        t0 = time.perf_counter()
+        if mmap_store.available(name):
+            df, meta = mmap_store.attach_frame(mmap_store.dataset_dir(name))
+            index = TimeIndex(df, time_col, presorted=True)
+            tailer = CsvTailer(name, meta['offset'], DROP_DIR)
+        elif event_store.enabled():
+            index, tailer = event_store.open_index(name, time_col, prepare, DROP_DIR)
+        else:
+            df, offset = load_with_offset(name)
+            index = TimeIndex(prepare(df), time_col)
+            tailer = CsvTailer(name, offset, DROP_DIR)
+        sources[name] = LiveSource(name, index, prepare, tailer)
+        metrics.DATASET_LOAD_SECONDS.set(time.perf_counter() - t0, dataset=name)
+        return index
+
+
+def collect_metrics():
+    loaded = list(sources.items())
+    return [
+        ('siem_dataset_rows', 'gauge', 'Rows held per dataset',
+         [({'dataset': name}, len(source.index)) for name, source in loaded]),
+        ('siem_dataset_memory_bytes', 'gauge', 'Memory held by the rows of each dataset',
+         [({'dataset': name}, source.index.memory_usage()) for name, source in loaded]),
+    ]
+
+
+metrics.register_collector(collect_metrics)
+
+
+def track(name, build, update):
+    with dataset_lock(name):
+        return sources[name].track(build, update)
+
+
+@contextmanager
+def locked(names):
+    # Holds the locks of the named datasets (always in name order), so derived
+    # objects are read between polls rather than while new rows are being folded in
+    with ExitStack() as stack:
+        for name in sorted(set(names)):
+            stack.enter_context(dataset_lock(name))
+        yield
+
+
+def cached(*names):
+    # lru_cache(maxsize=None) for the dataset loaders and the objects derived from
+    # them, made single-flight: a first call builds under the locks of the datasets
+    # `names` and concurrent callers wait for that build instead of starting their
+    # own. Hits do not take the locks.
+    def decorate(func):
+        results = {}
+
+        @wraps(func)
+        def wrapper(*args):
+            try:
+                return results[args]
+            except KeyError:
+                pass
+            with locked(names):
+                if args not in results:
+                    results[args] = func(*args)
+                return results[args]
+
+        wrapper.built = lambda: bool(results)
+        wrapper.cache_clear = results.clear
+        return wrapper
+    return decorate
+
+
+def poll_all():
+    # Names of the loaded datasets that received new rows
+    return [name for name, source in list(sources.items()) if source.poll()]
@@ -0,0 +1,288 @@
+# Request instrumentation and the Prometheus-style /metrics route.
+# Callbacks are timed on the Flask side of /_dash-update-component and named
+# after the Python function Dash dispatches to. Rows scanned (TimeIndex slices)
+# and rows returned (table pages) are counted per request through record(),
+# which is a no-op outside a callback request (background builds, benchmarks).
+# Gauges that are cheap to read at scrape time (datasets, cache, panels) come
+# from collectors registered by the modules that own them.
+#
+# Counters are per process: under serve.py every worker exposes its own, so
+# scrape each worker (or sum them) rather than reading one.
+#
+# Opt-in sampling profiler for slow callbacks: the stacks of the threads serving
+# callbacks, and of the pool threads computing for them (see recording()), are
+# sampled every SIEM_PROFILE_INTERVAL_MS, and a request slower than
+# SIEM_PROFILE_SLOW_MS is written to SIEM_PROFILE_DIR as folded stacks
+# ("frame;frame;frame count" lines), the input of flamegraph.pl and speedscope.
+#
+#   SIEM_PROFILE_SLOW_MS=500      profile requests slower than this (unset: off)
+#   SIEM_PROFILE_INTERVAL_MS=5    sampling interval
+#   SIEM_PROFILE_DIR=profiles
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounts
+from contextlib import contextmanager
+
+from flask import Response, request
+
+PROFILE_SLOW_MS = os.environ.get('SIEM_PROFILE_SLOW_MS')
+PROFILE_INTERVAL_MS = float(os.environ.get('SIEM_PROFILE_INTERVAL_MS', 5))
+PROFILE_DIR = os.environ.get('SIEM_PROFILE_DIR', 'profiles')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = {}  # sorted label items -> value
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, labels, value) for labels, value in self.values.items()]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            counts = list(counts)
+            counts[next(i for i, bound in enumerate(self.buckets) if value <= bound)] += 1
+            self.values[key] = (counts, total + value)
+
+    def samples(self):
+        with self.lock:
+            items = list(self.values.items())
+        samples = []
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                samples.append((self.name + '_bucket', labels + (('le', _number(bound)),), cumulative))
+            samples.append((self.name + '_count', labels, cumulative))
+            samples.append((self.name + '_sum', labels, total))
+        return samples
+
+
+REGISTRY = []
+COLLECTORS = []  # functions returning [(name, kind, help, [(labels dict, value), ...]), ...]
+
+CALLBACK_SECONDS = Histogram('siem_callback_duration_seconds', 'Server time per callback request', LATENCY_BUCKETS)
+CALLBACK_BYTES = Histogram('siem_callback_response_bytes', 'Callback response size before compression',
+                           BYTES_BUCKETS)
+CALLBACK_REQUESTS = Counter('siem_callback_requests_total', 'Callback requests by HTTP status')
+ROWS_SCANNED = Counter('siem_callback_rows_scanned_total', 'Rows read from time-range slices by callbacks')
+ROWS_RETURNED = Counter('siem_callback_rows_returned_total', 'Table rows returned by callbacks')
+CACHE_LOOKUPS = Counter('siem_cache_lookups_total', 'Result cache lookups by namespace and result')
+DATASET_LOAD_SECONDS = Gauge('siem_dataset_load_seconds', 'Time to load and prepare each dataset')
+SLOW_PROFILES = Counter('siem_slow_request_profiles_total', 'Slow callback profiles written')
+CALLBACK_COALESCED = Counter('siem_callback_coalesced_total', 'Calls that joined an identical computation in flight')
+CALLBACK_SUPERSEDED = Counter('siem_callback_superseded_total',
+                              'Calls dropped because the same session made a newer one')
+CLIPPED_VALUES = Counter('siem_ingest_clipped_values_total', 'Counter values outside their column type, clipped at ingest')
+INVALID_IPS = Counter('siem_ingest_invalid_ips_total', 'Missing or malformed IP addresses ingested (stored as NO_IP)')
+CALLBACK_CANCELLED = Counter('siem_callback_cancelled_total', 'Computations cancelled before they started')
+
+
+def register_collector(collect):
+    COLLECTORS.append(collect)
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines += [f'# HELP {metric.name} {metric.help}', f'# TYPE {metric.name} {metric.kind}']
+        lines += [f'{name}{_labels(labels)} {_number(value)}' for name, labels, value in metric.samples()]
+    for collect in COLLECTORS:
+        for name, kind, help_text, samples in collect():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            lines += [f'{name}{_labels(sorted(labels.items()))} {_number(value)}' for labels, value in samples]
+    return '\n'.join(lines) + '\n'
+
+
+# Per-request row counts of the callback being served on this thread
+_request = threading.local()
+
+
+def record(scanned=0, returned=0):
+    stats = getattr(_request, 'stats', None)
+    if stats is not None:
+        stats['scanned'] += scanned
+        stats['returned'] += returned
+
+
+def current_stats():
+    return getattr(_request, 'stats', None)
+
+
+@contextmanager
+def recording(stats):
+    # Counts the rows of work done on another thread (e.g. the callback pool) into a
+    # request's stats, and samples that thread into the request's profile
+    previous = getattr(_request, 'stats', None)
+    _request.stats = stats
+    stacks = stats.get('stacks') if stats is not None and profiler is not None else None
+    if stacks is not None:
+        profiler.active[threading.get_ident()] = stacks
+    try:
+        yield
+    finally:
+        _request.stats = previous
+        if stacks is not None:
+            profiler.active.pop(threading.get_ident(), None)
+
+
+class SlowRequestProfiler:
+    def __init__(self, threshold_s, interval_s, out_dir):
+        self.threshold = threshold_s
+        self.interval = interval_s
+        self.out_dir = out_dir
+        self.active = {}  # thread id -> StackCounts of the request running (or computing) on it
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def begin(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='slow-request-profiler', daemon=True)
+                self.thread.start()
+        stacks = self.active[threading.get_ident()] = StackCounts()
+        return stacks
+
+    def end(self, name, duration):
+        stacks = self.active.pop(threading.get_ident(), None)
+        if not stacks or duration < self.threshold:
+            return None
+        path = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(duration * 1000)}ms-{name}.folded")
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            with open(path, 'w') as f:
+                f.writelines(f'{stack} {n}\n' for stack, n in stacks.most_common())
+        except OSError:
+            # a profile is never worth failing the request for
+            return None
+        SLOW_PROFILES.inc(callback=name)
+        return path
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for ident, stacks in list(self.active.items()):
+                frame = frames.get(ident)
+                if frame is not None:
+                    stacks[self._fold(frame)] += 1
+
+    @staticmethod
+    def _fold(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+
+profiler = None
+if PROFILE_SLOW_MS:
+    profiler = SlowRequestProfiler(float(PROFILE_SLOW_MS) / 1000, PROFILE_INTERVAL_MS / 1000, PROFILE_DIR)
+
+
+def callback_name(app, body):
+    # Name of the function serving a /_dash-update-component request
+    output = (body or {}).get('output')
+    spec = app.callback_map.get(output) if output else None
+    callback = spec.get('callback') if spec else None
+    return getattr(callback, '__name__', None) or output or 'unknown'
+
+
+def instrument(app):
+    # Register after response compression so payload sizes are measured before it
+    server = app.server
+
+    def is_callback():
+        return request.path.endswith('/_dash-update-component')
+
+    @server.before_request
+    def start_callback():
+        if is_callback():
+            _request.stats = {'start': time.perf_counter(), 'scanned': 0, 'returned': 0}
+            if profiler is not None:
+                _request.stats['stacks'] = profiler.begin()
+
+    @server.after_request
+    def observe_callback(response):
+        stats = getattr(_request, 'stats', None)
+        if stats is None or not is_callback():
+            return response
+        _request.stats = None
+        duration = time.perf_counter() - stats['start']
+        name = callback_name(app, request.get_json(silent=True))
+        CALLBACK_SECONDS.observe(duration, callback=name)
+        CALLBACK_REQUESTS.inc(callback=name, status=response.status_code)
+        if not response.direct_passthrough:
+            CALLBACK_BYTES.observe(len(response.get_data()), callback=name)
+        ROWS_SCANNED.inc(stats['scanned'], callback=name)
+        ROWS_RETURNED.inc(stats['returned'], callback=name)
+        if profiler is not None:
+            profiler.end(name, duration)
+        return response
+
+    @server.teardown_request
+    def clear_callback(exc):
+        _request.stats = None
+        if profiler is not None:
+            profiler.active.pop(threading.get_ident(), None)
+
+    @server.route('/metrics')
+    def metrics():
+        return Response(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,61 @@
+# Memory-mapped dataset store shared by the production workers.
+# serve.py loads and encodes every dataset once and writes each column as a
+# .npy file (categorical/string columns as integer codes plus their categories).
+# Workers attach with np.load(mmap_mode='r'): the column buffers live in the OS
+# page cache, are shared by every worker and are never copied into a worker's heap.
+#
+#   <store>/<dataset>/meta.json   columns, time column and source byte offset
+#   <store>/<dataset>/<n>.npy     one file per column
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR = os.environ.get('SIEM_MMAP_DIR')
+
+
+def export_frame(df, directory, time_col, offset):
+    # Writes a time-sorted, prepared frame into `directory` (replaced atomically)
+    tmp = directory + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        entry = {'name': col, 'file': f'{i}.npy'}
+        if isinstance(series.dtype, pd.CategoricalDtype) or not isinstance(series.dtype, np.dtype) \
+                or series.dtype == object:
+            cat = series.astype('category')
+            entry['categories'] = [str(c) for c in cat.cat.categories]
+            values = cat.cat.codes.to_numpy()
+        else:
+            values = series.to_numpy()
+        np.save(os.path.join(tmp, entry['file']), values, allow_pickle=False)
+        columns.append(entry)
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({'columns': columns, 'time_col': time_col, 'offset': offset, 'rows': len(df)}, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+
+
+def attach_frame(directory):
+    # Returns (frame backed by read-only memory maps, meta)
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    data = {}
+    for entry in meta['columns']:
+        values = np.load(os.path.join(directory, entry['file']), mmap_mode='r')
+        if 'categories' in entry:
+            values = pd.Categorical.from_codes(values, categories=pd.Index(entry['categories'], dtype='str'))
+        data[entry['name']] = values
+    return pd.DataFrame(data, copy=False), meta
+
+
+def dataset_dir(name, store_dir=None):
+    return os.path.join(store_dir or STORE_DIR, name)
+
+
+def available(name):
+    return STORE_DIR is not None and os.path.exists(os.path.join(dataset_dir(name), 'meta.json'))
@@ -0,0 +1,97 @@
+# Adaptive time resolution for the time-series figures.
+# The bucket width of a chart is picked from the visible time range and the
+# plot width, so a figure never carries more buckets than it has pixels to show
+# them, whatever the data span. Zooming (relayoutData) re-buckets the zoomed
+# window at a finer width. Long line series are thinned with LTTB.
+import numpy as np
+import pandas as pd
+
+BUCKET_WIDTHS = ['1min', '5min', '15min', '30min', '1h', '3h', '6h', '12h', '1D', '7D', '30D']
+PLOT_WIDTH_PX = 1200
+MAX_LINE_POINTS = PLOT_WIDTH_PX // 2
+
+
+def pick_freq(start, end, px_per_bucket=4, min_freq=None, width_px=PLOT_WIDTH_PX):
+    # Smallest width in BUCKET_WIDTHS (>= min_freq) giving at most width_px / px_per_bucket buckets
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    max_buckets = max(width_px // px_per_bucket, 1)
+    floor = pd.Timedelta(pd.tseries.frequencies.to_offset(min_freq)) if min_freq else pd.Timedelta(0)
+    for freq in BUCKET_WIDTHS:
+        if pd.Timedelta(freq) >= floor and span / pd.Timedelta(freq) <= max_buckets:
+            return freq
+    return BUCKET_WIDTHS[-1]
+
+
+def freq_label(freq):
+    units = {'min': 'minute', 'h': 'hour', 'D': 'day'}
+    count = freq.rstrip('minhD')
+    unit = units[freq[len(count):]]
+    return unit if count == '1' else f"{count} {unit}s"
+
+
+def zoom_range(relayout_data):
+    # (start, end) of an x-axis zoom, (None, None) when the axis was reset,
+    # None for relayout events that do not change the x range
+    if not relayout_data:
+        return None
+    if relayout_data.get('xaxis.autorange'):
+        return None, None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        bounds = relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    elif 'xaxis.range' in relayout_data:
+        bounds = relayout_data['xaxis.range']
+    else:
+        return None
+    try:
+        start, end = (pd.Timestamp(b) for b in bounds)
+    except (ValueError, TypeError):
+        return None
+    return (start, end) if start < end else None
+
+
+def rebucket(table, freq, start=None, end=None, level='hour'):
+    # Sums a GroupTotals table (time level + other levels) into `freq` buckets within [start, end)
+    times = table.index.get_level_values(level)
+    mask = np.ones(len(table), dtype=bool)
+    if start is not None:
+        mask &= times >= pd.Timestamp(start).floor(freq)
+    if end is not None:
+        mask &= times < pd.Timestamp(end)
+    table = table[mask]
+    keys = [table.index.get_level_values(level).floor(freq).rename(level)]
+    keys += [table.index.get_level_values(name) for name in table.index.names if name != level]
+    return table.groupby(keys, observed=True).sum()
+
+
+def within(series, start=None, end=None):
+    # Entries of a time-indexed series (or frame) within [start, end)
+    mask = np.ones(len(series), dtype=bool)
+    if start is not None:
+        mask &= series.index >= pd.Timestamp(start)
+    if end is not None:
+        mask &= series.index < pd.Timestamp(end)
+    return series[mask]
+
+
+def lttb(x, y, n_out=MAX_LINE_POINTS):
+    # Largest-Triangle-Three-Buckets: indices of the points to keep, at most n_out
+    x = np.asarray(x)
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    xs = x.astype('datetime64[ns]').astype('int64').astype('float64') if np.issubdtype(x.dtype, np.datetime64) \
+        else x.astype('float64')
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        # average of the next bucket is the third vertex
+        cx, cy = xs[hi:nxt_hi].mean(), np.nanmean(y[hi:nxt_hi]) if np.isfinite(y[hi:nxt_hi]).any() else 0.0
+        area = np.abs((xs[a] - cx) * (y[lo:hi] - y[a]) - (xs[a] - xs[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        keep[i + 1] = a
+    return keep
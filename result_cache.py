@@ -0,0 +1,107 @@
+# Memoized callback results with LRU eviction.
+# Entries are keyed on the callback, the dataset version and the normalized
+# arguments (date ranges are normalized so '2025-06-01' and '2025-06-01T00:00:00'
+# share an entry). Memory is bounded by the serialized size of the cached
+# figures/table payloads. When a dataset is reloaded its version changes and
+# every entry built from the old version is dropped.
+import json
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import pandas as pd
+from plotly.io.json import to_json_plotly
+
+import metrics
+
+
+def date_key(value):
+    try:
+        ts = pd.to_datetime(value)
+    except (ValueError, TypeError):
+        return ('invalid', str(value))
+    return None if ts is None or pd.isna(ts) else ts.isoformat()
+
+
+def freeze(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class ResultCache:
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, size)
+        self.versions = {}  # namespace -> dataset version currently cached
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, value, size):
+        namespace, version = key[0], key[1]
+        with self.lock:
+            if self.versions.get(namespace, version) != version:
+                self._drop_namespace(namespace)
+            self.versions[namespace] = version
+            if size > self.max_bytes:
+                return
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, old_size) = self.entries.popitem(last=False)
+                self.bytes -= old_size
+                self.evictions += 1
+
+    def _drop_namespace(self, namespace):
+        for key in [k for k in self.entries if k[0] == namespace]:
+            self.bytes -= self.entries.pop(key)[1]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.versions.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def memoize(self, namespace, version, date_args=(0, 1)):
+        # version: zero-argument callable returning the current dataset version.
+        # date_args: positions of the start/end date arguments.
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args):
+                args_key = tuple(date_key(a) if i in date_args else freeze(a) for i, a in enumerate(args))
+                key = (namespace, version(), args_key)
+                entry = self.get(key)
+                metrics.CACHE_LOOKUPS.inc(namespace=namespace, result='miss' if entry is None else 'hit')
+                if entry is not None:
+                    return entry[0]
+                value = func(*args)
+                self.put(key, value, len(to_json_plotly(value)))
+                return value
+            return wrapper
+        return decorator
@@ -0,0 +1,122 @@
+# Pre-aggregated rollup cubes for the alert charts.
+# Counts are stored per (time bucket, dimensions...) at load time, so a chart
+# for any date range sums cube rows instead of grouping the raw alerts. Buckets
+# only partly covered by the range are counted from the raw rows at the edges,
+# which keeps the answer exact while bounding the raw scan to two buckets.
+# Both cubes and GroupTotals accept newly appended rows through add().
+import numpy as np
+import pandas as pd
+
+from time_index import TimeIndex
+
+
+class RollupCube:
+    def __init__(self, index, dims, freq='h'):
+        # index: TimeIndex over the raw rows, dims: columns to keep counts for
+        self.index = index
+        self.dims = list(dims)
+        self.freq = freq
+        columns = [index.time_col] + self.dims
+        parts = [self._rollup(rows[rows[index.time_col].notna()]) for rows in index.frames(columns)]
+        self.cube_index = TimeIndex(pd.concat(parts, ignore_index=True), 'bucket')
+
+    def _rollup(self, raw):
+        return (
+            raw.groupby([raw[self.index.time_col].dt.floor(self.freq).rename('bucket')] + self.dims,
+                        observed=True, dropna=False)
+            .size()
+            .rename('count')
+            .reset_index()
+        )
+
+    def add(self, rows):
+        # Folds newly appended raw rows into the cube (the raw index is appended by the caller)
+        rows = rows[rows[self.index.time_col].notna()]
+        if len(rows):
+            self.cube_index.append(self._rollup(rows))
+
+    def _raw_counts(self, start, end, inclusive_end):
+        rows = self.index.slice(start, end, inclusive_end, columns=[self.index.time_col] + self.dims)
+        part = rows[self.dims].copy()
+        part.insert(0, 'bucket', rows[self.index.time_col].dt.floor(self.freq))
+        part['count'] = 1
+        return part
+
+    def counts(self, start=None, end=None, by=(), freq=None, inclusive_end=True):
+        # Count of rows with start <= time <= end (or time < end) grouped by `by`.
+        # freq (e.g. 'D') adds a leading 'bucket' level rolled up to that width.
+        start = None if start is None or pd.isna(start) else pd.Timestamp(start)
+        end = None if end is None or pd.isna(end) else pd.Timestamp(end)
+        inner_start = start.ceil(self.freq) if start is not None else None
+        inner_end = end.floor(self.freq) if end is not None else None
+
+        if inner_start is not None and inner_end is not None and inner_start >= inner_end:
+            parts = [self._raw_counts(start, end, inclusive_end)]
+        else:
+            parts = [self.cube_index.slice(inner_start, inner_end, inclusive_end=False)]
+            if start is not None and start < inner_start:
+                parts.append(self._raw_counts(start, inner_start, False))
+            if end is not None:
+                parts.append(self._raw_counts(inner_end, end, inclusive_end))
+        rows = pd.concat(parts, ignore_index=True)
+
+        keys = list(by)
+        if freq is not None:
+            rows['bucket'] = rows['bucket'].dt.floor(freq)
+            keys = ['bucket'] + keys
+        if not keys:
+            return int(rows['count'].sum())
+        return rows.groupby(keys, observed=True)['count'].sum()
+
+
+class GroupTotals:
+    # Running group sizes (or column sums when `columns` is given) that new rows
+    # are folded into, so updates cost the size of the new rows and the group
+    # table rather than a regroup of the whole history.
+    def __init__(self, keys, columns=None, rows=None):
+        self.keys = list(keys)
+        self.columns = columns
+        self.table = None
+        if rows is not None:
+            self.add(rows)
+
+    def add(self, rows):
+        grouped = rows.groupby(self.keys, observed=True)
+        part = grouped.size() if self.columns is None else grouped[self.columns].sum()
+        if self.table is None or not len(self.table):
+            self.table = part
+        elif len(part):
+            total = self.table.add(part, fill_value=0)
+            dtypes = part.dtype if self.columns is None else part.dtypes.to_dict()
+            self.table = total.astype(dtypes)
+
+
+def level_range(table, level, start=None, end=None, inclusive_end=False):
+    # Rows of a GroupTotals table whose `level` is in [start, end) (or [start, end]).
+    # A table sorted on its first level is sliced by position, others are masked.
+    index = table.index
+    if (start is None and end is None) or not len(table):
+        return table
+    if index.names[0] == level and index.is_monotonic_increasing and index.levels[0].is_monotonic_increasing:
+        values, codes = index.levels[0], index.codes[0]
+        if isinstance(values, pd.DatetimeIndex):
+            # same unit as the bounds (searchsorted does not convert units)
+            values = values.as_unit('ns')
+            start = None if start is None else pd.Timestamp(start).as_unit('ns')
+            end = None if end is None else pd.Timestamp(end).as_unit('ns')
+
+        def position(value, side):
+            code = values.searchsorted(value, side=side)
+            # searched in the codes' own dtype, so the codes are not copied to a wider one
+            return len(codes) if code >= len(values) else codes.searchsorted(codes.dtype.type(code))
+
+        lo = 0 if start is None else position(start, 'left')
+        hi = len(codes) if end is None else position(end, 'right' if inclusive_end else 'left')
+        return table.iloc[lo:hi]
+    times = index.get_level_values(level)
+    mask = np.ones(len(table), dtype=bool)
+    if start is not None:
+        mask &= times >= start
+    if end is not None:
+        mask &= times <= end if inclusive_end else times < end
+    return table[mask]
@@ -0,0 +1,365 @@
+# User-defined alert rules evaluated over the five datasets as rows arrive.
+# Rules are read from a JSON file (SIEM_RULES_FILE, default rules.json):
+#
+#   {"name": "web-auth-errors", "source": "web_logs", "severity": "High",
+#    "where": "status_code in (401, 403)",
+#    "group_by": "ip_address", "window": "1min", "min_count": 20}
+#
+# `where` is a Python-like expression over the columns of the source: ==, !=,
+# <, <=, >, >=, in, not in against constants or another column, combined with
+# and / or / not (a boolean column may stand on its own). IP columns compare
+# against dotted strings. Expressions are compiled once into a tree of column
+# predicates. Each predicate is evaluated once per batch as a vectorized mask
+# and shared by every rule of the source using it, as are shared sub-expressions.
+# Rules are checked against the source's columns when they load: unknown
+# columns, operators a column does not support (categories are unordered, so
+# only ==, !=, in, not in) and constants of the wrong type are rejected.
+#
+# Without group_by a rule fires on every matching row. With group_by, window and
+# min_count it fires when a group has min_count matching rows within `window`:
+# matches are sorted by (group, time) and row i fires when row i - min_count + 1
+# is of the same group and less than `window` older, with the last
+# min_count - 1 matches of each group carried over to the next batch. A group
+# fires at most once per `window`-aligned bucket.
+# Rows are expected in time order per source (TimeIndex frames and live appends).
+import ast
+import ipaddress
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from ingest import DATASETS
+from schema import IP_COLUMNS, NO_IP, SCHEMAS, ip_to_int, int_to_ip
+
+RULES_FILE = os.environ.get('SIEM_RULES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json'))
+SEVERITIES = ['Critical', 'High', 'Medium', 'Low']
+RULE_ALERT_COLUMNS = ['time', 'rule', 'severity', 'source', 'group', 'count', 'detail']
+
+COMPARISONS = {ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>=',
+               ast.In: 'in', ast.NotIn: 'not in'}
+FLIPPED = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '==', '!=': '!='}
+# Operators and constant types allowed per kind of column (see source_columns).
+# Categories are unordered, so they only compare for (in)equality.
+KIND_OPERATORS = {
+    'number': ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in'),
+    'ip': ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in'),
+    'text': ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in'),
+    'category': ('==', '!=', 'in', 'not in'),
+    'bool': ('==', '!='),
+}
+KIND_VALUES = {'number': (int, float), 'ip': (int,), 'text': (str,), 'category': (str,), 'bool': (bool,)}
+
+
+def _constant(node, column, rule):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, bool)):
+        value = node.value
+        if column in IP_COLUMNS and isinstance(value, str):
+            # dotted IPs are compared with the packed column
+            try:
+                ipaddress.IPv4Address(value)
+            except ValueError:
+                raise ValueError(f"rule {rule!r}: {value!r} is not an IPv4 address") from None
+            return int(ip_to_int([value])[0])
+        return value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant) \
+            and isinstance(node.operand.value, (int, float)) and not isinstance(node.operand.value, bool):
+        return -node.operand.value
+    if isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+        return tuple(_constant(elt, column, rule) for elt in node.elts)
+    raise ValueError(f"rule {rule!r}: unsupported value {ast.unparse(node)!r}")
+
+
+def compile_expression(text, rule=''):
+    # Predicate tree of nested tuples: ('and', a, b...), ('or', ...), ('not', a),
+    # ('cmp', column, op, value) or ('cols', column, op, other_column)
+    def walk(node):
+        if isinstance(node, ast.BoolOp):
+            return ('and' if isinstance(node.op, ast.And) else 'or',) + tuple(walk(v) for v in node.values)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ('not', walk(node.operand))
+        if isinstance(node, ast.Name):
+            return ('cmp', node.id, '==', True)
+        if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in COMPARISONS:
+            op = COMPARISONS[type(node.ops[0])]
+            left, right = node.left, node.comparators[0]
+            if not isinstance(left, ast.Name) and isinstance(right, ast.Name) and op in FLIPPED:
+                left, right, op = right, left, FLIPPED[op]
+            if isinstance(left, ast.Name):
+                if isinstance(right, ast.Name) and op in FLIPPED:
+                    return ('cols', left.id, op, right.id)
+                value = _constant(right, left.id, rule)
+                if op in ('in', 'not in') and not isinstance(value, tuple):
+                    value = (value,)
+                return ('cmp', left.id, op, value)
+        raise ValueError(f"rule {rule!r}: unsupported expression {ast.unparse(node)!r}")
+
+    try:
+        tree = ast.parse(text, mode='eval').body
+    except SyntaxError as exc:
+        raise ValueError(f"rule {rule!r}: {exc.msg} in {text!r}") from None
+    return walk(tree)
+
+
+def source_columns(source):
+    # column -> kind of its values once loaded (schema.py): 'number', 'ip', 'bool',
+    # 'category' or 'text'. The time column is not part of it.
+    encodings = SCHEMAS[source]
+    kinds = {}
+    for col, dtype in DATASETS[source]['dtype'].items():
+        encoding = encodings.get(col)
+        if isinstance(encoding, tuple):
+            kinds[encoding[1]] = 'bool'
+        elif encoding == 'ipv4':
+            kinds[col] = 'ip'
+        elif encoding == 'category':
+            kinds[col] = 'category'
+        elif encoding == 'uint' or dtype != 'str':
+            kinds[col] = 'number'
+        else:
+            kinds[col] = 'text'
+    return kinds
+
+
+def check_expression(node, kinds, rule=''):
+    # Raises ValueError for unknown columns, and for operators or constants the
+    # column's kind does not support, so a bad rule fails when the rules load
+    kind = node[0]
+    if kind in ('and', 'or', 'not'):
+        for child in node[1:]:
+            check_expression(child, kinds, rule)
+        return
+    col, op = node[1], node[2]
+    columns = [col, node[3]] if kind == 'cols' else [col]
+    for name in columns:
+        if name not in kinds:
+            raise ValueError(f"rule {rule!r}: unknown column {name!r}, one of {sorted(kinds)}")
+    if op not in KIND_OPERATORS[kinds[col]]:
+        raise ValueError(f"rule {rule!r}: {col} is a {kinds[col]} column, {op!r} is not supported on it")
+    if kind == 'cols':
+        if kinds[col] != kinds[node[3]] or kinds[col] not in ('number', 'ip', 'text'):
+            raise ValueError(f"rule {rule!r}: cannot compare {col} ({kinds[col]}) with {node[3]} ({kinds[node[3]]})")
+        return
+    allowed = KIND_VALUES[kinds[col]]
+    for value in node[3] if op in ('in', 'not in') else (node[3],):
+        if not isinstance(value, allowed) or (isinstance(value, bool) and bool not in allowed):
+            raise ValueError(f"rule {rule!r}: {value!r} cannot be compared with {kinds[col]} column {col}")
+
+
+def expression_columns(node):
+    if node[0] == 'cmp':
+        return {node[1]}
+    if node[0] == 'cols':
+        return {node[1], node[3]}
+    return set().union(*(expression_columns(child) for child in node[1:]))
+
+
+class Rule:
+    def __init__(self, name, source, where, severity='Medium', group_by=None, window=None, min_count=1,
+                 description=''):
+        if source not in SCHEMAS:
+            raise ValueError(f"rule {name!r}: unknown source {source!r}, one of {sorted(SCHEMAS)}")
+        if severity not in SEVERITIES:
+            raise ValueError(f"rule {name!r}: severity must be one of {SEVERITIES}")
+        if group_by is not None and window is None:
+            raise ValueError(f"rule {name!r}: group_by needs a window")
+        if int(min_count) < 1:
+            raise ValueError(f"rule {name!r}: min_count must be at least 1")
+        self.name = name
+        self.source = source
+        self.where = where
+        self.severity = severity
+        self.group_by = group_by
+        self.window = None if window is None else pd.Timedelta(window)
+        self.window_text = None if window is None else str(window)  # as written in the rule, e.g. '1h'
+        self.min_count = int(min_count)
+        self.description = description
+        self.predicate = compile_expression(where, name)
+        kinds = source_columns(source)
+        check_expression(self.predicate, kinds, name)
+        if group_by is not None and group_by not in kinds:
+            raise ValueError(f"rule {name!r}: unknown group_by column {group_by!r}, one of {sorted(kinds)}")
+        self.columns = expression_columns(self.predicate) | ({group_by} if group_by else set())
+        self.fired = 0
+        self._tail = None  # last matches per group carried into the next batch (windowed rules)
+        self._last_bucket = {}  # group -> window bucket it last fired in (current bucket only)
+
+
+def load_rules(path=RULES_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        config = json.load(f)
+    rules = [Rule(**spec) for spec in config.get('rules', [])]
+    names = [rule.name for rule in rules]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: duplicate rule names")
+    return rules
+
+
+def _compare(values, op, other):
+    if op == '==':
+        return values == other
+    if op == '!=':
+        return values != other
+    if op == '<':
+        return values < other
+    if op == '<=':
+        return values <= other
+    if op == '>':
+        return values > other
+    if op == '>=':
+        return values >= other
+    if op == 'in':
+        return values.isin(other)
+    return ~values.isin(other)
+
+
+class RuleEngine:
+    def __init__(self, rules, max_alerts=10000):
+        self.rules = defaultdict(list)  # source -> rules
+        for rule in rules:
+            self.rules[rule.source].append(rule)
+        self.max_alerts = max_alerts
+        self.alerts = pd.DataFrame(columns=RULE_ALERT_COLUMNS)
+        self.rows = defaultdict(int)  # source -> rows evaluated
+        self.predicates = defaultdict(int)  # source -> predicate masks computed
+
+    @property
+    def sources(self):
+        return list(self.rules)
+
+    def columns(self, source, time_col):
+        return sorted(set().union(*(rule.columns for rule in self.rules[source])) | {time_col})
+
+    def evaluate(self, rows, source, time_col):
+        # Folds a batch of rows of `source` into every rule of that source, returns the alerts fired
+        rules = self.rules.get(source)
+        if not rules:
+            return 0
+        missing = set(self.columns(source, time_col)) - set(rows.columns)
+        if missing:
+            raise ValueError(f"rules for {source}: unknown columns {sorted(missing)}")
+        rows = rows[rows[time_col].notna()]
+        self.rows[source] += len(rows)
+        if not len(rows):
+            return 0
+        masks = {}  # predicate node -> mask, shared by the rules of this batch
+
+        def mask(node):
+            result = masks.get(node)
+            if result is None:
+                kind = node[0]
+                if kind == 'cmp':
+                    result = _compare(rows[node[1]], node[2], node[3]).to_numpy(dtype=bool, na_value=False)
+                elif kind == 'cols':
+                    result = _compare(rows[node[1]], node[2], rows[node[3]]).to_numpy(dtype=bool, na_value=False)
+                elif kind == 'not':
+                    result = ~mask(node[1])
+                else:
+                    parts = [mask(child) for child in node[1:]]
+                    result = np.logical_and.reduce(parts) if kind == 'and' else np.logical_or.reduce(parts)
+                masks[node] = result
+                self.predicates[source] += 1
+            return result
+
+        times = rows[time_col].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        fired = []
+        for rule in rules:
+            hits = np.flatnonzero(mask(rule.predicate))
+            if rule.group_by is None:
+                alerts = self._row_alerts(rule, rows, times, hits)
+            else:
+                groups = rows[rule.group_by].to_numpy()[hits]
+                if rule.group_by in IP_COLUMNS:
+                    # rows without a valid IP are not one group
+                    valid = groups != NO_IP
+                    groups, hits = groups[valid], hits[valid]
+                alerts = self._window_alerts(rule, groups, times[hits])
+            rule.fired += len(alerts)
+            if len(alerts):
+                fired.append(alerts.tail(self.max_alerts))
+        if fired:
+            alerts = pd.concat([self.alerts] + fired, ignore_index=True) if len(self.alerts) else pd.concat(fired)
+            self.alerts = alerts.tail(self.max_alerts).reset_index(drop=True)
+        return sum(len(alerts) for alerts in fired)
+
+    def _row_alerts(self, rule, rows, times, hits):
+        hits = hits[-self.max_alerts:]  # only the newest are kept
+        matched = rows.iloc[hits]
+        # the values of the columns the rule tests, e.g. "outbound_bytes=51234, protocol=ICMP"
+        parts = []
+        for col in sorted(expression_columns(rule.predicate)):
+            values = matched[col]
+            if col in IP_COLUMNS and pd.api.types.is_unsigned_integer_dtype(values):
+                values = int_to_ip(values.to_numpy())
+            parts.append(col + '=' + pd.Series(np.asarray(values, dtype=str)))
+        detail = parts[0].str.cat(parts[1:], sep=', ') if len(parts) > 1 else parts[0]
+        return pd.DataFrame({
+            'time': times[hits], 'rule': rule.name, 'severity': rule.severity, 'source': rule.source,
+            'group': None, 'count': 1, 'detail': detail.to_numpy(),
+        }, columns=RULE_ALERT_COLUMNS)
+
+    def _window_alerts(self, rule, groups, times):
+        k, window = rule.min_count, rule.window.value
+        if rule._tail is not None:
+            groups = np.concatenate([rule._tail[0], groups])
+            times = np.concatenate([rule._tail[1], times])
+        if not len(times):
+            return pd.DataFrame(columns=RULE_ALERT_COLUMNS)
+        codes = pd.factorize(groups)[0]
+        order = np.lexsort((times, codes))
+        codes, groups, times = codes[order], groups[order], times[order]
+        # row i has k matches of its group within the window when row i - k + 1 is
+        # of the same group and less than `window` older
+        hit = np.zeros(len(times), dtype=bool)
+        if len(times) >= k:
+            first = len(times) - k + 1
+            hit[k - 1:] = (codes[k - 1:] == codes[:first]) & (times[k - 1:] - times[:first] < window)
+        # the newest k - 1 matches per group within the window are carried over
+        recent = times > times.max() - window
+        keep = pd.Series(codes[recent]).groupby(codes[recent]).cumcount(ascending=False).to_numpy() < k - 1
+        rule._tail = groups[recent][keep], times[recent][keep]
+
+        hits = pd.DataFrame({'group': groups[hit], 'time': times[hit], 'bucket': times[hit] // window})
+        hits = hits.drop_duplicates(['group', 'bucket'])
+        hits = hits[hits['group'].map(rule._last_bucket).ne(hits['bucket'])]
+        rule._last_bucket.update(hits.groupby('group')['bucket'].last().to_dict())
+        # rows arrive in time order, so groups last fired before the current bucket
+        # cannot be suppressed again and are dropped
+        current = times.max() // window
+        rule._last_bucket = {group: bucket for group, bucket in rule._last_bucket.items() if bucket >= current}
+        hits = hits.sort_values('time', kind='stable')
+        return pd.DataFrame({
+            'time': hits['time'].to_numpy(), 'rule': rule.name, 'severity': rule.severity, 'source': rule.source,
+            'group': hits['group'].to_numpy(), 'count': k,
+            'detail': f"{k}+ matches of {rule.where} within {rule.window_text}",
+        }, columns=RULE_ALERT_COLUMNS)
+
+    def alerts_frame(self, start=None, end=None):
+        # Alerts fired in [start, end), newest first, with readable times and IPs
+        alerts = self.alerts
+        times = pd.to_datetime(alerts['time'].astype('int64'), unit='ns')
+        mask = np.ones(len(alerts), dtype=bool)
+        if start is not None:
+            mask &= (times >= start).to_numpy()
+        if end is not None:
+            mask &= (times < end).to_numpy()
+        alerts = alerts[mask].assign(time=times[mask])
+        alerts = alerts.iloc[::-1].sort_values('time', ascending=False, kind='stable')
+        groups = alerts['group'].astype(object)
+        ips = alerts['rule'].map({rule.name: rule.group_by in IP_COLUMNS for rules in self.rules.values()
+                                  for rule in rules}).fillna(False).astype(bool)
+        if ips.any():
+            groups[ips] = int_to_ip(groups[ips].astype('uint32').to_numpy()).to_numpy()
+        return alerts.assign(group=groups.astype(str).where(groups.notna(), ''))
+
+    def summary(self):
+        # One row per rule: definition and alerts fired so far
+        return pd.DataFrame([{
+            'rule': rule.name, 'source': rule.source, 'severity': rule.severity, 'where': rule.where,
+            'window': '' if rule.group_by is None else f"{rule.min_count}+ per {rule.group_by} in {rule.window_text}",
+            'fired': rule.fired, 'description': rule.description,
+        } for rules in self.rules.values() for rule in rules])
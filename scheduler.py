@@ -0,0 +1,171 @@
+# Background refresh of the expensive panels.
+# Each panel is rebuilt by a worker thread on its own cadence and published as
+# an immutable Snapshot: the build works on a fresh object while requests keep
+# reading the previous snapshot, and the new one replaces it in a single
+# reference swap. Requests never build a panel themselves, except that the very
+# first read of a panel waits for its first build. A build that is still running
+# when the panel is due again is not queued a second time (counted as an
+# overrun), so a slow panel only delays itself.
+#
+# Panels are activated on first read (tabs keep loading lazily) or all at start
+# with SIEM_PRECOMPUTE=1. A thread pool is used rather than processes because
+# panels are built from the in-memory datasets, which worker processes would
+# have to load again; the heavy pandas/numpy work releases the GIL.
+#
+#   SIEM_PRECOMPUTE=1            build every panel when the scheduler starts
+#   SIEM_PANEL_WORKERS=2         build threads
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+PRECOMPUTE = os.environ.get('SIEM_PRECOMPUTE', '') == '1'
+PANEL_WORKERS = int(os.environ.get('SIEM_PANEL_WORKERS', 2))
+TICK_S = 0.5
+
+_snapshot_ids = count(1)
+
+
+class Snapshot:
+    def __init__(self, value, version, built_at, duration):
+        self.id = next(_snapshot_ids)
+        self.value = value
+        self.version = version
+        self.built_at = built_at  # wall-clock time the build started
+        self.duration = duration
+
+
+class Panel:
+    def __init__(self, name, build, every, version=None):
+        # build() -> value. version() -> anything comparable; when it has not changed
+        # since the last build, a refresh only marks the snapshot as checked.
+        # Without version() every refresh rebuilds.
+        self.name = name
+        self.build = build
+        self.every = every
+        self.version = version
+        self.snapshot = None
+        self.checked_at = None  # last time the snapshot was confirmed current
+        self.active = False
+        self.future = None
+        self.next_run = 0.0
+        self.runs = 0
+        self.overruns = 0
+        self.errors = 0
+        self.last_error = None
+
+    def refresh(self):
+        started = time.time()
+        t0 = time.perf_counter()
+        try:
+            version = None if self.version is None else self.version()
+            if self.snapshot is None or self.version is None or version != self.snapshot.version:
+                value = self.build()
+                self.snapshot = Snapshot(value, version, started, time.perf_counter() - t0)
+            self.checked_at = started
+            self.runs += 1
+        except Exception as exc:
+            self.errors += 1
+            self.last_error = f'{type(exc).__name__}: {exc}'
+            raise
+
+    def staleness(self, now=None):
+        # Seconds since the snapshot was last confirmed current, None before the first build
+        if self.checked_at is None:
+            return None
+        return (now or time.time()) - self.checked_at
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            'built_at': None if snapshot is None else snapshot.built_at,
+            'checked_at': self.checked_at,
+            'staleness_s': self.staleness(),
+            'build_s': None if snapshot is None else snapshot.duration,
+            'every_s': self.every,
+            'running': self.future is not None and not self.future.done(),
+            'runs': self.runs,
+            'overruns': self.overruns,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+
+
+class Scheduler:
+    def __init__(self, workers=PANEL_WORKERS, tick=TICK_S):
+        self.workers = workers
+        self.tick = tick
+        self.panels = {}
+        self.jobs = []  # panels run from the start, whose value is not read
+        self.lock = threading.Lock()
+        self.pool = None
+        self.thread = None
+        self.pid = None
+
+    def register(self, name, build, every, version=None):
+        self.panels[name] = Panel(name, build, every, version)
+
+    def add_job(self, name, func, every):
+        self.register(name, func, every)
+        self.jobs.append(name)
+
+    def start(self):
+        # Idempotent, and restarts in a forked worker (threads do not survive fork)
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='panel')
+            for panel in self.panels.values():
+                panel.future = None
+                panel.active = panel.active or PRECOMPUTE or panel.name in self.jobs
+                panel.next_run = 0.0
+            self.thread = threading.Thread(target=self._run, name='panel-scheduler', daemon=True)
+            self.pid = os.getpid()
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_due()
+            except RuntimeError:
+                return  # the pool is shut down at interpreter exit
+            time.sleep(self.tick)
+
+    def run_due(self, now=None):
+        now = now or time.monotonic()
+        for panel in list(self.panels.values()):
+            if panel.active and now >= panel.next_run:
+                self._submit(panel, now)
+
+    def _submit(self, panel, now=None):
+        with self.lock:
+            if panel.future is not None and not panel.future.done():
+                if now is not None:
+                    panel.overruns += 1
+                    panel.next_run = now + panel.every
+                return panel.future
+            panel.next_run = (now or time.monotonic()) + panel.every
+            panel.future = self.pool.submit(panel.refresh)
+            return panel.future
+
+    def refresh(self, name):
+        # Asks for an early rebuild without waiting for it
+        self.start()
+        self._submit(self.panels[name])
+
+    def read(self, name):
+        # Latest snapshot of a panel. Only the first read waits, for the first build.
+        self.start()
+        panel = self.panels[name]
+        panel.active = True
+        snapshot = panel.snapshot
+        if snapshot is None:
+            self._submit(panel).result()
+            snapshot = panel.snapshot
+        return snapshot
+
+    def stats(self):
+        return {name: panel.stats() for name, panel in self.panels.items()}
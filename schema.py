@@ -0,0 +1,137 @@
+# Compact in-memory schema for the five log tables.
+# Applied to every parsed chunk: IPv4 addresses are packed into uint32, repeated
+# strings become dictionary-encoded categories, counters get the unsigned type of
+# their declared range (the same in every chunk) and Yes/No, Success/Failure
+# flags become booleans.
+# IP columns are decoded back to dotted strings only for what is displayed.
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# Column -> encoding. 'uint16'/'uint32' store a counter in that type, values
+# outside its range are clipped. ('flag', new_name, true_value) turns a
+# two-valued text column into a boolean column named new_name.
+SCHEMAS = {
+    'web_logs': {
+        'ip_address': 'ipv4',
+        'url_accessed': 'category',
+        'http_method': 'category',
+        'status_code': 'uint16',
+        'response_time_ms': 'uint32',
+    },
+    'auth_logs': {
+        'username': 'category',
+        'ip_address': 'ipv4',
+        'login_status': ('flag', 'login_success', 'success'),
+        'user_agent': 'category',
+        'geo_location': 'category',
+    },
+    'malware_alerts': {
+        'threat_type': 'category',
+        'severity': 'category',
+        'affected_file': 'category',
+        'remediation_status': 'category',
+    },
+    'network_traffic': {
+        'inbound_bytes': 'uint32',
+        'outbound_bytes': 'uint32',
+        'protocol': 'category',
+        'suspicious_activity': ('flag', 'suspicious', 'yes'),
+        'source_ip': 'ipv4',
+    },
+    'incident_reports': {
+        'category': 'category',
+        'detected_by': 'category',
+        'response_time_minutes': 'uint32',
+        'resolution_status': 'category',
+    },
+}
+
+IP_COLUMNS = {'ip_address', 'source_ip'}
+# Packed value of a missing or malformed address (0.0.0.0 is never a real
+# source). It is shown empty and left out of IP joins and per-IP groupings.
+NO_IP = 0
+DOTTED_QUAD = r'^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$'
+
+
+def ip_to_int(ips):
+    # Vectorized dotted-quad -> uint32. Missing values, IPv6 addresses and
+    # malformed ones (wrong number of parts, octets over 255) become NO_IP.
+    octets = pd.Series(ips, dtype='str').str.strip().str.extract(DOTTED_QUAD)
+    octets = octets.apply(pd.to_numeric).to_numpy(dtype='float64')
+    valid = (octets <= 255).all(axis=1)  # False where a part is missing (NaN)
+    octets = np.where(valid[:, None], octets, 0).astype(np.uint32)
+    return (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+
+
+def int_to_ip(values):
+    values = np.asarray(values, dtype=np.uint32)
+    octets = [(values >> shift) & 0xFF for shift in (24, 16, 8, 0)]
+    text = pd.Series(octets[0].astype(str)).str.cat([pd.Series(o.astype(str)) for o in octets[1:]], sep='.')
+    return text.where(values != NO_IP, '')
+
+
+UINT_TYPES = ('uint16', 'uint32')
+
+
+def to_uint(series, dtype):
+    # -> (series as dtype, number of values clipped into its range)
+    top = np.iinfo(dtype).max
+    clipped = int(((series < 0) | (series > top)).sum())
+    return series.clip(0, top).astype(dtype), clipped
+
+
+def compact(df, name):
+    schema = SCHEMAS.get(name, {})
+    for col, encoding in schema.items():
+        if col not in df:
+            continue
+        if encoding == 'ipv4':
+            df[col] = ip_to_int(df[col])
+            invalid = int((df[col] == NO_IP).sum())
+            if invalid:
+                metrics.INVALID_IPS.inc(invalid, dataset=name, column=col)
+        elif encoding == 'category':
+            df[col] = df[col].astype('category')
+        elif encoding in UINT_TYPES:
+            df[col], clipped = to_uint(df[col], encoding)
+            if clipped:
+                metrics.CLIPPED_VALUES.inc(clipped, dataset=name, column=col)
+        elif encoding[0] == 'flag':
+            _, new_name, true_value = encoding
+            df[new_name] = df.pop(col).str.lower() == true_value
+    return df
+
+
+def concat_chunks(chunks):
+    # Concatenates compacted chunks, unifying categories so they stay categorical
+    if len(chunks) == 1:
+        return chunks[0]
+    chunks = [c.copy() for c in chunks]
+    for col, dtype in chunks[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            cats = pd.Index([])
+            for c in chunks:
+                cats = cats.union(c[col].cat.categories)
+            for c in chunks:
+                c[col] = c[col].cat.set_categories(cats)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def decode_for_display(df):
+    # Copy of `df` with packed IP columns turned back into dotted strings
+    cols = [c for c in df.columns if c in IP_COLUMNS and pd.api.types.is_unsigned_integer_dtype(df[c])]
+    if not cols:
+        return df
+    df = df.copy()
+    for col in cols:
+        df[col] = int_to_ip(df[col].to_numpy()).to_numpy()
+    return df
+
+
+def memory_report(before, after):
+    # Deep memory usage of a table before and after compaction
+    b = int(before.memory_usage(deep=True).sum())
+    a = int(after.memory_usage(deep=True).sum())
+    return {'rows': len(after), 'before_bytes': b, 'after_bytes': a, 'ratio': b / a if a else 0.0}
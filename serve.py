@@ -0,0 +1,111 @@
+# Production entry point.
+# Loads and encodes every dataset once into a memory-mapped store (see
+# mmap_store.py), then starts N worker processes that attach to it read-only, so
+# worker RSS stays flat as workers are added. Uses gunicorn when it is installed,
+# otherwise a small pre-fork server on top of werkzeug.
+#
+#   python serve.py --workers 4 --port 8050
+#   python serve.py --workers 4 --store /dev/shm/siem   (keep the store in RAM)
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+
+import mmap_store
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+
+def build_store(store_dir):
+    # Runs in a child process so the server process never holds the full frames
+    import capstone_final
+    import live
+
+    for name, loader in capstone_final.DATASET_LOADERS.items():
+        index = loader()
+        source = live.sources[name]
+        mmap_store.export_frame(index.df, mmap_store.dataset_dir(name, store_dir),
+                                index.time_col, source.tailer.offset)
+        print(f"exported {name}: {len(index)} rows", flush=True)
+
+
+def run_gunicorn(host, port, workers):
+    class DashApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', 4)
+
+        def load(self):
+            import capstone_final
+            return capstone_final.server
+
+    DashApplication().run()
+
+
+def run_prefork(host, port, workers):
+    # Every worker accepts on the same listening socket, the kernel spreads connections
+    from werkzeug.serving import make_server
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            import capstone_final
+            server = make_server(host, port, capstone_final.server, threaded=True, fd=sock.fileno())
+            server.serve_forever()
+            os._exit(0)
+        children.append(pid)
+    print(f"serving on http://{host}:{port} with {workers} workers", flush=True)
+
+    def stop(signum, frame):
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in children:
+        os.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the SIEM dashboard with shared memory-mapped datasets')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--store', default='.mmap', help='directory for the memory-mapped dataset store')
+    parser.add_argument('--no-gunicorn', action='store_true', help='use the built-in pre-fork server')
+    args = parser.parse_args()
+
+    store_dir = os.path.abspath(args.store)
+    export = multiprocessing.get_context('spawn').Process(target=build_store, args=(store_dir,))
+    export.start()
+    export.join()
+    if export.exitcode != 0:
+        sys.exit('dataset export failed')
+
+    # Workers import the app after this point and attach to the store instead of parsing
+    os.environ['SIEM_MMAP_DIR'] = store_dir
+    mmap_store.STORE_DIR = store_dir
+    if BaseApplication is not None and not args.no_gunicorn:
+        sys.argv = sys.argv[:1]  # gunicorn parses sys.argv itself
+        run_gunicorn(args.host, args.port, args.workers)
+    else:
+        run_prefork(args.host, args.port, args.workers)
+
+
+if __name__ == '__main__':
+    main()
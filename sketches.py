@@ -0,0 +1,276 @@
+# Mergeable sketches for the dashboard aggregates.
+#
+# QuantileSketches (DDSketch) for latency percentiles.
+# A value x > 0 is counted in log bucket ceil(log_gamma(x)), gamma = (1+a)/(1-a),
+# and any quantile read back from the bucket counts is within relative error `a`
+# of the exact one. Counts are kept per (time bucket, dims..., sketch key) in a
+# GroupTotals table, so merging sketches is summing counts: a percentile for any
+# time range or group merges the per-hour sketches instead of rescanning rows,
+# and new rows are folded in as they are ingested.
+#
+# HyperLogLog (distinct counts), CountMinSketch (frequency estimates) and
+# SpaceSaving (top-k heavy hitters), kept per time bucket by TimeBuckets and
+# merged across buckets on query. Accuracy against memory, per bucket:
+#
+#   HyperLogLog(precision=p)      2**p bytes, std. error 1.04 / sqrt(2**p)
+#                                 (p=12: 4 KiB, ~1.6%)
+#   CountMinSketch(width, depth)  8 * width * depth bytes, overestimates by at most
+#                                 e / width * total weight with prob. 1 - exp(-depth)
+#                                 (1024 x 4: 32 KiB, <= 0.27% of the total, 98%)
+#   SpaceSaving(capacity=k)       k counters, any count is overestimated by at most
+#                                 total weight / k, and every key heavier than
+#                                 total / k is kept
+#
+# tests/test_sketches.py checks these bounds and merging against exact results;
+# `python benchmark.py sketches` prints accuracy and memory at larger scales.
+import numpy as np
+import pandas as pd
+
+from rollups import GroupTotals, level_range
+
+ZERO_KEY = np.iinfo(np.int16).min  # values <= 0
+
+
+class QuantileSketches:
+    def __init__(self, time_col, value_col, dims=(), freq='h', relative_accuracy=0.01, rows=None):
+        self.time_col = time_col
+        self.value_col = value_col
+        self.dims = list(dims)
+        self.freq = freq
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.totals = GroupTotals(['bucket'] + self.dims + ['key'])
+        if rows is not None:
+            self.add(rows)
+
+    def _keys(self, values):
+        values = np.asarray(values, dtype='float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            keys = np.ceil(np.log(values) / np.log(self.gamma))
+        return np.where(values > 0, keys, ZERO_KEY).astype(np.int16)
+
+    def _values(self, keys):
+        keys = np.asarray(keys)
+        return np.where(keys == ZERO_KEY, 0.0, 2 * self.gamma ** keys.astype('float64') / (self.gamma + 1))
+
+    def add(self, rows):
+        rows = rows[rows[self.time_col].notna() & rows[self.value_col].notna()]
+        if not len(rows):
+            return
+        part = rows[self.dims].copy()
+        part.insert(0, 'bucket', rows[self.time_col].dt.floor(self.freq))
+        part['key'] = self._keys(rows[self.value_col])
+        self.totals.add(part)
+
+    def merged(self, start=None, end=None, by=()):
+        # Bucket counts per (by..., key) merged over the buckets overlapping [start, end]
+        start = None if start is None else pd.Timestamp(start).floor(self.freq)
+        end = None if end is None else pd.Timestamp(end)
+        table = level_range(self.totals.table, 'bucket', start, end, inclusive_end=True)
+        return table.groupby(list(by) + ['key'], observed=True).sum()
+
+    def quantiles(self, qs=(0.5, 0.95, 0.99), start=None, end=None, by=()):
+        # DataFrame of quantiles (columns p50, p95, ...) per `by` group, or one row when by=()
+        if self.totals.table is None:
+            return pd.DataFrame(columns=[f'p{q * 100:g}' for q in qs], dtype='float64')
+        by = list(by)
+        counts = self.merged(start, end, by).rename('count').reset_index()
+        if not by:
+            counts['_all'] = 0
+            by = ['_all']
+        counts = counts.sort_values(by + ['key'], kind='stable')
+        cum = counts.groupby(by, observed=True, sort=False)['count'].cumsum()
+        total = counts.groupby(by, observed=True, sort=False)['count'].transform('sum')
+        result = {}
+        for q in qs:
+            # first key whose cumulative count passes the q-rank, as in DDSketch
+            hit = counts[cum > q * (total - 1)]
+            first = hit.groupby(by, observed=True, sort=False)['key'].first()
+            result[f'p{q * 100:g}'] = pd.Series(self._values(first.to_numpy()), index=first.index)
+        result = pd.DataFrame(result)
+        if by == ['_all']:
+            result = result.reset_index(drop=True)
+        return result
+
+
+def hash_values(values):
+    # Stable 64-bit hashes (same in every process) for ints, strings or categoricals
+    values = np.asarray(values.astype(str) if isinstance(values.dtype, pd.CategoricalDtype) else values)
+    return pd.util.hash_array(values)
+
+
+class HyperLogLog:
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    @property
+    def nbytes(self):
+        return self.registers.nbytes
+
+    def add(self, values):
+        hashes = hash_values(values)
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        # rank = 1 + trailing zeros of the remaining bits (capped), via the lowest set bit
+        rest = (hashes & ((np.uint64(1) << (np.uint64(64) - p)) - np.uint64(1))) | (np.uint64(1) << (np.uint64(64) - p))
+        rank = np.log2((rest & (~rest + np.uint64(1))).astype('float64')).astype(np.uint8) + 1
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        merged = HyperLogLog(self.precision)
+        merged.registers = np.maximum(self.registers, other.registers)
+        return merged
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+
+class CountMinSketch:
+    def __init__(self, width=1024, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def _columns(self, values):
+        # depth independent-enough hashes from one 64-bit hash (Kirsch-Mitzenmacher)
+        hashes = hash_values(values)
+        h1, h2 = hashes & np.uint64(0xFFFFFFFF), hashes >> np.uint64(32)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, values, weights=None):
+        weights = np.ones(len(values), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+        columns = self._columns(values)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], weights)
+
+    def merge(self, other):
+        merged = CountMinSketch(self.width, self.depth)
+        merged.table = self.table + other.table
+        return merged
+
+    def estimate(self, values):
+        columns = self._columns(values)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+
+class SpaceSaving:
+    # Top-k summary: counts are upper bounds, count - error lower bounds.
+    # `floor` bounds the count of any key not in the summary.
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+        self.floor = 0
+
+    @property
+    def nbytes(self):
+        return int(self.counts.memory_usage(deep=True) + self.errors.memory_usage(deep=True))
+
+    def add(self, values, weights=None):
+        weights = pd.Series(1 if weights is None else np.asarray(weights, dtype=np.int64), index=range(len(values)))
+        keys = np.asarray(values.astype(str) if isinstance(values.dtype, pd.CategoricalDtype) else values)
+        batch = SpaceSaving(self.capacity)
+        batch.counts = weights.groupby(keys).sum().astype('int64')
+        batch.errors = pd.Series(0, index=batch.counts.index, dtype='int64')
+        merged = self.merge(batch, truncate=False) if len(self.counts) else batch
+        self.counts, self.errors, self.floor = merged._truncate()
+
+    def merge(self, other, truncate=True):
+        # Keys missing from one side may have up to that side's floor there
+        keys = self.counts.index.union(other.counts.index)
+        merged = SpaceSaving(self.capacity)
+        merged.counts = (self.counts.reindex(keys, fill_value=self.floor)
+                         + other.counts.reindex(keys, fill_value=other.floor))
+        merged.errors = (self.errors.reindex(keys, fill_value=self.floor)
+                         + other.errors.reindex(keys, fill_value=other.floor))
+        merged.floor = self.floor + other.floor
+        if truncate:
+            merged.counts, merged.errors, merged.floor = merged._truncate()
+        return merged
+
+    def _truncate(self):
+        if len(self.counts) <= self.capacity:
+            return self.counts, self.errors, self.floor
+        ordered = self.counts.sort_values(ascending=False, kind='stable')
+        kept = ordered.index[:self.capacity]
+        return ordered.iloc[:self.capacity], self.errors[kept], max(self.floor, int(ordered.iloc[self.capacity]))
+
+    def top(self, n=10):
+        # DataFrame of the n heaviest keys: count (upper bound) and guaranteed (lower bound)
+        counts = self.counts.sort_values(ascending=False, kind='stable').head(n)
+        return pd.DataFrame({'count': counts, 'guaranteed': counts - self.errors[counts.index]})
+
+
+class HeavyHitters:
+    # SpaceSaving for the candidate keys, CountMinSketch to tighten their counts
+    def __init__(self, capacity=100, width=1024, depth=4):
+        self.summary = SpaceSaving(capacity)
+        self.frequencies = CountMinSketch(width, depth)
+
+    @property
+    def nbytes(self):
+        return self.summary.nbytes + self.frequencies.nbytes
+
+    def add(self, values, weights=None):
+        self.summary.add(values, weights)
+        self.frequencies.add(values, weights)
+
+    def merge(self, other):
+        merged = HeavyHitters.__new__(HeavyHitters)
+        merged.summary = self.summary.merge(other.summary)
+        merged.frequencies = self.frequencies.merge(other.frequencies)
+        return merged
+
+    def top(self, n=10):
+        top = self.summary.top(len(self.summary.counts))
+        top['count'] = np.minimum(top['count'].to_numpy(), self.frequencies.estimate(top.index.to_numpy()))
+        return top.sort_values('count', ascending=False, kind='stable').head(n)
+
+
+class TimeBuckets:
+    # One sketch per time bucket; queries merge the buckets overlapping [start, end]
+    def __init__(self, time_col, make, update, freq='h', rows=None):
+        # make() -> empty sketch, update(sketch, rows) folds rows of one bucket into it
+        self.time_col = time_col
+        self.make = make
+        self.update = update
+        self.freq = freq
+        self.buckets = {}
+        if rows is not None:
+            self.add(rows)
+
+    @property
+    def nbytes(self):
+        return sum(sketch.nbytes for sketch in self.buckets.values())
+
+    def add(self, rows):
+        rows = rows[rows[self.time_col].notna()]
+        for bucket, part in rows.groupby(rows[self.time_col].dt.floor(self.freq), sort=False):
+            sketch = self.buckets.get(bucket)
+            if sketch is None:
+                sketch = self.buckets[bucket] = self.make()
+            self.update(sketch, part)
+
+    def merged(self, start=None, end=None):
+        start = None if start is None else pd.Timestamp(start).floor(self.freq)
+        end = None if end is None else pd.Timestamp(end)
+        result = self.make()
+        for bucket, sketch in self.buckets.items():
+            if (start is None or bucket >= start) and (end is None or bucket <= end):
+                result = result.merge(sketch)
+        return result
+
+    def series(self, func):
+        # func(sketch) per bucket as a time-sorted Series
+        return pd.Series({bucket: func(sketch) for bucket, sketch in self.buckets.items()}).sort_index()
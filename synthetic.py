@@ -0,0 +1,235 @@
+# Synthetic SIEM datasets at production scale.
+# Writes the five sample CSVs (same file names, columns and value formats) at
+# any row count and time span; point SIEM_DATA_DIR at the output directory to
+# run the dashboard on them. Values keep the categories of the samples (the
+# colour maps and the gazetteer know them) with production-like skew instead of
+# the samples' uniform draws:
+#   - one client IP population shared by all sources, Zipf-distributed, plus a
+#     small set of attacker IPs behind most failed logins, 403/404s and
+#     suspicious outbound traffic (so correlation has something to find)
+#   - Zipf-distributed usernames and URLs, with a long tail of product pages
+#   - a diurnal load curve, log-normal latencies and byte counts
+# Files are written in time order, one chunk (time window) at a time, so memory
+# stays bounded and the output can also be replayed through live mode.
+#
+#   python synthetic.py --rows 10000000 --days 30 --out bench-data/10M
+#
+# --rows is the web log row count, the other sources scale by ROW_RATIOS.
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import ingest
+from gazetteer import load_gazetteer
+from schema import int_to_ip
+
+ROW_RATIOS = {
+    'web_logs': 1.0,
+    'network_traffic': 0.5,
+    'auth_logs': 0.2,
+    'malware_alerts': 0.01,
+    'incident_reports': 0.002,
+}
+MIN_ROWS = 100
+CHUNK_ROWS = 1_000_000
+
+URLS = ['/home', '/products', '/api/products', '/login', '/cart', '/checkout', '/api/order', '/assets/logo.png',
+        '/contact', '/faq', '/admin']
+SAMPLE_USERS = ['admin', 'jdoe', 'asmith', 'bjones', 'cgreen', 'ewhite', 'mwilliams', 'lthomas', 'kblack', 'rjohnson']
+USER_AGENTS = ['Mozilla/5.0 (Windows NT 10.0; Win64; x64)', 'Chrome/91.0.4472.124 (Macintosh)',
+               'Safari/604.1 (iPhone)', 'Mozilla/5.0 (Linux; Android)', 'Edge/18.18362']
+AFFECTED_FILES = ['C:/Users/Public/Documents/suspicious_file.docx', 'C:/Users/Admin/AppData/Local/Temp/malicious.dll',
+                  'C:/ProgramData/app/tmp.exe', 'C:/ecommerce_server/scripts/payment_module.js',
+                  'C:/ecommerce_server/data/backup.db', 'C:/Windows/system32/drivers/etc/hosts']
+
+
+def weighted(rng, values, weights, size):
+    weights = np.asarray(weights, dtype='float64')
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size, p=weights / weights.sum())]
+
+
+def zipf_index(rng, n, size, a=1.2):
+    # Ranks 0..n-1, rank k drawn with probability ~ 1 / (k + 1) ** a
+    return (rng.zipf(a, size) - 1) % n
+
+
+def diurnal_times(rng, start, end, size):
+    # Sorted timestamps in [start, end), busier in the afternoon than at night
+    start, end = pd.Timestamp(start).value, pd.Timestamp(end).value
+    picked = []
+    while sum(len(p) for p in picked) < size:
+        candidates = rng.integers(start, end, 2 * size)
+        hour = (candidates // 3_600_000_000_000) % 24
+        keep = rng.random(len(candidates)) < 0.55 - 0.45 * np.cos(2 * np.pi * (hour - 2) / 24)
+        picked.append(candidates[keep])
+    return np.sort(np.concatenate(picked)[:size]).astype('datetime64[ns]')
+
+
+class Population:
+    # Entities shared by every source, sized from the web log row count
+    def __init__(self, rng, rows):
+        self.clients = int_to_ip(rng.integers(1 << 24, 2**32, max(1000, rows // 50), dtype=np.uint32)).to_numpy()
+        self.attackers = int_to_ip(rng.integers(1 << 24, 2**32, 20 + rows // 200000, dtype=np.uint32)).to_numpy()
+        extra_users = max(0, int(rows * ROW_RATIOS['auth_logs']) // 200 - len(SAMPLE_USERS))
+        self.users = np.array(SAMPLE_USERS + [f'user{i:06d}' for i in range(extra_users)], dtype=object)
+        self.products = max(100, rows // 10000)
+        self.locations = load_gazetteer().index.to_numpy(dtype=object)
+        self.counters = {}
+
+    def client_ips(self, rng, size):
+        return self.clients[zipf_index(rng, len(self.clients), size, a=1.1)]
+
+    def next_ids(self, name, size):
+        first = self.counters.get(name, 0) + 1
+        self.counters[name] = first + size - 1
+        return np.arange(first, first + size)
+
+
+def web_logs(rng, pop, times):
+    n = len(times)
+    attack = rng.random(n) < 0.03
+    urls = np.asarray(URLS, dtype=object)[zipf_index(rng, len(URLS), n, a=1.5)]
+    tail = rng.random(n) < 0.2
+    urls[tail] = ['/products/' + str(k) for k in zipf_index(rng, pop.products, int(tail.sum()))]
+    urls[attack] = weighted(rng, ['/login', '/admin'], [3, 1], int(attack.sum()))
+    status = weighted(rng, [200, 302, 404, 403, 500], [80, 6, 8, 3, 3], n).astype(np.int64)
+    status[attack] = weighted(rng, [403, 404, 200], [6, 3, 1], int(attack.sum()))
+    latency = rng.lognormal(np.log(160), 0.5, n) * np.where(status == 500, 3.0, 1.0)
+    ips = pop.client_ips(rng, n)
+    ips[attack] = pop.attackers[rng.integers(0, len(pop.attackers), int(attack.sum()))]
+    return pd.DataFrame({
+        'timestamp': np.datetime_as_string(times, unit='us'),
+        'ip_address': ips,
+        'url_accessed': urls,
+        'http_method': weighted(rng, ['GET', 'POST', 'PUT', 'DELETE'], [70, 20, 6, 4], n),
+        'status_code': status,
+        'response_time_ms': np.clip(latency, 5, 30000).astype(np.int64),
+    })
+
+
+def auth_logs(rng, pop, times):
+    n = len(times)
+    attack = rng.random(n) < 0.15
+    users = pop.users[zipf_index(rng, len(pop.users), n, a=1.3)]
+    users[attack] = weighted(rng, ['admin', 'root', 'jdoe', 'test'], [5, 2, 2, 1], int(attack.sum()))
+    ips = pop.client_ips(rng, n)
+    ips[attack] = pop.attackers[rng.integers(0, len(pop.attackers), int(attack.sum()))]
+    failed = np.where(attack, rng.random(n) < 0.9, rng.random(n) < 0.08)
+    locations = pop.locations[zipf_index(rng, len(pop.locations), n, a=1.1)]
+    locations[attack] = pop.locations[rng.integers(0, 3, int(attack.sum()))]
+    return pd.DataFrame({
+        'login_timestamp': np.datetime_as_string(times, unit='s'),
+        'username': users,
+        'ip_address': ips,
+        'login_status': np.where(failed, 'Failure', 'Success'),
+        'user_agent': weighted(rng, USER_AGENTS, [30, 25, 25, 15, 5], n),
+        'geo_location': locations,
+    })
+
+
+def malware_alerts(rng, pop, times):
+    n = len(times)
+    files = np.asarray(AFFECTED_FILES, dtype=object)[zipf_index(rng, len(AFFECTED_FILES), n, a=1.1)]
+    tail = rng.random(n) < 0.2
+    files[tail] = [f'C:/Users/{user}/Downloads/file_{k}.exe'
+                   for user, k in zip(pop.users[rng.integers(0, len(pop.users), int(tail.sum()))],
+                                      rng.integers(0, 1000, int(tail.sum())))]
+    return pd.DataFrame({
+        'alert_id': [f'ALERT-{i:04d}' for i in pop.next_ids('alert', n)],
+        'detection_time': np.datetime_as_string(times, unit='s'),
+        'threat_type': weighted(rng, ['Adware', 'Malware', 'Trojan', 'Spyware', 'Worm', 'Rootkit', 'Ransomware'],
+                                [30, 20, 15, 12, 10, 8, 5], n),
+        'severity': weighted(rng, ['Low', 'Medium', 'High', 'Critical'], [30, 39, 21, 10], n),
+        'affected_file': files,
+        'remediation_status': weighted(rng, ['Resolved', 'Pending', 'Escalated'], [60, 30, 10], n),
+    })
+
+
+def network_traffic(rng, pop, times):
+    n = len(times)
+    suspicious = rng.random(n) < 0.03
+    inbound = rng.lognormal(np.log(15000), 1.0, n)
+    outbound = rng.lognormal(np.log(12000), 1.0, n) * np.where(suspicious, 10.0, 1.0)
+    ips = pop.client_ips(rng, n)
+    ips[suspicious] = pop.attackers[rng.integers(0, len(pop.attackers), int(suspicious.sum()))]
+    return pd.DataFrame({
+        'sample_time': np.datetime_as_string(times, unit='s'),
+        'inbound_bytes': np.clip(inbound, 500, 50_000_000).astype(np.int64),
+        'outbound_bytes': np.clip(outbound, 500, 50_000_000).astype(np.int64),
+        'protocol': weighted(rng, ['TCP', 'HTTPS', 'UDP', 'HTTP', 'ICMP'], [35, 35, 15, 10, 5], n),
+        'suspicious_activity': np.where(suspicious, 'Yes', 'No'),
+        'source_ip': ips,
+    })
+
+
+def incident_reports(rng, pop, times):
+    n = len(times)
+    return pd.DataFrame({
+        'incident_id': [f'INC-{i:05d}' for i in pop.next_ids('incident', n)],
+        'report_time': np.datetime_as_string(times, unit='s'),
+        'category': weighted(rng, ['Phishing', 'Malware Infection', 'Unauthorized Access', 'Policy Violation',
+                                   'DDoS Attempt', 'Data Leak'], [30, 20, 18, 15, 10, 7], n),
+        'detected_by': weighted(rng, ['IDS', 'Antivirus', 'System Logs', 'Human'], [35, 30, 25, 10], n),
+        'response_time_minutes': np.clip(rng.lognormal(np.log(60), 0.9, n), 1, 10000).astype(np.int64),
+        'resolution_status': weighted(rng, ['Resolved', 'In Progress', 'Not Started'], [60, 30, 10], n),
+    })
+
+
+GENERATORS = {
+    'web_logs': web_logs,
+    'auth_logs': auth_logs,
+    'malware_alerts': malware_alerts,
+    'network_traffic': network_traffic,
+    'incident_reports': incident_reports,
+}
+
+
+def dataset_rows(rows):
+    return {name: max(MIN_ROWS, int(rows * ratio)) for name, ratio in ROW_RATIOS.items()}
+
+
+def write_datasets(out_dir, rows, days=30, start='2025-06-01', seed=0, chunk_rows=CHUNK_ROWS):
+    # Writes the five CSVs into out_dir and a synthetic.json manifest; returns the manifest
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    pop = Population(rng, rows)
+    start = pd.Timestamp(start)
+    span = pd.Timedelta(days=days)
+    manifest = {'rows': rows, 'days': days, 'start': str(start), 'seed': seed, 'datasets': {}}
+    for name, n in dataset_rows(rows).items():
+        t0 = time.perf_counter()
+        chunks = max(1, math.ceil(n / chunk_rows))
+        path = os.path.join(out_dir, os.path.basename(ingest.DATASETS[name]['path']))
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            for i in range(chunks):
+                size = n // chunks + (i < n % chunks)
+                window = (start + span * i / chunks, start + span * (i + 1) / chunks)
+                chunk = GENERATORS[name](rng, pop, diurnal_times(rng, *window, size))
+                chunk.to_csv(f, header=i == 0, index=False)
+        manifest['datasets'][name] = {'file': os.path.basename(path), 'rows': n,
+                                      'bytes': os.path.getsize(path), 'seconds': time.perf_counter() - t0}
+    with open(os.path.join(out_dir, 'synthetic.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic SIEM datasets')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='web log rows, other sources scale from it')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--start', default='2025-06-01')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help='output directory')
+    args = parser.parse_args()
+    manifest = write_datasets(args.out, args.rows, args.days, args.start, args.seed)
+    for name, info in manifest['datasets'].items():
+        print(f"{name:>17}: {info['rows']:>10} rows  {info['bytes'] / 2**20:8.1f} MiB  {info['seconds']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# Server-side paging, sorting and filtering for the records DataTables.
+# The tables use page_action/sort_action/filter_action='custom', so the browser
+# only sends the current page, sort and filter query and only receives one page
+# of rows back. Payload size is bounded by page_size, not by the result size.
+import math
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from schema import IP_COLUMNS, decode_for_display, int_to_ip
+
+# DataTable filter operators, longest symbols first so '>=' is not read as '>'
+OPERATORS = [
+    ['ge ', '>='],
+    ['le ', '<='],
+    ['lt ', '<'],
+    ['gt ', '>'],
+    ['ne ', '!='],
+    ['eq ', '='],
+    ['contains '],
+    ['datestartswith '],
+]
+
+
+def split_filter_part(filter_part):
+    # '{col} op value' -> (col, op, value)
+    for operator_type in OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+                value_part = value_part.strip()
+                if not value_part:
+                    return None, None, None
+                v0 = value_part[0]
+                if v0 == value_part[-1] and v0 in ("'", '"', '`') and len(value_part) > 1:
+                    value = value_part[1:-1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+                return name, operator_type[0].strip(), value
+    return None, None, None
+
+
+def _is_ip(series):
+    return series.name in IP_COLUMNS and pd.api.types.is_unsigned_integer_dtype(series)
+
+
+def _as_text(series):
+    # Text shown in the table, timestamps are serialized as ISO strings
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime('%Y-%m-%dT%H:%M:%S')
+    if _is_ip(series):
+        return pd.Series(int_to_ip(series.to_numpy()).to_numpy(), index=series.index)
+    return series.astype(str)
+
+
+def _coerce_value(series, value):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.to_datetime(str(value), errors='coerce')
+    if pd.api.types.is_bool_dtype(series):
+        return str(value).lower() in ('true', 'yes', '1', '1.0')
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _compare(series, op, value):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Unordered categoricals only support equality, so the categories are
+        # compared as text once and the result is looked up by code
+        categories = pd.Series(series.cat.categories.astype(str))
+        matches = np.append(_compare(categories, op, value).to_numpy(dtype=bool), False)
+        return pd.Series(matches[series.cat.codes.to_numpy()], index=series.index)
+    if op == 'eq':
+        return series == value
+    if op == 'ne':
+        return series != value
+    if op == 'lt':
+        return series < value
+    if op == 'le':
+        return series <= value
+    if op == 'gt':
+        return series > value
+    return series >= value
+
+
+def filter_mask(df, filter_query):
+    # Boolean mask for a DataTable filter_query such as "{severity} = High && {protocol} contains TCP"
+    mask = pd.Series(True, index=df.index)
+    if not filter_query:
+        return mask
+    for part in filter_query.split(' && '):
+        col, op, value = split_filter_part(part)
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if op in ('contains', 'datestartswith'):
+            text = _as_text(series)
+            value = _coerce_value(text, value)
+            cond = text.str.contains(value, regex=False) if op == 'contains' else text.str.startswith(value)
+        else:
+            if _is_ip(series):
+                # Packed IPs compare as their dotted text
+                series = _as_text(series)
+            value = _coerce_value(series, value)
+            if value is None or (value is pd.NaT):
+                cond = pd.Series(op == 'ne', index=df.index)
+            else:
+                cond = _compare(series, op, value)
+        mask &= cond.fillna(False).astype(bool)
+    return mask
+
+
+def sort_rows(df, sort_by, limit=None):
+    # With a single numeric/datetime sort key only the first `limit` rows are
+    # selected (partial sort), otherwise the whole result is sorted.
+    if not sort_by:
+        return df
+    cols = [s['column_id'] for s in sort_by if s['column_id'] in df.columns]
+    ascending = [s['direction'] == 'asc' for s in sort_by if s['column_id'] in df.columns]
+    if not cols:
+        return df
+    col = df[cols[0]]
+    if (limit is not None and len(cols) == 1 and limit < len(df)
+            and (pd.api.types.is_numeric_dtype(col) or pd.api.types.is_datetime64_any_dtype(col))
+            and not pd.api.types.is_bool_dtype(col) and not col.hasnans):
+        if ascending[0]:
+            return df.nsmallest(limit, cols[0], keep='first')
+        return df.nlargest(limit, cols[0], keep='first')
+    return df.sort_values(cols, ascending=ascending, kind='stable')
+
+
+def query_table(df, page_current, page_size, sort_by=None, filter_query=''):
+    # Returns (records for the requested page, page_count)
+    page_size = page_size or 10
+    if filter_query:
+        df = df[filter_mask(df, filter_query)]
+    page_count = max(1, math.ceil(len(df) / page_size))
+    page_current = min(max(page_current or 0, 0), page_count - 1)
+    start = page_current * page_size
+    df = sort_rows(df, sort_by, limit=start + page_size)
+    records = decode_for_display(df.iloc[start:start + page_size]).to_dict('records')
+    metrics.record(returned=len(records))
+    return records, page_count
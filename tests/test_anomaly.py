@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomaly import EwmaBaseline, TrafficScorer
+
+
+def reference_scores(x, keys, alpha=0.1, min_periods=5, min_std=0.01):
+    # One sample at a time: z-score against the key's EWMA so far, then update it
+    state = {}
+    z = np.full(x.shape, np.nan)
+    for i, (row, key) in enumerate(zip(x, keys)):
+        n, mean, mean_sq = state.get(key, (0, None, None))
+        if n >= min_periods:
+            bias = 1 - (1 - alpha) ** max(n - 1, 1)
+            for j, value in enumerate(row):
+                std = math.sqrt(max(mean_sq[j] - mean[j] ** 2, 0) / bias)
+                std = max(std, min_std * abs(mean[j]) + 1e-9)
+                z[i, j] = (value - mean[j]) / std
+        if n == 0:
+            mean, mean_sq = list(row), [value ** 2 for value in row]
+        else:
+            mean = [(1 - alpha) * m + alpha * value for m, value in zip(mean, row)]
+            mean_sq = [(1 - alpha) * m + alpha * value ** 2 for m, value in zip(mean_sq, row)]
+        state[key] = (n + 1, mean, mean_sq)
+    return z
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(7)
+    n = 5000
+    values = pd.DataFrame({'a': rng.lognormal(8, 1, n), 'b': rng.normal(0, 2, n)})
+    keys = rng.integers(0, 40, n)
+    return values, keys
+
+
+def test_bulk_scores_match_reference_loop(samples):
+    values, keys = samples
+    z = EwmaBaseline('key', ['a', 'b']).score(values, keys).to_numpy()
+    expected = reference_scores(values.to_numpy(), keys)
+    np.testing.assert_array_equal(np.isnan(z), np.isnan(expected))
+    np.testing.assert_allclose(z, expected, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('batch', [7, 333, 2000])
+def test_incremental_scores_match_bulk(samples, batch):
+    values, keys = samples
+    bulk = EwmaBaseline('key', ['a', 'b']).score(values, keys).to_numpy()
+    baseline = EwmaBaseline('key', ['a', 'b'])
+    parts = [baseline.score(values.iloc[start:start + batch].reset_index(drop=True), keys[start:start + batch])
+             for start in range(0, len(values), batch)]
+    incremental = pd.concat(parts, ignore_index=True).to_numpy()
+    np.testing.assert_array_equal(np.isnan(incremental), np.isnan(bulk))
+    np.testing.assert_allclose(incremental, bulk, rtol=1e-9, atol=1e-9)
+    assert baseline.state['n'].sum() == len(values)
+
+
+def test_traffic_scorer_bulk_incremental_and_reference():
+    rng = np.random.default_rng(8)
+    n = 3000
+    start = pd.Timestamp('2025-06-01').value
+    traffic = pd.DataFrame({
+        'sample_time': pd.to_datetime(np.sort(rng.integers(start, start + 86400 * 10**9, n)), unit='ns'),
+        'source_ip': rng.integers(1, 31, n).astype(np.uint32),
+        'protocol': pd.Categorical.from_codes(rng.integers(0, 3, n), ['TCP', 'UDP', 'ICMP']),
+        'inbound_bytes': rng.integers(0, 60000, n),
+        'outbound_bytes': rng.integers(0, 60000, n),
+    })
+    bulk = TrafficScorer()
+    bulk.add(traffic)
+    incremental = TrafficScorer(chunk_rows=250)
+    for part in range(0, n, 400):
+        incremental.add(traffic.iloc[part:part + 400])
+    pd.testing.assert_frame_equal(incremental.index.df.reset_index(drop=True), bulk.index.df.reset_index(drop=True),
+                                  rtol=1e-6)
+
+    outbound = traffic['outbound_bytes'].to_numpy(dtype='float64')
+    x = np.column_stack([outbound, np.log1p(outbound) - np.log1p(traffic['inbound_bytes'].to_numpy(dtype='float64'))])
+    expected = np.fmax.reduce([reference_scores(x, traffic[key].to_numpy()) for key in ('source_ip', 'protocol')],
+                              axis=(0, 2))
+    scores = bulk.index.df['score'].to_numpy()
+    np.testing.assert_array_equal(np.isnan(scores), np.isnan(expected))
+    np.testing.assert_allclose(scores, expected, rtol=1e-6)
+
+
+def test_traffic_scorer_keeps_only_anomalies():
+    rng = np.random.default_rng(9)
+    n = 3000
+    start = pd.Timestamp('2025-06-01').value
+    traffic = pd.DataFrame({
+        'sample_time': pd.to_datetime(np.sort(rng.integers(start, start + 86400 * 10**9, n)), unit='ns'),
+        'source_ip': rng.integers(1, 31, n).astype(np.uint32),
+        'protocol': pd.Categorical.from_codes(rng.integers(0, 3, n), ['TCP', 'UDP', 'ICMP']),
+        'inbound_bytes': rng.integers(0, 60000, n),
+        'outbound_bytes': rng.lognormal(8, 1.5, n).astype(np.int64),
+    })
+    full, kept = TrafficScorer(), TrafficScorer(chunk_rows=500, keep_score=3.0)
+    full.add(traffic)
+    for part in range(0, n, 700):
+        kept.add(traffic.iloc[part:part + 700])
+    assert 0 < len(kept.index) < n
+    pd.testing.assert_frame_equal(kept.top(n=50).reset_index(drop=True), full.top(n=50).reset_index(drop=True))
@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+
+import event_store
+import ingest
+
+pytest.importorskip('pyarrow')
+
+HEADER = 'incident_id,category,detected_by,response_time_minutes,resolution_status,report_time\n'
+
+
+def line(i):
+    return f'INC{i},Phishing,SIEM,{i},Open,2025-06-01T{i // 60:02d}:{i % 60:02d}:00\n'
+
+
+def write(path, ids, mode='w'):
+    with open(path, mode) as f:
+        if mode == 'w':
+            f.write(HEADER)
+        f.writelines(line(i) for i in ids)
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    path = tmp_path / 'incidents.csv'
+    monkeypatch.setitem(ingest.DATASETS['incident_reports'], 'path', str(path))
+    monkeypatch.setattr(event_store, 'STORE_DIR', str(tmp_path / 'store'))
+    return path
+
+
+def open_store():
+    return event_store.open_index('incident_reports', 'report_time', lambda rows: rows)
+
+
+def poll(index, tailer):
+    rows = tailer.read_new()
+    if rows is not None:
+        index.append(rows)
+
+
+def stored_ids(index):
+    return sorted(int(i[3:]) for i in index.slice()['incident_id'])
+
+
+def test_appended_rows_are_imported_once(source):
+    write(source, range(3))
+    index, tailer = open_store()
+    write(source, range(3, 5), 'a')
+    poll(index, tailer)
+    poll(index, tailer)
+    assert stored_ids(index) == list(range(5))
+    # a restart only reads what was appended since
+    write(source, [5], 'a')
+    index, tailer = open_store()
+    assert stored_ids(index) == list(range(6))
+
+
+def test_rewritten_source_with_the_same_rows_is_not_imported_again(source):
+    write(source, range(3))
+    index, tailer = open_store()
+    write(source, range(4))
+    poll(index, tailer)
+    assert stored_ids(index) == list(range(4))
+
+
+@pytest.mark.parametrize('new_rows', [range(10, 12), range(10, 20)])
+def test_rotated_source_is_read_from_its_header(source, new_rows):
+    # shorter and longer than the rows already read
+    write(source, range(5))
+    index, tailer = open_store()
+    write(source, new_rows)
+    poll(index, tailer)
+    assert stored_ids(index) == list(range(5)) + list(new_rows)
+    index, tailer = open_store()
+    assert stored_ids(index) == list(range(5)) + list(new_rows)
+
+
+def test_source_truncated_in_place_keeps_the_rows_read(source):
+    write(source, range(5))
+    index, tailer = open_store()
+    write(source, range(2))
+    poll(index, tailer)
+    write(source, [7], 'a')
+    poll(index, tailer)
+    assert stored_ids(index) == list(range(5)) + [7]
+
+
+def test_import_saves_the_manifest_once(source, monkeypatch):
+    write(source, range(50))
+    monkeypatch.setattr(event_store, 'read_csv_chunks', lambda spec, source: ingest.read_csv_chunks(
+        spec, chunksize=10, source=source))
+    saves = []
+    save = event_store.DatasetStore._save
+    monkeypatch.setattr(event_store.DatasetStore, '_save', lambda self: saves.append(1) or save(self))
+    index, _ = open_store()
+    assert stored_ids(index) == list(range(50))
+    assert len(saves) == 2  # the reset and the end of the import
@@ -0,0 +1,175 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import dash
+import pytest
+from dash import Input, Output, html
+from dash.exceptions import PreventUpdate
+from flask import Flask
+
+import metrics
+from executor import SESSION_COOKIE, CallbackExecutor
+
+app = Flask(__name__)
+
+
+class Blocking:
+    # Fake computation: records its arguments and blocks until released
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def __call__(self, value):
+        self.calls.append(value)
+        assert self.release.wait(5)
+        return value * 10
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def call_as(session, wrapper, *args):
+    # Runs the callback inside a request carrying the session cookie (None: no session)
+    headers = {} if session is None else {'Cookie': f'{SESSION_COOKIE}={session}'}
+    with app.test_request_context(headers=headers):
+        return wrapper(*args)
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(8) as threads:
+        yield threads
+
+
+def test_identical_calls_share_one_computation(pool):
+    executor = CallbackExecutor(workers=2)
+    compute = Blocking()
+    wrapper = executor.offload('test', date_args=())(compute)
+    calls = [pool.submit(call_as, session, wrapper, 1) for session in ('a', 'b', None)]
+    wait_until(lambda: executor.stats()['waiting_calls'] == 3)
+    assert executor.stats()['in_flight'] == 1
+    compute.release.set()
+    assert [call.result(5) for call in calls] == [10, 10, 10]
+    assert compute.calls == [1]
+    wait_until(lambda: executor.stats()['in_flight'] == 0)
+
+
+def test_different_arguments_run_separately(pool):
+    executor = CallbackExecutor(workers=2)
+    compute = Blocking()
+    wrapper = executor.offload('test', date_args=())(compute)
+    calls = [pool.submit(call_as, None, wrapper, value) for value in (1, 2)]
+    wait_until(lambda: executor.stats()['running'] == 2)
+    compute.release.set()
+    assert [call.result(5) for call in calls] == [10, 20]
+    assert sorted(compute.calls) == [1, 2]
+
+
+def test_newer_call_supersedes_running_call_of_same_session(pool):
+    executor = CallbackExecutor(workers=2)
+    compute = Blocking()
+    wrapper = executor.offload('test', date_args=())(compute)
+    older = pool.submit(call_as, 'a', wrapper, 1)
+    wait_until(lambda: compute.calls == [1])
+    newer = pool.submit(call_as, 'a', wrapper, 2)
+    with pytest.raises(PreventUpdate):
+        older.result(5)
+    compute.release.set()
+    assert newer.result(5) == 20
+    # a computation that had started runs to the end
+    assert compute.calls == [1, 2]
+
+
+def test_superseded_queued_call_is_cancelled(pool):
+    executor = CallbackExecutor(workers=1)
+    compute = Blocking()
+    wrapper = executor.offload('test', date_args=())(compute)
+    busy = pool.submit(call_as, None, wrapper, 0)  # holds the only worker
+    wait_until(lambda: compute.calls == [0])
+    older = pool.submit(call_as, 'a', wrapper, 1)
+    wait_until(lambda: executor.stats()['in_flight'] == 2)
+    newer = pool.submit(call_as, 'a', wrapper, 2)
+    with pytest.raises(PreventUpdate):
+        older.result(5)
+    compute.release.set()
+    assert busy.result(5) == 0
+    assert newer.result(5) == 20
+    assert compute.calls == [0, 2]
+
+
+def test_superseded_call_is_not_cancelled_while_others_wait(pool):
+    executor = CallbackExecutor(workers=1)
+    compute = Blocking()
+    wrapper = executor.offload('test', date_args=())(compute)
+    busy = pool.submit(call_as, None, wrapper, 0)
+    wait_until(lambda: compute.calls == [0])
+    older = pool.submit(call_as, 'a', wrapper, 1)
+    other = pool.submit(call_as, 'b', wrapper, 1)
+    wait_until(lambda: executor.stats()['waiting_calls'] == 3)
+    newer = pool.submit(call_as, 'a', wrapper, 2)
+    with pytest.raises(PreventUpdate):
+        older.result(5)
+    compute.release.set()
+    assert (busy.result(5), other.result(5), newer.result(5)) == (0, 10, 20)
+    assert compute.calls == [0, 1, 2]
+
+
+def test_coalesce_computes_once_and_shares_errors(pool):
+    executor = CallbackExecutor(workers=1)
+    compute = Blocking()
+    key = ('test_coalesce', 1)
+    joined = metrics.CALLBACK_COALESCED.values.get((('callback', key[0]),), 0)
+    calls = [pool.submit(executor.coalesce, key, lambda: compute(1)) for _ in range(3)]
+    wait_until(lambda: metrics.CALLBACK_COALESCED.values.get((('callback', key[0]),), 0) == joined + 2)
+    compute.release.set()
+    assert [call.result(5) for call in calls] == [10, 10, 10]
+    assert compute.calls == [1]
+
+    release = threading.Event()
+
+    def fail():
+        assert release.wait(5)
+        raise ValueError('boom')
+
+    failing = [pool.submit(executor.coalesce, ('test_coalesce', 2), fail) for _ in range(2)]
+    wait_until(lambda: metrics.CALLBACK_COALESCED.values.get((('callback', key[0]),), 0) == joined + 3)
+    release.set()
+    for call in failing:
+        with pytest.raises(ValueError):
+            call.result(5)
+    assert executor.stats()['in_flight'] == 0
+
+
+def slow_callee(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+    return 'done'
+
+
+def test_slow_offloaded_callback_profile_has_the_callee_frames(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'profiler', metrics.SlowRequestProfiler(0.05, 0.002, str(tmp_path)))
+    dash_app = dash.Dash(__name__)
+    dash_app.layout = html.Div([html.Div(id='in'), html.Div(id='out')])
+    executor = CallbackExecutor(workers=1)
+
+    @dash_app.callback(Output('out', 'children'), Input('in', 'children'))
+    @executor.offload('profiled', date_args=())
+    def profiled(value):
+        return slow_callee(0.3)
+
+    metrics.instrument(dash_app)
+    response = dash_app.server.test_client().post('/_dash-update-component', json={
+        'output': 'out.children', 'outputs': {'id': 'out', 'property': 'children'},
+        'inputs': [{'id': 'in', 'property': 'children', 'value': 1}], 'state': [], 'changedPropIds': ['in.children'],
+    })
+    assert response.status_code == 200
+    [profile] = tmp_path.glob('*-profiled.folded')
+    stacks = profile.read_text().splitlines()
+    assert any('slow_callee (test_executor.py' in stack for stack in stacks)
+    assert not metrics.profiler.active
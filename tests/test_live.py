@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import live
+
+
+def test_cached_builds_once_under_concurrent_first_calls():
+    calls = []
+
+    @live.cached('test_cached')
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: build(), range(8)))
+    assert len(calls) == 1
+    assert len({id(result) for result in results}) == 1
+    assert build.built()
+
+
+def test_load_is_single_flight_and_keeps_trackers(monkeypatch):
+    loads = []
+
+    def load_with_offset(name):
+        loads.append(name)
+        time.sleep(0.05)
+        return pd.DataFrame({'time': pd.to_datetime(['2025-06-01', '2025-06-02'])}), 0
+
+    monkeypatch.setattr(live, 'load_with_offset', load_with_offset)
+    monkeypatch.setattr(live, 'CsvTailer', lambda name, offset, drop_dir: None)
+    monkeypatch.setattr(live.mmap_store, 'available', lambda name: False)
+    monkeypatch.setattr(live.event_store, 'enabled', lambda: False)
+
+    with ThreadPoolExecutor(4) as pool:
+        indexes = list(pool.map(lambda _: live.load('test_load', 'time', lambda rows: rows), range(4)))
+    try:
+        assert loads == ['test_load']
+        assert len({id(index) for index in indexes}) == 1
+        seen = []
+        live.track('test_load', lambda: seen, lambda obj, rows: obj.append(len(rows)))
+        live.load('test_load', 'time', lambda rows: rows)
+        assert live.sources['test_load'].index is indexes[0]
+        assert len(live.sources['test_load'].listeners) == 1
+    finally:
+        live.sources.pop('test_load', None)
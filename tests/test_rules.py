@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rules import Rule, RuleEngine, load_rules
+from schema import NO_IP
+
+T0 = pd.Timestamp('2025-06-01')
+
+
+def web_rows(events):
+    # events: (seconds after T0, ip as int, status_code)
+    seconds, ips, codes = zip(*events) if events else ((), (), ())
+    return pd.DataFrame({
+        'timestamp': (T0 + pd.to_timedelta(seconds, unit='s')).as_unit('ns'),
+        'ip_address': np.asarray(ips, dtype=np.uint32),
+        'status_code': np.asarray(codes, dtype=np.uint16),
+    })
+
+
+def rejected(min_count, window='1min'):
+    return Rule('rejected', 'web_logs', 'status_code in (401, 403)', group_by='ip_address', window=window,
+                min_count=min_count)
+
+
+def run(rules, rows, batch=None):
+    engine = RuleEngine(rules)
+    batch = batch or max(len(rows), 1)
+    for start in range(0, len(rows), batch):
+        engine.evaluate(rows.iloc[start:start + batch], 'web_logs', 'timestamp')
+    return engine
+
+
+def fired(engine):
+    return list(zip(engine.alerts['group'], pd.to_datetime(engine.alerts['time'].astype('int64'))))
+
+
+def test_row_rule_fires_on_every_match():
+    rule = Rule('errors', 'web_logs', "status_code >= 500 and ip_address != '0.0.0.9'")
+    engine = run([rule], web_rows([(0, 1, 500), (1, 9, 503), (2, 1, 200), (3, 2, 502)]))
+    assert list(engine.alerts['detail']) == ['ip_address=0.0.0.1, status_code=500',
+                                             'ip_address=0.0.0.2, status_code=502']
+    assert rule.fired == 2
+
+
+@pytest.mark.parametrize('matches,fires', [(2, False), (3, True), (4, True)])
+def test_min_count_threshold(matches, fires):
+    # group 8 stays one match short of min_count
+    rows = web_rows(sorted([(i, 7, 401) for i in range(matches)] + [(i, 8, 403) for i in range(2)]))
+    engine = run([rejected(3)], rows)
+    assert fired(engine) == ([(7, T0 + pd.Timedelta(seconds=2))] if fires else [])
+
+
+def test_matches_must_fall_within_the_window():
+    # 3 matches spanning exactly the window do not fire, the window is exclusive
+    assert fired(run([rejected(3)], web_rows([(0, 1, 401), (30, 1, 403), (60, 1, 401)]))) == []
+    assert fired(run([rejected(3)], web_rows([(1, 1, 401), (30, 1, 403), (60, 1, 401)]))) == [
+        (1, T0 + pd.Timedelta(seconds=60))]
+    # non-matching rows and other groups do not count
+    rows = web_rows([(0, 1, 401), (1, 1, 200), (2, 2, 401), (3, 1, 200), (4, 1, 403)])
+    assert fired(run([rejected(3)], rows)) == []
+
+
+def test_rows_without_an_ip_are_not_a_group():
+    rows = web_rows([(i, NO_IP, 401) for i in range(5)])
+    assert fired(run([rejected(3)], rows)) == []
+
+
+def test_group_fires_once_per_window_bucket():
+    # a burst that keeps matching fires once per 1min bucket and group
+    events = [(second, 1, 401) for second in range(0, 150, 5)] + [(second, 2, 401) for second in range(0, 20, 5)]
+    rows = web_rows(sorted(events))
+    engine = run([rejected(3)], rows)
+    assert fired(engine) == [(1, T0 + pd.Timedelta(seconds=10)), (2, T0 + pd.Timedelta(seconds=10)),
+                             (1, T0 + pd.Timedelta(seconds=60)), (1, T0 + pd.Timedelta(seconds=120))]
+    assert set(engine.alerts['count']) == {3}
+    assert engine.alerts['detail'].iloc[0] == '3+ matches of status_code in (401, 403) within 1min'
+
+
+def reference(rows, min_count, window):
+    # Sliding window per group, one row at a time
+    window = pd.Timedelta(window).value
+    matches = rows[rows['status_code'].isin([401, 403])]
+    alerts, last_bucket = set(), {}
+    for group, times in matches.groupby('ip_address')['timestamp']:
+        times = times.to_numpy().astype('int64')
+        for i in range(min_count - 1, len(times)):
+            bucket = times[i] // window
+            if times[i] - times[i - min_count + 1] < window and last_bucket.get(group) != bucket:
+                last_bucket[group] = bucket
+                alerts.add((group, pd.Timestamp(times[i])))
+    return alerts
+
+
+@pytest.fixture
+def traffic():
+    rng = np.random.default_rng(3)
+    n = 20000
+    seconds = np.sort(rng.integers(0, 86400, n))
+    return web_rows(zip(seconds, rng.integers(1, 31, n), rng.choice([200, 401, 403, 500], n)))
+
+
+@pytest.mark.parametrize('min_count,window', [(1, '1min'), (3, '1min'), (5, '10min'), (20, '1h')])
+@pytest.mark.parametrize('batch', [None, 777, 50])
+def test_incremental_evaluation_matches_reference(traffic, min_count, window, batch):
+    engine = run([rejected(min_count, window)], traffic, batch)
+    assert len(engine.alerts)
+    assert set(fired(engine)) == reference(traffic, min_count, window)
+
+
+def test_last_fired_buckets_are_pruned(traffic):
+    rule = rejected(1)
+    run([rule], traffic, 500)
+    last_bucket = traffic['timestamp'].iloc[-1].value // rule.window.value
+    assert rule._last_bucket and set(rule._last_bucket.values()) == {last_bucket}
+
+
+def test_shared_predicates_are_computed_once(traffic):
+    rules = [Rule('a', 'web_logs', 'status_code >= 500'),
+             Rule('b', 'web_logs', 'status_code >= 500 and ip_address < 10'),
+             Rule('c', 'web_logs', 'ip_address < 10 or status_code >= 500')]
+    engine = run(rules, traffic)
+    # status_code >= 500, ip_address < 10, and the 'and' and 'or' nodes
+    assert engine.predicates['web_logs'] == 4
+    errors = traffic['status_code'] >= 500
+    assert [rule.fired for rule in rules] == [errors.sum(), (errors & (traffic['ip_address'] < 10)).sum(),
+                                              (errors | (traffic['ip_address'] < 10)).sum()]
+
+
+def test_alerts_frame_is_newest_first_with_readable_groups():
+    rows = web_rows([(0, 1, 401), (1, 1, 401), (2, 2, 500), (90000, 3, 401), (90001, 3, 401)])
+    engine = run([rejected(2), Rule('errors', 'web_logs', 'status_code >= 500')], rows)
+    alerts = engine.alerts_frame()
+    assert list(alerts['group']) == ['0.0.0.3', '', '0.0.0.1']
+    assert alerts['time'].is_monotonic_decreasing
+    day = engine.alerts_frame(T0, T0 + pd.Timedelta(days=1))
+    assert list(day['rule']) == ['errors', 'rejected']
+
+
+@pytest.mark.parametrize('source,where,message', [
+    ('web_logs', 'bogus == 1', 'unknown column'),
+    ('malware_alerts', "severity < 'High'", "'<' is not supported"),
+    ('web_logs', "status_code == '500'", 'cannot be compared'),
+    ('web_logs', "ip_address == '300.1.1.1'", 'not an IPv4 address'),
+    ('network_traffic', 'protocol == inbound_bytes', 'cannot compare'),
+    ('web_logs', 'status_code + 1 > 2', 'unsupported expression'),
+    ('web_logs', "status_code == -'a'", 'unsupported value'),
+    ('web_logs', 'status_code == -True', 'unsupported value'),
+    ('web_logs', 'status_code >', 'invalid syntax'),
+])
+def test_invalid_rules_fail_when_loaded(source, where, message):
+    with pytest.raises(ValueError, match=message):
+        Rule('bad', source, where)
+
+
+def test_invalid_rule_options():
+    with pytest.raises(ValueError, match='unknown group_by'):
+        Rule('bad', 'web_logs', 'status_code > 1', group_by='nope', window='1h')
+    with pytest.raises(ValueError, match='needs a window'):
+        Rule('bad', 'web_logs', 'status_code > 1', group_by='ip_address')
+    with pytest.raises(ValueError, match='min_count'):
+        Rule('bad', 'web_logs', 'status_code > 1', group_by='ip_address', window='1h', min_count=0)
+
+
+def test_shipped_rules_load():
+    rules = load_rules()
+    assert rules and len({rule.name for rule in rules}) == len(rules)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import metrics
+from schema import NO_IP, compact, int_to_ip, ip_to_int
+
+
+def test_ip_round_trip():
+    ips = ['10.0.0.1', '192.168.1.254', '255.255.255.255', '1.2.3.4']
+    assert int_to_ip(ip_to_int(ips)).tolist() == ips
+
+
+@pytest.mark.parametrize('ip', [None, np.nan, '', 'not-an-ip', '10.0.0', '10.0.0.1.5', '10.0.0.256',
+                                '10.0.-1.2', '::1', '2001:db8::1', '::ffff:10.0.0.1'])
+def test_invalid_ips_become_no_ip(ip):
+    packed = ip_to_int(pd.Series(['10.0.0.1', ip, '10.0.0.2'], dtype=object))
+    assert packed.tolist() == [ip_to_int(['10.0.0.1'])[0], NO_IP, ip_to_int(['10.0.0.2'])[0]]
+    assert int_to_ip(packed).tolist() == ['10.0.0.1', '', '10.0.0.2']
+
+
+def test_chunk_without_dotted_quads_is_all_no_ip():
+    assert ip_to_int(['::1', None, 'host']).tolist() == [NO_IP] * 3
+
+
+def test_compact_counts_invalid_ips():
+    key = (('column', 'source_ip'), ('dataset', 'network_traffic'))
+    before = metrics.INVALID_IPS.values.get(key, 0)
+    df = pd.DataFrame({'source_ip': ['10.0.0.1', '2001:db8::1', None]})
+    compact(df, 'network_traffic')
+    assert metrics.INVALID_IPS.values.get(key, 0) - before == 2
+
+
+def test_counters_get_the_declared_type_in_every_chunk():
+    small = compact(pd.DataFrame({'status_code': [200, 404], 'response_time_ms': [5, 12]}), 'web_logs')
+    large = compact(pd.DataFrame({'status_code': [503], 'response_time_ms': [70000]}), 'web_logs')
+    assert small.dtypes.to_dict() == large.dtypes.to_dict() == {'status_code': np.uint16,
+                                                                 'response_time_ms': np.uint32}
+
+
+def test_counters_outside_the_declared_range_are_clipped_and_counted():
+    key = (('column', 'outbound_bytes'), ('dataset', 'network_traffic'))
+    before = metrics.CLIPPED_VALUES.values.get(key, 0)
+    df = compact(pd.DataFrame({'outbound_bytes': [-1, 10, 2**33]}), 'network_traffic')
+    assert df['outbound_bytes'].tolist() == [0, 10, 2**32 - 1]
+    assert metrics.CLIPPED_VALUES.values.get(key, 0) - before == 2
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import CountMinSketch, HeavyHitters, HyperLogLog, SpaceSaving, TimeBuckets
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def skewed(rng, n=200000):
+    # Zipf keys with a few heavy hitters and a long tail
+    return pd.Series((rng.zipf(1.3, n) % 100003).astype(np.uint32))
+
+
+@pytest.mark.parametrize('precision', [10, 12, 14])
+@pytest.mark.parametrize('distinct', [500, 20000, 300000])
+def test_hll_count_within_standard_errors(rng, precision, distinct):
+    values = pd.Series(rng.integers(0, distinct, 400000, dtype=np.uint32))
+    hll = HyperLogLog(precision)
+    hll.add(values)
+    exact = values.nunique()
+    std_error = 1.04 / np.sqrt(2 ** precision)
+    assert abs(hll.count() / exact - 1) <= 4 * std_error
+
+
+def test_hll_merge_equals_concatenated(rng):
+    a = pd.Series(rng.integers(0, 50000, 100000, dtype=np.uint32))
+    b = pd.Series(rng.integers(25000, 75000, 100000, dtype=np.uint32))
+    left, right, whole = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    left.add(a)
+    right.add(b)
+    whole.add(pd.concat([a, b], ignore_index=True))
+    merged = left.merge(right)
+    assert np.array_equal(merged.registers, whole.registers)
+    assert merged.count() == whole.count()
+
+
+def test_count_min_overestimates_within_bound(rng):
+    values = skewed(rng)
+    weights = rng.integers(1, 100, len(values))
+    sketch = CountMinSketch(width=1024, depth=4)
+    sketch.add(values, weights)
+    exact = pd.Series(weights).groupby(values.to_numpy()).sum()
+    over = sketch.estimate(exact.index.to_numpy()) - exact.to_numpy()
+    assert (over >= 0).all()
+    # each key is within e / width * N with probability 1 - exp(-depth)
+    beyond = (over > np.e / sketch.width * weights.sum()).mean()
+    assert beyond <= np.exp(-sketch.depth)
+
+
+def test_count_min_merge_equals_concatenated(rng):
+    a, b = skewed(rng, 50000), skewed(rng, 50000)
+    left, right, whole = CountMinSketch(), CountMinSketch(), CountMinSketch()
+    left.add(a)
+    right.add(b)
+    whole.add(pd.concat([a, b], ignore_index=True))
+    assert np.array_equal(left.merge(right).table, whole.table)
+
+
+def check_top_k(top, exact, total, capacity):
+    # every key heavier than total / capacity is reported, with count - error <= exact <= count
+    heavy = exact[exact > total / capacity]
+    assert len(heavy) and heavy.index.isin(top.index).all()
+    reported = exact.reindex(top.index, fill_value=0)
+    assert (top['guaranteed'] <= reported).all()
+    assert (reported <= top['count']).all()
+
+
+@pytest.mark.parametrize('capacity', [50, 200])
+def test_space_saving_recall_and_bounds(rng, capacity):
+    values = skewed(rng)
+    weights = rng.integers(1, 60000, len(values))
+    summary = SpaceSaving(capacity)
+    for start in range(0, len(values), 20000):
+        summary.add(values.iloc[start:start + 20000], weights[start:start + 20000])
+    exact = pd.Series(weights).groupby(values.to_numpy()).sum()
+    check_top_k(summary.top(capacity), exact, weights.sum(), capacity)
+
+
+@pytest.mark.parametrize('capacity', [50, 200])
+def test_heavy_hitters_recall_and_bounds(rng, capacity):
+    values = skewed(rng)
+    weights = rng.integers(1, 60000, len(values))
+    hitters = HeavyHitters(capacity=capacity)
+    for start in range(0, len(values), 20000):
+        hitters.add(values.iloc[start:start + 20000], weights[start:start + 20000])
+    exact = pd.Series(weights).groupby(values.to_numpy()).sum()
+    check_top_k(hitters.top(capacity), exact, weights.sum(), capacity)
+
+
+def test_merged_time_buckets_equal_concatenated(rng):
+    n = 100000
+    start = pd.Timestamp('2025-06-01').value
+    rows = pd.DataFrame({
+        'time': pd.to_datetime(np.sort(rng.integers(start, start + 5 * 86400 * 10**9, n)), unit='ns'),
+        'key': skewed(rng, n),
+    })
+    distinct = TimeBuckets('time', HyperLogLog, lambda hll, part: hll.add(part['key']), freq='D', rows=rows)
+    frequencies = TimeBuckets('time', CountMinSketch, lambda cms, part: cms.add(part['key']), freq='D', rows=rows)
+    hll, cms = HyperLogLog(), CountMinSketch()
+    hll.add(rows['key'])
+    cms.add(rows['key'])
+    assert np.array_equal(distinct.merged().registers, hll.registers)
+    assert np.array_equal(frequencies.merged().table, cms.table)
+
+
+def test_merged_heavy_hitters_keep_guarantees(rng):
+    # Space-Saving merges are not identical to one pass over the data, but keep its bounds
+    values = skewed(rng)
+    halves = []
+    for part in (values.iloc[:len(values) // 2], values.iloc[len(values) // 2:]):
+        hitters = HeavyHitters(capacity=100)
+        hitters.add(part)
+        halves.append(hitters)
+    merged = halves[0].merge(halves[1])
+    exact = values.value_counts()
+    check_top_k(merged.top(100), exact, len(values), 100)
@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from table_query import query_table
+
+
+@pytest.fixture
+def alerts():
+    severity = ['Low', 'High', 'Critical', 'Medium', 'High', None, 'Low', 'Critical', 'Medium', 'High']
+    protocol = ['TCP', 'UDP', 'ICMP', 'HTTP', 'HTTPS', 'TCP', 'UDP', None, 'TCP', 'ICMP']
+    text = pd.DataFrame({'severity': severity, 'protocol': protocol, 'row': range(len(severity))})
+    return text.astype({'severity': 'string', 'protocol': 'string'})
+
+
+@pytest.mark.parametrize('column,value', [('severity', 'High'), ('protocol', 'TCP'), ('protocol', 'A')])
+@pytest.mark.parametrize('op', ['<', '<=', '>', '>=', '=', '!='])
+def test_relational_filters_on_categoricals_match_text(alerts, op, column, value):
+    query = f'{{{column}}} {op} {value}'
+    categorical = alerts.astype({'severity': 'category', 'protocol': 'category'})
+    expected, expected_pages = query_table(alerts, 0, 20, [], query)
+    records, pages = query_table(categorical, 0, 20, [], query)
+    assert [r['row'] for r in records] == [r['row'] for r in expected]
+    assert pages == expected_pages
+
+
+def test_relational_filter_on_categorical(alerts):
+    categorical = alerts.astype({'severity': 'category'})
+    records, _ = query_table(categorical, 0, 20, [], '{severity} < High')
+    assert sorted(r['severity'] for r in records) == ['Critical', 'Critical']
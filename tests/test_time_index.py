@@ -0,0 +1,19 @@
+import pandas as pd
+
+from time_index import TimeIndex
+
+T0 = pd.Timestamp('2025-06-01')
+
+
+def frame(minutes, users):
+    return pd.DataFrame({'date': T0 + pd.to_timedelta(minutes, unit='min'),
+                         'username': pd.Series(users).astype('category')})
+
+
+def test_appended_categories_match_a_cold_build():
+    warm = TimeIndex(frame([0, 1], ['mallory', 'bob']), 'date')
+    warm.append(frame([2, 3], ['zoe', 'alice']))
+    cold = TimeIndex(frame([0, 1, 2, 3], ['mallory', 'bob', 'zoe', 'alice']), 'date')
+    assert list(warm.df['username'].cat.categories) == list(cold.df['username'].cat.categories) == \
+        ['alice', 'bob', 'mallory', 'zoe']
+    pd.testing.assert_frame_equal(warm.df, cold.df)
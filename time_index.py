@@ -0,0 +1,154 @@
+# Time-range index used by the date filtered panels.
+# Each dataset is sorted once by its timestamp column so a date range can be
+# answered with two binary searches and a positional slice, instead of building
+# a boolean mask over every row on each date-picker change.
+#
+# Rows appended in live mode are kept as extra sorted segments. Small segments
+# are merged into their neighbour while it is less than twice their size, so the
+# segment count stays logarithmic and each row is only re-copied a few times.
+from itertools import count
+
+import pandas as pd
+
+import metrics
+
+# Every index built (or rebuilt after a reload) gets a new version number, result
+# caches use it to tell which entries were computed from older data
+_versions = count(1)
+
+
+def next_version():
+    return next(_versions)
+
+
+def _bounds(keys, start, end, inclusive_end):
+    lo = 0 if start is None or pd.isna(start) else int(keys.searchsorted(pd.Timestamp(start), side='left'))
+    if end is None or pd.isna(end):
+        hi = len(keys)
+    else:
+        side = 'right' if inclusive_end else 'left'
+        hi = int(keys.searchsorted(pd.Timestamp(end), side=side))
+    return lo, max(lo, hi)
+
+
+def _renumber(df, offset):
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    return df
+
+
+class TimeIndex:
+    def __init__(self, df, time_col, presorted=False):
+        self.time_col = time_col
+        # NaT values are kept apart from the sorted segments, they never match a range.
+        # presorted frames (e.g. memory-mapped exports) are used as they are, without a copy.
+        if not presorted:
+            df = df.sort_values(time_col, kind='stable', na_position='last').reset_index(drop=True)
+        n_valid = int(df[time_col].notna().sum())
+        self._segments = [df.iloc[:n_valid]]
+        self._invalid = df.iloc[n_valid:]
+        self._df = df
+        self.version = next_version()
+
+    def __len__(self):
+        return sum(len(seg) for seg in self._segments) + len(self._invalid)
+
+    @property
+    def df(self):
+        # The whole dataset as one frame sorted by time (NaT rows last)
+        df = self._df
+        if df is None:
+            segments, invalid = self._segments, self._invalid
+            df = pd.concat(segments + [invalid], ignore_index=True) if len(segments) > 1 or len(invalid) else segments[0]
+            self._df = df
+        return df
+
+    @property
+    def columns(self):
+        return self._segments[0].columns
+
+    def min(self):
+        for seg in self._segments:
+            if len(seg):
+                return seg[self.time_col].iloc[0]
+        return pd.NaT
+
+    def max(self):
+        for seg in reversed(self._segments):
+            if len(seg):
+                return seg[self.time_col].iloc[-1]
+        return pd.NaT
+
+    def slice(self, start=None, end=None, inclusive_end=True, columns=None):
+        # Rows with start <= time <= end (or time < end). With a single segment
+        # this is a positional slice sharing memory with the sorted frame.
+        # `columns` limits the columns returned.
+        segments = self._segments
+        parts = []
+        for seg in segments:
+            lo, hi = _bounds(seg[self.time_col], start, end, inclusive_end)
+            if hi > lo:
+                parts.append(seg.iloc[lo:hi])
+        metrics.record(scanned=sum(len(part) for part in parts))
+        if not parts:
+            parts = [segments[0].iloc[0:0]]
+        if columns is not None:
+            parts = [part[list(columns)] for part in parts]
+        return parts[0] if len(parts) == 1 else pd.concat(parts)
+
+    def frames(self, columns=None):
+        # The stored rows as a sequence of time-ordered frames (NaT rows last),
+        # for building incremental aggregates without one whole-dataset frame
+        parts = [seg for seg in self._segments if len(seg)] + ([self._invalid] if len(self._invalid) else [])
+        for part in parts or [self._segments[0]]:
+            yield part if columns is None else part[list(columns)]
+
+    def memory_usage(self):
+        # Bytes held by the stored rows (memory-mapped columns included)
+        return int(sum(part.memory_usage(deep=True).sum() for part in self._segments + [self._invalid]))
+
+    def _align_categories(self, rows):
+        # New rows reuse the categorical dtypes of the stored columns, widened if needed.
+        # Widened categories stay sorted, as in an index built from the same rows at once.
+        segments, invalid = self._segments, self._invalid
+        rows = rows.copy()
+        for col, dtype in segments[0].dtypes.items():
+            if not isinstance(dtype, pd.CategoricalDtype) or col not in rows:
+                continue
+            cats = dtype.categories.union(pd.Index(rows[col].dropna().unique()), sort=True)
+            if len(cats) != len(dtype.categories):
+                widened = pd.CategoricalDtype(cats, ordered=dtype.ordered)
+                segments = [seg.assign(**{col: seg[col].astype(widened)}) for seg in segments]
+                invalid = invalid.assign(**{col: invalid[col].astype(widened)})
+                dtype = widened
+            rows[col] = rows[col].astype(dtype)
+        return rows, segments, invalid
+
+    def append(self, rows):
+        # Adds newly ingested rows. Rows newer than everything stored become a new
+        # segment, out-of-order rows trigger one re-sort of the valid rows.
+        if not len(rows):
+            return
+        rows, segments, invalid = self._align_categories(rows)
+        rows = rows.sort_values(self.time_col, kind='stable', na_position='last')
+        n_valid = int(rows[self.time_col].notna().sum())
+        valid = rows.iloc[:n_valid]
+        offset = sum(len(seg) for seg in segments)
+
+        if len(valid):
+            current_max = self.max()
+            if not pd.isna(current_max) and valid[self.time_col].iloc[0] < current_max:
+                merged = pd.concat(segments + [valid], ignore_index=True)
+                segments = [merged.sort_values(self.time_col, kind='stable').reset_index(drop=True)]
+            else:
+                segments = [seg for seg in segments if len(seg)] + [_renumber(valid.copy(), offset)]
+                while len(segments) > 1 and len(segments[-2]) < 2 * len(segments[-1]):
+                    tail = segments.pop()
+                    head = segments.pop()
+                    segments.append(_renumber(pd.concat([head, tail]), head.index[0]))
+        if len(rows) > n_valid:
+            invalid = pd.concat([invalid, rows.iloc[n_valid:]], ignore_index=True)
+
+        self._segments = segments
+        self._invalid = invalid
+        self._df = None
+        self.version = next_version()